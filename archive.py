@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Download archive for YouTube Downloader GUI
+Remembers completed downloads so re-runs can skip them without starting yt-dlp
+"""
+
+import json
+import re
+import threading
+import time
+
+
+class DownloadArchive:
+    """Index of completed downloads with O(1) lookups
+
+    Completed videos are recorded per download profile (e.g. "video-720p" or
+    "audio-mp3", so fetching the audio of a video already downloaded as
+    video is not skipped). Each profile has its own archive file in
+    yt-dlp's --download-archive format ("<extractor> <id>" per line), which
+    is also handed to yt-dlp so it can skip videos that could only be
+    identified after extraction. Details such as the format and output path
+    go to a JSON-lines sidecar.
+    """
+
+    def __init__(self, config_dir):
+        self.archive_dir = config_dir / "archive"
+        self.details_file = self.archive_dir / "downloads.jsonl"
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._offsets = {}
+        self._details = None
+
+    @staticmethod
+    def make_key(extractor, video_id):
+        """Archive key as yt-dlp writes it"""
+        return f"{extractor.lower()} {video_id}"
+
+    @staticmethod
+    def profile_name(options):
+        """Download profile for a job's options"""
+        if options.get("audio_only"):
+            name = f"audio-{options.get('audio_format', 'best')}"
+        else:
+            name = f"video-{options.get('format', 'best')}"
+        return re.sub(r'[^A-Za-z0-9_-]', '_', name)
+
+    def archive_file(self, profile):
+        """Path of the yt-dlp compatible archive file for a profile"""
+        try:
+            #yt-dlp creates the file but not its directory
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass  #Reported by yt-dlp when it tries to write
+        return self.archive_dir / f"{profile}.txt"
+
+    def _profile_keys(self, profile, sync=False):
+        """In-memory key set of a profile (lock held)
+
+        The archive file is read on first use; with sync=True lines appended
+        since then (by yt-dlp itself) are picked up as well.
+        """
+        keys = self._keys.get(profile)
+        if keys is None or sync:
+            keys = self._keys.setdefault(profile, set())
+            try:
+                with open(self.archive_file(profile), 'rb') as f:
+                    f.seek(self._offsets.get(profile, 0))
+                    data = f.read()
+            except OSError:
+                return keys
+            #Only consume complete lines; a partial one is read next time
+            complete = data[:data.rfind(b"\n") + 1]
+            self._offsets[profile] = self._offsets.get(profile, 0) + len(complete)
+            for line in complete.decode('utf-8', 'replace').splitlines():
+                line = line.strip()
+                if line:
+                    keys.add(line)
+        return keys
+
+    def contains(self, profile, extractor, video_id):
+        """True if the video was already downloaded with this profile"""
+        with self._lock:
+            return self.make_key(extractor, video_id) in self._profile_keys(profile)
+
+    def add(self, profile, extractor, video_id, format_id=None, path=None):
+        """Record a completed download"""
+        key = self.make_key(extractor, video_id)
+        record = {"profile": profile, "extractor": extractor.lower(), "id": video_id,
+                  "format": format_id, "path": path, "time": time.time()}
+        with self._lock:
+            keys = self._profile_keys(profile, sync=True)
+            try:
+                self.archive_dir.mkdir(parents=True, exist_ok=True)
+                if key not in keys:
+                    #Not recorded by yt-dlp through --download-archive yet
+                    with open(self.archive_file(profile), 'a', encoding='utf-8') as f:
+                        f.write(key + "\n")
+                with open(self.details_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                pass  #Fail silently, the archive is only an optimization
+            keys.add(key)
+            if self._details is not None:
+                self._details[(profile, key)] = record
+
+    def details(self, profile, extractor, video_id):
+        """Recorded details (format, path, time) of a download, None if unknown"""
+        with self._lock:
+            if self._details is None:
+                self._details = {}
+                try:
+                    with open(self.details_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                                record_key = self.make_key(record["extractor"], record["id"])
+                            except (json.JSONDecodeError, KeyError):
+                                continue
+                            self._details[(record["profile"], record_key)] = record
+                except OSError:
+                    pass
+            return self._details.get((profile, self.make_key(extractor, video_id)))
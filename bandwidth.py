@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Bandwidth limiter for YouTube Downloader GUI
+A local proxy that holds the download bandwidth of all running jobs under one shared cap
+"""
+
+import re
+import select
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+#Choices offered for the "Bandwidth Limit" setting; any rate such as 750K may be typed
+BANDWIDTH_CHOICES = ["off", "500K", "1M", "2M", "5M", "10M", "20M"]
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+#Bytes relayed per read; small enough that concurrent jobs interleave fairly
+RELAY_CHUNK = 16 * 1024
+
+
+def parse_rate(text):
+    """'5M', '500K', '1.5MiB/s' -> bytes per second; None for empty or 'off'"""
+    if text is None:
+        return None
+    text = str(text).strip()
+    if not text or text.lower() in ("off", "none", "0"):
+        return None
+    match = re.fullmatch(r'([\d.]+)\s*([KMG]?)(?:i?B)?(?:/s)?', text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {text!r}")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()]) or None
+
+
+def _minutes(clock):
+    """'09:30' -> minutes since midnight"""
+    hours, minutes = clock.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def scheduled_rate(limit, schedule, now=None):
+    """Rate (bytes/s) in effect at now, None for unlimited
+
+    schedule is a list of {"start": "HH:MM", "end": "HH:MM", "rate": "2M"}
+    entries; the first one covering the current time wins, otherwise the
+    plain limit applies. Entries may wrap around midnight (22:00-06:00).
+    """
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for entry in schedule or []:
+        try:
+            start, end = _minutes(entry["start"]), _minutes(entry["end"])
+            rate = parse_rate(entry.get("rate"))
+        except (KeyError, ValueError, AttributeError):
+            continue  #Ignore malformed entries
+        if start <= minute < end or (end < start and (minute >= start or minute < end)):
+            return rate
+    try:
+        return parse_rate(limit)
+    except ValueError:
+        return None  #A bad limit in the config file means no limit
+
+
+class TokenBucket:
+    """Token bucket shared by every relayed connection
+
+    Idle connections take no tokens, so whatever rate is available is
+    spread over the connections that are actually transferring.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Change the rate; None means unlimited"""
+        with self._lock:
+            self.rate = rate
+            self._tokens = min(self._tokens, self._burst())
+
+    def _burst(self):
+        """Most tokens that can build up while idle (lock held)"""
+        return max(self.rate / 10, RELAY_CHUNK) if self.rate else 0
+
+    def consume(self, count):
+        """Block until count bytes may be transferred"""
+        while True:
+            with self._lock:
+                if not self.rate:
+                    return
+                now = time.monotonic()
+                self._tokens = min(self._tokens + (now - self._updated) * self.rate, self._burst())
+                self._updated = now
+                if self._tokens >= count:
+                    self._tokens -= count
+                    return
+                wait = (count - self._tokens) / self.rate
+            time.sleep(min(wait, 0.25))
+
+
+class _ProxyHandler(socketserver.BaseRequestHandler):
+    """One proxied connection: CONNECT tunnels (HTTPS) and plain HTTP requests"""
+
+    def handle(self):
+        client = self.request
+        try:
+            head, extra = self._read_head(client)
+            if not head:
+                return
+            request_line, _, rest = head.partition(b'\r\n')
+            method, target, version = request_line.decode('latin-1').split(' ', 2)
+
+            if method.upper() == 'CONNECT':
+                host, _, port = target.rpartition(':')
+                upstream = socket.create_connection((host.strip('[]'), int(port)), timeout=30)
+                client.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            else:
+                url = urlsplit(target)
+                upstream = socket.create_connection((url.hostname, url.port or 80), timeout=30)
+                path = url.path or '/'
+                if url.query:
+                    path += '?' + url.query
+                #One request per connection keeps the relay a plain byte pipe
+                headers = [line for line in rest.split(b'\r\n')
+                           if line and not line.lower().startswith((b'proxy-connection:', b'connection:'))]
+                upstream.sendall(f"{method} {path} {version}\r\n".encode('latin-1') +
+                                 b'\r\n'.join(headers + [b'Connection: close']) + b'\r\n\r\n')
+            if extra:
+                upstream.sendall(extra)
+        except (OSError, ValueError):
+            return
+
+        try:
+            self._relay(client, upstream)
+        except OSError:
+            pass  #Either side hung up
+        finally:
+            upstream.close()
+
+    @staticmethod
+    def _read_head(sock):
+        """Read the request headers; returns (head, bytes read past them)"""
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = sock.recv(4096)
+            if not chunk or len(data) > 65536:
+                return None, b''
+            data += chunk
+        head, _, extra = data.partition(b'\r\n\r\n')
+        return head, extra
+
+    def _relay(self, client, upstream):
+        """Copy bytes both ways; downstream bytes are paid for from the shared bucket"""
+        bucket = self.server.bucket
+        sockets = [client, upstream]
+        while True:
+            readable, _, errored = select.select(sockets, [], sockets, 60)
+            if errored or not readable:
+                return
+            for sock in readable:
+                data = sock.recv(RELAY_CHUNK)
+                if not data:
+                    return
+                if sock is upstream:
+                    bucket.consume(len(data))
+                    client.sendall(data)
+                else:
+                    upstream.sendall(data)
+
+
+class _ProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class BandwidthLimiter:
+    """Caps the combined download rate of every job
+
+    Jobs are pointed at a local proxy (--proxy) whose connections all draw
+    from one token bucket, so the budget follows whichever jobs are
+    transferring instead of being split statically with --limit-rate. The
+    rate is re-read from the limit and schedule every few seconds.
+
+    Without a limit jobs normally bypass the proxy. With follow_changes
+    (the GUI, where the limit can be set at any time) they always go
+    through it, the bucket running unlimited until a limit is set, so the
+    limit also reaches jobs that started while it was off.
+    """
+
+    def __init__(self, limit=None, schedule=None, follow_changes=False):
+        self.limit = limit
+        self.schedule = schedule or []
+        self.follow_changes = follow_changes
+        self.bucket = TokenBucket(self.current_rate())
+        self._server = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """True if a limit or a schedule is configured"""
+        return bool(scheduled_rate(self.limit, None) or self.schedule)
+
+    def configure(self, limit=None, schedule=None):
+        """Change the limit (and schedule); running jobs follow immediately"""
+        parse_rate(limit)  #Raises ValueError for bad input
+        self.limit = limit
+        if schedule is not None:
+            self.schedule = schedule
+        self.bucket.set_rate(self.current_rate())
+
+    def current_rate(self):
+        """Rate in effect right now, None for unlimited"""
+        return scheduled_rate(self.limit, self.schedule)
+
+    def proxy_url(self):
+        """URL of the throttling proxy, started on first use; None when no limit is configured (unless follow_changes)"""
+        if not (self.enabled or self.follow_changes):
+            return None
+        with self._lock:
+            if self._server is None:
+                self._server = _ProxyServer(('127.0.0.1', 0), _ProxyHandler)
+                self._server.bucket = self.bucket
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+                threading.Thread(target=self._follow_schedule, daemon=True).start()
+            port = self._server.server_address[1]
+        return f"http://127.0.0.1:{port}"
+
+    def _follow_schedule(self):
+        """Apply schedule changes while the proxy is running"""
+        while self._server is not None:
+            time.sleep(5)
+            rate = self.current_rate()
+            if rate != self.bucket.rate:
+                self.bucket.set_rate(rate)
+
+    def stop(self):
+        """Shut the proxy down"""
+        with self._lock:
+            server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
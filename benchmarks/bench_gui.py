@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the YouTube Downloader GUI download path
+Swaps yt-dlp for benchmarks/fake_ytdlp.py, so no network is needed
+
+Measures command construction, queue scheduling overhead, log pipeline
+throughput and Tk event loop latency while jobs stream output, and fails
+when a result is over its budget. The Tk benchmarks need a display; on
+Linux CI run the suite under Xvfb:
+  xvfb-run -a python benchmarks/bench_gui.py
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from commands import build_download_command
+from download_queue import DownloadQueue
+
+#Upper limits; a result over its budget fails the run
+BUDGETS = {
+    "command_us": 200.0,         #Microseconds per build_download_command call
+    "queue_job_us": 2000.0,      #Scheduling overhead per queued job
+    "pipeline_lines_s": 50000,   #Minimum log lines per second through the pipeline
+    "tick_latency_p95_ms": 50.0, #Event loop lateness while jobs stream output
+    "tick_latency_max_ms": 250.0,
+}
+
+
+def install_fake_downloader(bin_dir):
+    """Put a yt-dlp executable that runs fake_ytdlp.py first on PATH"""
+    stub = BENCH_DIR / "fake_ytdlp.py"
+    if os.name == 'nt':
+        (bin_dir / "yt-dlp.bat").write_text(f'@"{sys.executable}" "{stub}" %*\n')
+    else:
+        script = bin_dir / "yt-dlp"
+        script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n')
+        script.chmod(0o755)
+    os.environ["PATH"] = str(bin_dir) + os.pathsep + os.environ.get("PATH", "")
+
+
+def bench_command_construction(count=20000):
+    """Microseconds per download command built"""
+    options = {"download_path": "/tmp", "format": "720p", "audio_only": False, "audio_format": "best"}
+    started = time.perf_counter()
+    for _ in range(count):
+        build_download_command('yt-dlp', options, True, archive_file="archive.txt")
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def bench_queue_scheduling(count=2000, workers=4):
+    """Microseconds of queue overhead per job, with a runner that does nothing"""
+    done = threading.Event()
+    finished = []
+
+    def on_update(job):
+        if job.is_finished:
+            finished.append(job)
+            if len(finished) == count:
+                done.set()
+
+    queue = DownloadQueue(lambda job: True, max_workers=workers, on_update=on_update)
+    started = time.perf_counter()
+    for i in range(count):
+        queue.submit(f"https://example.invalid/{i}")
+    done.wait(60)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def bench_log_pipeline(root, text, lines=50000):
+    """Lines per second through LogPipeline into a Text widget, half of them progress lines"""
+    from log_pipeline import LogPipeline
+
+    pipeline = LogPipeline(root, text)
+    pipeline.start()
+
+    def writer():
+        for i in range(lines):
+            if i % 2:
+                pipeline.write(f"[download]  {i * 100 / lines:.1f}% of 50.00MiB at 1.00MiB/s ETA 00:10",
+                               key=f"job{i % 8}")
+            else:
+                pipeline.write(f"[debug] synthetic line {i}")
+
+    started = time.perf_counter()
+    threading.Thread(target=writer, daemon=True).start()
+    while pipeline.lines_received < lines:
+        root.update()
+    return lines / (time.perf_counter() - started)
+
+
+def bench_gui_jobs(root, download_dir, jobs=8, lines=3000):
+    """Run jobs through the real GUI with the fake downloader; returns tick latency stats"""
+    from youtube_gui import YouTubeDownloaderGUI
+
+    os.environ["FAKE_YTDLP_LINES"] = str(lines)
+    app = YouTubeDownloaderGUI(root, deferred_startup=False)
+    #Workers would run the installed yt_dlp module instead of the fake downloader
+    app.job_runner.worker_pool = None
+    app.max_workers_var.set(4)
+    app.update_max_workers()
+    options = dict(app.get_download_options(), download_path=str(download_dir), format="best")
+
+    #Ask for a callback every 10ms and record how late each one runs
+    latencies = []
+    interval = 0.010
+    expected = [time.perf_counter() + interval]
+
+    def tick():
+        now = time.perf_counter()
+        latencies.append(max(0.0, now - expected[0]) * 1000)
+        expected[0] = now + interval
+        root.after(int(interval * 1000), tick)
+
+    root.after(int(interval * 1000), tick)
+    started = time.perf_counter()
+    for i in range(jobs):
+        app.download_queue.submit(f"https://example.invalid/bench/{i}", options)
+    while not app.download_queue.is_idle() or app.log_pipeline._queue.qsize():
+        root.update()
+    elapsed = time.perf_counter() - started
+
+    failed = [job for job in app.download_queue.jobs() if job.state != job.DONE]
+    app.journal.close()
+    stats = app.log_pipeline.stats()
+    latencies.sort()
+    return {
+        "elapsed_s": elapsed,
+        "failed_jobs": len(failed),
+        "lines": stats["lines_received"],
+        "max_drain_ms": stats["max_drain_ms"],
+        "tick_latency_p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        "tick_latency_max_ms": latencies[-1] if latencies else 0.0,
+        "tick_latency_median_ms": statistics.median(latencies) if latencies else 0.0,
+    }
+
+
+def check(name, value, budget, unit, higher_is_better=False):
+    """Print one result against its budget; returns True if within it"""
+    ok = value >= budget if higher_is_better else value <= budget
+    limit = "min" if higher_is_better else "max"
+    print(f"{'✅' if ok else '❌'} {name}: {value:,.1f} {unit} ({limit} {budget:,.1f})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline GUI-path benchmarks")
+    parser.add_argument("--jobs", type=int, default=8, help="fake downloads to run (default: %(default)s)")
+    parser.add_argument("--lines", type=int, default=3000,
+                        help="progress lines per fake download (default: %(default)s)")
+    parser.add_argument("--no-tk", action="store_true", help="skip the benchmarks that need a display")
+    args = parser.parse_args()
+
+    results = []
+    print("🔧 Command construction")
+    results.append(check("build_download_command", bench_command_construction(),
+                         BUDGETS["command_us"], "µs/call"))
+
+    print("\n📋 Queue scheduling")
+    results.append(check("queue overhead", bench_queue_scheduling(), BUDGETS["queue_job_us"], "µs/job"))
+
+    if args.no_tk:
+        print("\n⚠️ Tk benchmarks skipped")
+        return 0 if all(results) else 1
+
+    import tkinter as tk
+    from tkinter import scrolledtext
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        #Keep the user's settings, archive and journal out of it
+        os.environ["HOME"] = os.environ["USERPROFILE"] = str(tmp)
+        (tmp / "bin").mkdir()
+        install_fake_downloader(tmp / "bin")
+
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            print(f"\n❌ Tk benchmarks need a display (run under xvfb-run): {e}")
+            return 1
+
+        print("\n📄 Log pipeline")
+        text = scrolledtext.ScrolledText(root)
+        text.pack()
+        results.append(check("pipeline throughput", bench_log_pipeline(root, text),
+                             BUDGETS["pipeline_lines_s"], "lines/s", higher_is_better=True))
+        text.destroy()
+
+        print(f"\n⬇️ GUI with {args.jobs} fake downloads x {args.lines} progress lines")
+        run = bench_gui_jobs(root, tmp / "downloads", jobs=args.jobs, lines=args.lines)
+        print(f"   {run['lines']:,} lines in {run['elapsed_s']:.2f}s, longest drain {run['max_drain_ms']:.1f} ms, "
+              f"median tick latency {run['tick_latency_median_ms']:.1f} ms")
+        results.append(check("failed jobs", run["failed_jobs"], 0, "jobs"))
+        results.append(check("tick latency p95", run["tick_latency_p95_ms"],
+                             BUDGETS["tick_latency_p95_ms"], "ms"))
+        results.append(check("tick latency max", run["tick_latency_max_ms"],
+                             BUDGETS["tick_latency_max_ms"], "ms"))
+        root.destroy()
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for YouTube Downloader GUI
+Measures the time to first paint and fails if it is over the budget
+
+Needs a display (on Linux CI run it under xvfb-run).
+
+Usage:
+  python benchmarks/bench_startup.py
+  python benchmarks/bench_startup.py --exe "dist/YouTube Downloader/YouTube Downloader.exe" --budget 2.0
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+GUI_SCRIPT = Path(__file__).resolve().parent.parent / "youtube_gui.py"
+
+#Seconds from process start to the first painted window
+DEFAULT_BUDGET = 1.5
+
+
+def measure_once(command, home):
+    """Launch the app once; returns (wall seconds, in-process seconds)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Path(tmp) / "first_paint.txt"
+        env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+
+        started = time.perf_counter()
+        subprocess.run(command + [f"--startup-benchmark={report}"], env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        wall = time.perf_counter() - started
+
+        try:
+            in_process = float(report.read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        return wall, in_process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the GUI's time to first paint")
+    parser.add_argument("--exe", help="packaged executable to measure instead of youtube_gui.py")
+    parser.add_argument("--runs", type=int, default=5, help="launches to measure (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="median wall time budget in seconds (default: %(default)s)")
+    args = parser.parse_args()
+
+    command = [args.exe] if args.exe else [sys.executable, str(GUI_SCRIPT)]
+    print(f"🚀 Measuring startup of: {' '.join(command)}")
+
+    #A scratch home directory, so the user's saved settings and jobs are not touched
+    with tempfile.TemporaryDirectory() as home:
+        results = []
+        for run in range(args.runs):
+            result = measure_once(command, home)
+            if result is None:
+                print("❌ The app did not report its first paint (is a display available?)")
+                return 1
+            print(f"  run {run + 1}: {result[0]:.3f}s wall, {result[1]:.3f}s in process")
+            results.append(result[0])
+
+    median = statistics.median(results)
+    if median > args.budget:
+        print(f"❌ Median startup {median:.3f}s is over the {args.budget:.2f}s budget")
+        return 1
+    print(f"✅ Median startup {median:.3f}s is within the {args.budget:.2f}s budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
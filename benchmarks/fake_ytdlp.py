@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Fake yt-dlp for the offline benchmarks
+Prints synthetic download output at a configurable line rate, without touching the network
+
+Configured through environment variables:
+  FAKE_YTDLP_LINES   progress lines per download (default 2000)
+  FAKE_YTDLP_RATE    progress lines per second, 0 for as fast as possible (default 0)
+  FAKE_YTDLP_NOISE   plain log lines printed after every progress line (default 0)
+  FAKE_YTDLP_SIZE    reported file size in bytes (default 50 MiB)
+  FAKE_YTDLP_EXIT    exit code (default 0)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+PROGRESS_PREFIX = "[ytdl-progress] "
+COMPLETION_PREFIX = "[ytdl-done] "
+
+
+def option(args, name, default=None):
+    """Value following a command line option"""
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return default
+
+
+def main(args):
+    if '--version' in args:
+        print("2099.01.01 (fake)")
+        return 0
+
+    url = args[-1] if args else "https://example.invalid/video"
+    video_id = hashlib.sha1(url.encode()).hexdigest()[:11]
+
+    if '--dump-json' in args:
+        print(json.dumps({"id": video_id, "title": f"Fake video {video_id}", "extractor_key": "Generic",
+                          "webpage_url": url, "duration": 60, "_type": "video", "formats": []}))
+        return 0
+
+    lines = int(os.environ.get("FAKE_YTDLP_LINES", 2000))
+    rate = float(os.environ.get("FAKE_YTDLP_RATE", 0))
+    noise = int(os.environ.get("FAKE_YTDLP_NOISE", 0))
+    size = int(os.environ.get("FAKE_YTDLP_SIZE", 50 * 1024 * 1024))
+
+    template = option(args, '-o', '%(title)s.%(ext)s')
+    filepath = template.replace('%(title)s', f"Fake video {video_id}").replace('%(ext)s', 'mp4')
+
+    out = sys.stdout
+    out.write(f"[generic] Extracting URL: {url}\n")
+    out.write(f"[download] Destination: {filepath}\n")
+    started = time.perf_counter()
+    for i in range(1, lines + 1):
+        downloaded = size * i // lines
+        elapsed = time.perf_counter() - started
+        speed = downloaded / elapsed if elapsed > 0 else None
+        progress = {
+            "status": "downloading" if i < lines else "finished",
+            "downloaded_bytes": downloaded,
+            "total_bytes": size,
+            "speed": speed,
+            "eta": int((size - downloaded) / speed) if speed else None,
+            "elapsed": elapsed,
+            "filename": filepath,
+        }
+        out.write(PROGRESS_PREFIX + json.dumps(progress) + "\n")
+        for n in range(noise):
+            out.write(f"[debug] synthetic log line {i}.{n}\n")
+        if rate:
+            #Sleep off whatever is ahead of schedule
+            ahead = i / rate - (time.perf_counter() - started)
+            if ahead > 0:
+                out.flush()
+                time.sleep(ahead)
+
+    if '--print' in args:
+        out.write(COMPLETION_PREFIX + json.dumps({"extractor_key": "Generic", "id": video_id,
+                                                  "format_id": "0", "acodec": None,
+                                                  "filepath": filepath}) + "\n")
+    out.flush()
+    return int(os.environ.get("FAKE_YTDLP_EXIT", 0))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
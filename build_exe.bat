@@ -14,8 +14,18 @@ if errorlevel 1 (
     )
 )
 
+REM "build_exe.bat fast" builds a folder instead of a single file: it launches
+REM much faster because nothing has to be unpacked to a temp folder on every start
+if /I "%1"=="fast" (
+    set BUILD_MODE=--onedir --noupx
+    set BUILD_OUTPUT=dist\YouTube Downloader\YouTube Downloader.exe
+) else (
+    set BUILD_MODE=--onefile
+    set BUILD_OUTPUT=dist\YouTube Downloader.exe
+)
+
 echo Building executable...
-pyinstaller --windowed --onefile --name "YouTube Downloader" --distpath "./dist" --workpath "./build" youtube_gui.py
+pyinstaller --windowed %BUILD_MODE% --name "YouTube Downloader" --distpath "./dist" --workpath "./build" youtube_gui.py
 
 if errorlevel 1 (
     echo Build failed!
@@ -25,6 +35,6 @@ if errorlevel 1 (
 
 echo.
 echo Build completed successfully!
-echo Executable created in: dist\YouTube Downloader.exe
+echo Executable created in: %BUILD_OUTPUT%
 echo.
 pause
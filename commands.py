@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Download command builder for YouTube Downloader GUI
+Turns download options into a yt-dlp/youtube-dl command line, without any Tk dependency
+"""
+
+import os
+
+from progress import progress_args, completion_args
+
+#Choices offered for the "Quality" and "Audio Format" settings
+VIDEO_FORMATS = ["best", "worst", "720p", "480p", "360p", "240p", "144p"]
+AUDIO_FORMATS = ["best", "m4a", "webm", "mp3"]
+
+OUTPUT_TEMPLATE = '%(title)s.%(ext)s'
+
+#Choices offered for the acceleration settings; "auto" uses the site defaults below
+FRAGMENT_CHOICES = ["auto", "1", "2", "4", "8", "16"]
+CHUNK_SIZE_CHOICES = ["auto", "off", "1M", "10M", "50M"]
+EXTERNAL_DOWNLOADER_CHOICES = ["auto", "off", "aria2c"]
+
+#Acceleration used for settings left on "auto", by extractor
+DEFAULT_ACCELERATION = {"concurrent_fragments": "4", "http_chunk_size": "off", "external_downloader": "off"}
+SITE_ACCELERATION = {
+    #YouTube serves DASH; chunked requests avoid the throttling of long single ranges
+    "Youtube": {"concurrent_fragments": "4", "http_chunk_size": "10M", "external_downloader": "off"},
+    #HLS sites split a video into hundreds of small fragments, so latency dominates
+    "Vimeo": {"concurrent_fragments": "8", "http_chunk_size": "off", "external_downloader": "off"},
+    "TwitchVod": {"concurrent_fragments": "8", "http_chunk_size": "off", "external_downloader": "off"},
+    "Dailymotion": {"concurrent_fragments": "8", "http_chunk_size": "off", "external_downloader": "off"},
+}
+
+#aria2c: up to 16 connections per file, split into pieces of at least 1 MiB
+ARIA2C_ARGS = '-x 16 -s 16 -k 1M'
+
+
+def default_options(config):
+    """Download options from the saved configuration"""
+    return {
+        "download_path": config.get("download_path"),
+        "scratch_dir": config.get("scratch_dir", ""),
+        "format": config.get("default_format", "best"),
+        "audio_only": config.get("audio_only", False),
+        "audio_format": config.get("audio_format", "best"),
+        "concurrent_fragments": config.get("concurrent_fragments", "auto"),
+        "http_chunk_size": config.get("http_chunk_size", "auto"),
+        "external_downloader": config.get("external_downloader", "auto"),
+    }
+
+
+def format_args(options, has_ffmpeg, log=None, convert=False, format_id=None):
+    """Format selection (and audio extraction) arguments for the options
+
+    With convert=True the conversion is left to a separate post-processing
+    stage (see postprocess.py) and only the source audio is downloaded.
+    format_id is a format already chosen from the extracted info (see
+    formats.py); it replaces the generic selectors.
+    """
+    log = log or (lambda message: None)
+    args = []
+
+    if format_id:
+        args.extend(['--format', format_id])
+    elif options["audio_only"]:
+        audio_format = options["audio_format"]
+
+        if audio_format == "mp3":
+            if has_ffmpeg and convert:
+                #Only the audio stream is needed to convert from
+                args.extend(['--format', 'bestaudio/best'])
+                log("FFmpeg detected. Will convert to MP3 after the download.")
+            elif has_ffmpeg:
+                #FFmpeg available, force MP3 conversion
+                #Use a format that guarantees conversion will happen
+                args.extend(['--format', 'best[acodec!=mp3]/bestaudio'])
+                args.extend(['-x', '--audio-format', 'mp3', '--audio-quality', '0'])
+                log("FFmpeg detected. Will force conversion to MP3.")
+            else:
+                #No FFmpeg, try to get MP3 directly or fallback to M4A
+                log("FFmpeg not found. Trying to download MP3 directly or will fallback to M4A...")
+                args.extend(['--format', 'bestaudio[ext=mp3]/bestaudio[ext=m4a]/bestaudio'])
+                args.extend(['--extract-audio'])
+        elif audio_format == "m4a" and has_ffmpeg and convert:
+            #Anything that is not AAC already is converted afterwards
+            args.extend(['--format', 'bestaudio[ext=m4a]/bestaudio/best'])
+        elif audio_format == "best":
+            args.extend(['--format', 'bestaudio'])
+        elif audio_format in ["m4a", "webm"]:
+            args.extend(['--format', f'bestaudio[ext={audio_format}]/bestaudio'])
+        else:
+            args.extend(['--format', 'bestaudio'])
+    else:
+        if options["format"] != "best":
+            if options["format"] == "worst":
+                args.append('--format=worst')
+            else:
+                #Extract resolution number (e.g., "720p" -> "720")
+                resolution = options["format"].replace('p', '')
+                if has_ffmpeg:
+                    #Separate video and audio streams merged by FFmpeg, progressive as fallback
+                    args.append(f'--format=bv*[height<={resolution}]+ba/b[height<={resolution}]')
+                else:
+                    args.append(f'--format=best[height<={resolution}]')
+
+    return args
+
+
+def acceleration_settings(options, site=None):
+    """Acceleration settings for a download, with "auto" replaced by the site's defaults"""
+    defaults = SITE_ACCELERATION.get(site, DEFAULT_ACCELERATION)
+    settings = {}
+    for name, default in defaults.items():
+        value = str(options.get(name) or "auto")
+        settings[name] = default if value == "auto" else value
+    return settings
+
+
+def acceleration_args(downloader, options, site=None, external_downloaders=(), log=None):
+    """Concurrent fragment, chunk size and external downloader arguments
+
+    site is the extractor key of the video, if known. external_downloaders
+    lists the external downloaders that are installed.
+    """
+    log = log or (lambda message: None)
+    settings = acceleration_settings(options, site)
+    args = []
+
+    #youtube-dl downloads fragments one at a time
+    fragments = int(settings["concurrent_fragments"])
+    if downloader == 'yt-dlp' and fragments > 1:
+        args.extend(['--concurrent-fragments', str(fragments)])
+
+    if settings["http_chunk_size"] != "off":
+        args.extend(['--http-chunk-size', settings["http_chunk_size"]])
+
+    external = settings["external_downloader"]
+    if external != "off":
+        if external in external_downloaders:
+            args.extend(['--external-downloader', external])
+            if external == 'aria2c':
+                args.extend(['--external-downloader-args', ARIA2C_ARGS])
+        else:
+            log(f"{external} not found, using the built-in downloader.")
+
+    return args
+
+
+def build_download_command(downloader, options, has_ffmpeg, archive_file=None, log=None,
+                           site=None, external_downloaders=(), proxy=None, convert=False,
+                           format_id=None):
+    """Full download command for the options, without the URL/info source
+
+    The caller appends either the video URL or
+    ['--load-info-json', <cached info file>].
+    """
+    cmd = [downloader]
+
+    #Machine-readable progress for the per-job progress, speed and ETA
+    cmd.extend(progress_args(downloader))
+
+    #Record completed videos in the archive (yt-dlp also skips archived ones it extracts)
+    cmd.extend(completion_args(downloader))
+    if archive_file:
+        cmd.extend(['--download-archive', str(archive_file)])
+
+    cmd.extend(format_args(options, has_ffmpeg, log, convert, format_id))
+
+    #Parallel fragments, chunked requests or an external downloader
+    cmd.extend(acceleration_args(downloader, options, site, external_downloaders, log))
+
+    #Route the transfer through the shared bandwidth limiter
+    if proxy:
+        cmd.extend(['--proxy', proxy])
+
+    #Always use no-playlist to download single videos only
+    cmd.append('--no-playlist')
+
+    #Resume from existing .part files (e.g. after a restart)
+    cmd.append('--continue')
+
+    #Set output directory; with a scratch directory the runner moves the finished file over
+    cmd.extend(['-o', os.path.join(options.get("scratch_dir") or options["download_path"], OUTPUT_TEMPLATE)])
+
+    return cmd
@@ -14,10 +14,18 @@ class Config:
         self.config_file = self.config_dir / "config.json"
         self.default_config = {
             "download_path": str(Path.home() / "Downloads"),
+            "scratch_dir": "",
+            "disk_margin_mb": 1024,
             "default_format": "best",
             "audio_only": False,
             "playlist_mode": False,
             "audio_format": "best",
+            "max_workers": 2,
+            "concurrent_fragments": "auto",
+            "http_chunk_size": "auto",
+            "external_downloader": "auto",
+            "bandwidth_limit": "off",
+            "bandwidth_schedule": [],
             "window_geometry": "800x600",
             "last_url": ""
         }
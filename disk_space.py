@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Disk space management for YouTube Downloader GUI
+Admits downloads only while they fit on the disk, and moves finished files out of the scratch directory
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+from progress import format_bytes
+
+#Free space left untouched on every volume a download writes to
+DEFAULT_MARGIN = 1024 ** 3
+
+#Free space readings younger than this (seconds) are used as they are
+FREE_SPACE_TTL = 2.0
+
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.temp')
+
+
+class NotEnoughSpace(Exception):
+    """Raised by the runner when a job's planned size turns out not to fit; the queue puts it back"""
+
+
+def existing_dir(path):
+    """Absolute path of path, or of its nearest existing parent (download folders may not exist yet)"""
+    path = os.path.abspath(os.path.expanduser(path or "."))
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def job_dirs(options):
+    """Directories a job writes to, the one it downloads into first"""
+    if options.get("scratch_dir"):
+        return [options["scratch_dir"], options.get("download_path")]
+    return [options.get("download_path")]
+
+
+def job_scratch_dir(options, url):
+    """Scratch subdirectory of one job, None without a scratch directory
+
+    Named after the job's URL, so a restarted job resumes its .part files
+    there and the files of concurrent jobs never mix.
+    """
+    if not options.get("scratch_dir"):
+        return None
+    return os.path.join(options["scratch_dir"], hashlib.sha1(url.encode('utf-8')).hexdigest()[:16])
+
+
+def in_scratch(path, options):
+    """True if path is a file under the job's scratch directory"""
+    scratch = options.get("scratch_dir")
+    if not scratch or not path:
+        return False
+    scratch = os.path.normcase(os.path.abspath(scratch))
+    return os.path.normcase(os.path.abspath(path)).startswith(scratch + os.sep)
+
+
+def is_partial(name):
+    """True for the unfinished and resume-state files a downloader leaves next to a download"""
+    return name.endswith(PARTIAL_SUFFIXES) or '.part-Frag' in name
+
+
+def move_into_place(source, directory):
+    """Move a finished file into directory and return its new path
+
+    The file only ever shows up under its final name complete: on the same
+    volume it is renamed, otherwise it is copied to a hidden .part file
+    next to its destination and renamed once the copy is done.
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, os.path.basename(source))
+    try:
+        os.replace(source, target)
+        return target
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    partial = os.path.join(directory, "." + os.path.basename(source) + ".part")
+    try:
+        shutil.copy2(source, partial)
+        os.replace(partial, target)
+    except OSError:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    try:
+        os.remove(source)
+    except OSError:
+        pass  #The file is in place, a leftover in the scratch directory is harmless
+    return target
+
+
+def move_all_into_place(source_dir, directory):
+    """Move every finished file of a job's scratch directory into directory; returns their new paths
+
+    For downloaders that do not report the path of what they wrote. The
+    emptied scratch directory is removed.
+    """
+    moved = []
+    for entry in sorted(os.scandir(source_dir), key=lambda entry: entry.name):
+        if entry.is_file() and not is_partial(entry.name):
+            moved.append(move_into_place(entry.path, directory))
+    try:
+        os.rmdir(source_dir)
+    except OSError:
+        pass  #Partial files are left for a later run
+    return moved
+
+
+class DiskSpaceGuard:
+    """Keeps a batch from filling a volume halfway through its downloads
+
+    Every admitted job reserves what it still has to write on each volume
+    it uses: its estimated size (job.estimated_size, set once its formats
+    are planned, or the size the downloader reports) minus the bytes
+    already downloaded. With a scratch directory on another volume the
+    download folder also needs the whole file for the final move. A job
+    is admitted while every volume keeps margin bytes free after all
+    reservations; a job of unknown size only needs the margin.
+
+    The queue asks from the process engine's loop with its lock held, so
+    free space is read once per folder and then refreshed on a background
+    thread once the reading is older than FREE_SPACE_TTL.
+    """
+
+    def __init__(self, margin=DEFAULT_MARGIN):
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._admitted = {}
+        self._volumes = {}
+        self._refreshing = set()
+
+    @staticmethod
+    def _measure(path):
+        """(directory, device, free bytes, when) for the volume of a download folder (blocks)"""
+        directory = existing_dir(path)
+        try:
+            device = os.stat(directory).st_dev
+            free = shutil.disk_usage(directory).free
+        except OSError:
+            device = free = None
+        return (directory, device, free, time.monotonic())
+
+    def _refresh(self, path):
+        """Background thread: take a new reading for path"""
+        reading = self._measure(path)
+        with self._lock:
+            self._volumes[path] = reading
+            self._refreshing.discard(path)
+
+    def _volume(self, path):
+        """Latest reading for path, refreshed in the background when stale (lock held)"""
+        reading = self._volumes.get(path)
+        if reading is None:
+            reading = self._volumes[path] = self._measure(path)
+        elif time.monotonic() - reading[3] > FREE_SPACE_TTL and path not in self._refreshing:
+            self._refreshing.add(path)
+            threading.Thread(target=self._refresh, args=(path,), daemon=True).start()
+        return reading
+
+    def _needs(self, job):
+        """{device: (directory, free bytes, bytes job still has to write there)} (lock held)"""
+        estimate = max(job.estimated_size or 0, job.total_bytes or 0)
+        needs = {}
+        for index, path in enumerate(job_dirs(job.options)):
+            directory, device, free, _ = self._volume(path)
+            if device is None or device in needs:
+                continue  #Unreadable, or the same volume where the move is a rename
+            written = job.downloaded_bytes if index == 0 else 0
+            needs[device] = (directory, free, max(0, estimate - written))
+        return needs
+
+    def _shortage(self, job):
+        """Why job does not fit next to the other admitted jobs, None if it does (lock held)"""
+        others = [self._needs(other) for other in self._admitted.values() if other is not job]
+        for device, (directory, free, needed) in self._needs(job).items():
+            reserved = sum(need[device][2] for need in others if device in need)
+            available = free - reserved - self.margin
+            if needed > available:
+                if needed:
+                    return f"needs {format_bytes(needed)} in {directory}, {format_bytes(max(0, available))} available"
+                return f"less than {format_bytes(self.margin)} free in {directory}"
+        return None
+
+    def shortage(self, job):
+        """Why job does not fit next to the other admitted jobs, None if it does"""
+        with self._lock:
+            return self._shortage(job)
+
+    def admit(self, job):
+        """Reserve space for job if it fits; returns None, or why it does not fit"""
+        with self._lock:
+            shortage = self._shortage(job)
+            if shortage is None:
+                self._admitted[job.id] = job
+            return shortage
+
+    def release(self, job):
+        """Drop job's reservation once its files are complete or it was stopped"""
+        with self._lock:
+            self._admitted.pop(job.id, None)
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Download queue for YouTube Downloader GUI
+Runs queued download jobs in a bounded number of worker slots
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_space import NotEnoughSpace
+from process_engine import shared_engine
+from urls import url_key
+
+
+class DownloadJob:
+    """A single queued download and its current state"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    CONVERTING = "converting"
+    PAUSED = "paused"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+    def __init__(self, url, options=None, job_id=None):
+        self.id = job_id or os.urandom(6).hex()
+        self.url = url
+        self.options = dict(options or {})
+        self.title = None
+        #Thumbnail URL, when the playlist entry or extracted info listed one
+        self.thumbnail = None
+        self.extractor = None
+        self.video_id = None
+        self.output_path = None
+        self.state = self.QUEUED
+        self.progress = 0.0
+        self.speed = None
+        self.eta = None
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        #Planned size of everything the job downloads, None until known
+        self.estimated_size = None
+        self.peak_speed = None
+        self.phases = {}
+        self.result = ""
+        #Set by the runner to a callable returning True/False that finishes
+        #the job off the download worker (e.g. an ffmpeg conversion)
+        self.next_stage = None
+        self.completion = None
+        #Every file the downloader reported writing, for cleaning up after a cancel
+        self.files = []
+        #PAUSED or CANCELLED while the current attempt is being stopped
+        self.stop_request = None
+        self.attempt = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.downloaded_at = None
+        self.finished_at = None
+        self._current_file = None
+        self._completed_bytes = 0
+        self._current_bytes = 0
+
+    @property
+    def is_finished(self):
+        """True once the job has either completed or failed"""
+        return self.state in self.FINISHED_STATES
+
+    @property
+    def average_speed(self):
+        """Mean download rate in bytes/s of the download stage, None if nothing was downloaded"""
+        if not self.started_at or not self.downloaded_bytes:
+            return None
+        elapsed = (self.downloaded_at or time.time()) - self.started_at
+        return self.downloaded_bytes / max(elapsed, 1e-9)
+
+    def update_progress(self, progress):
+        """Apply a ProgressInfo from the downloader output
+
+        A job may download several files (e.g. separate video and audio
+        streams); byte counts accumulate across them while the percentage
+        follows the file currently being downloaded.
+        """
+        if progress.filename and progress.filename != self._current_file:
+            self._completed_bytes += self._current_bytes
+            self._current_bytes = 0
+            self._current_file = progress.filename
+            if progress.filename not in self.files:
+                self.files.append(progress.filename)
+        if progress.downloaded_bytes is not None:
+            self._current_bytes = progress.downloaded_bytes
+        self.downloaded_bytes = self._completed_bytes + self._current_bytes
+        if progress.total_bytes:
+            self.total_bytes = self._completed_bytes + progress.total_bytes
+        if progress.percent is not None:
+            self.progress = progress.percent
+        self.speed = progress.speed if progress.status == "downloading" else None
+        self.eta = progress.eta if progress.status == "downloading" else None
+        if self.speed and self.speed > (self.peak_speed or 0):
+            self.peak_speed = self.speed
+
+    @property
+    def key(self):
+        """Duplicate-detection key (see urls.url_key); playlist entries use their known ID"""
+        if self.extractor and self.video_id:
+            return (self.extractor.lower(), self.video_id)
+        return url_key(self.url)
+
+    def should_stop(self, attempt):
+        """True if the given run of the job was paused or cancelled"""
+        return self.stop_request is not None or self.attempt != attempt
+
+    def reset_progress(self):
+        """Forget the progress of an earlier attempt; a resumed download reports its bytes again"""
+        self.progress = 0.0
+        self.speed = None
+        self.eta = None
+        self.downloaded_bytes = 0
+        self._current_file = None
+        self._completed_bytes = 0
+        self._current_bytes = 0
+
+    def add_phase_time(self, phase, seconds):
+        """Add time spent in a phase (see metrics.PHASES); phases may repeat, e.g. on a retry"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def __repr__(self):
+        return f"DownloadJob({self.id}, {self.state}, {self.url!r})"
+
+
+class DownloadQueue:
+    """FIFO of download jobs drained by at most max_workers threads at a time
+
+    The runner is called on a worker thread with the job and returns True on
+    success. It may set job.result to a short summary; exceptions mark the
+    job as failed. A runner with a run_async(job) coroutine is run on the
+    ProcessEngine loop instead, so running jobs cost no thread each.
+    on_update is called (from whichever thread changed the job) every time
+    a job changes state.
+
+    If the runner leaves a job.next_stage, the job moves to CONVERTING and
+    the stage runs on a separate pool of stage_workers threads (one per CPU
+    by default), so the worker slot goes to the next download meanwhile.
+
+    Jobs can be paused, resumed and cancelled. Stopping a job frees its slot
+    at once and calls runner.stop(job, keep_partial) on a separate thread,
+    which is expected to kill the job's processes (and delete its partial
+    files unless keep_partial); whatever the interrupted run returns later
+    is ignored.
+
+    With a DiskSpaceGuard, jobs are only started while their estimated size
+    fits on the disk; a runner that learns a job's size only after it
+    started raises NotEnoughSpace to hand the job back.
+    """
+
+    def __init__(self, runner, max_workers=2, on_update=None, stage_workers=None, engine=None,
+                 disk_space=None):
+        self.runner = runner
+        self.engine = engine or shared_engine()
+        self.disk_space = disk_space
+        self.on_update = on_update
+        self.max_workers = max(1, int(max_workers))
+        self.stage_workers = stage_workers or os.cpu_count() or 1
+        self._stage_pool = None
+        self._converting = set()
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._running = set()
+        self._jobs = []
+        #Key -> job for every job that has not finished, for duplicate checks
+        self._active = {}
+
+    def submit(self, url, options=None):
+        """Create a job for url and queue it; returns it, or the unfinished job already queued for that video"""
+        return self.add(DownloadJob(url, options))
+
+    def add(self, job):
+        """Queue an existing job; a paused one is only listed until it is resumed
+
+        Returns the job queued under job's key (see DownloadJob.key): job
+        itself, or an unfinished one that was already there, in which case
+        job is not queued.
+        """
+        key = job.key
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None and existing is not job:
+                return existing
+            self._jobs.append(job)
+            self._active[key] = job
+            if job.state != DownloadJob.PAUSED:
+                self._pending.append(job)
+        self.notify(job)
+        self._schedule()
+        return job
+
+    def set_max_workers(self, count):
+        """Resize the worker pool; extra running jobs finish normally"""
+        with self._lock:
+            self.max_workers = max(1, int(count))
+        self._schedule()
+
+    def jobs(self):
+        """Snapshot of every job submitted so far"""
+        with self._lock:
+            return list(self._jobs)
+
+    def counts(self):
+        """Return (running, queued) job counts"""
+        with self._lock:
+            return len(self._running), len(self._pending)
+
+    def is_active(self, key):
+        """True if a job with this key (see DownloadJob.key) is queued, running, converting or paused"""
+        with self._lock:
+            return key in self._active
+
+    def _forget(self, job):
+        """Drop a finished job from the duplicate index (lock held)"""
+        key = job.key
+        if self._active.get(key) is job:
+            del self._active[key]
+
+    def running_jobs(self):
+        """Snapshot of the jobs currently running"""
+        with self._lock:
+            return list(self._running)
+
+    def converting_jobs(self):
+        """Snapshot of the jobs in their post-processing stage"""
+        with self._lock:
+            return list(self._converting)
+
+    def is_idle(self):
+        """True when nothing is running, waiting or converting"""
+        with self._lock:
+            return not (self._running or self._pending or self._converting)
+
+    def pause(self, job):
+        """Stop a queued or running job, keeping its partial files; returns True if it was paused"""
+        return self._stop(job, DownloadJob.PAUSED, keep_partial=True)
+
+    def cancel(self, job, keep_partial=False):
+        """Stop a job for good, deleting its partial files unless keep_partial; returns True if cancelled"""
+        return self._stop(job, DownloadJob.CANCELLED, keep_partial)
+
+    def resume(self, job):
+        """Queue a paused job again; yt-dlp continues from its .part files"""
+        with self._lock:
+            if job.state != DownloadJob.PAUSED:
+                return False
+            job.state = DownloadJob.QUEUED
+            job.result = ""
+            self._pending.append(job)
+        self.notify(job)
+        self._schedule()
+        return True
+
+    def _stop(self, job, state, keep_partial):
+        """Take job out of the queue or its worker slot and stop its run"""
+        with self._lock:
+            if job.is_finished or job.state == state:
+                return False
+            if state == DownloadJob.PAUSED and job.state == DownloadJob.CONVERTING:
+                return False  #Conversions restart from scratch, so they can only be cancelled
+            active = job.state in (DownloadJob.RUNNING, DownloadJob.CONVERTING)
+            if job in self._pending:
+                self._pending.remove(job)
+            self._running.discard(job)
+            self._converting.discard(job)
+            job.stop_request = state
+            job.state = state
+            job.speed = None
+            job.eta = None
+            job.result = "Paused" if state == DownloadJob.PAUSED else "Cancelled"
+            if state == DownloadJob.CANCELLED:
+                job.finished_at = time.time()
+                self._forget(job)
+        if self.disk_space is not None:
+            self.disk_space.release(job)
+        stop = getattr(self.runner, 'stop', None)
+        if stop is not None and (active or not keep_partial):
+            #Killing a process tree can take a few seconds
+            threading.Thread(target=stop, args=(job, keep_partial), daemon=True).start()
+        self.notify(job)
+        self._schedule()
+        return True
+
+    def clear_finished(self):
+        """Forget finished jobs and return them"""
+        with self._lock:
+            finished = [job for job in self._jobs if job.is_finished]
+            self._jobs = [job for job in self._jobs if not job.is_finished]
+        return finished
+
+    def notify(self, job):
+        """Tell the listener that job changed"""
+        if self.on_update:
+            self.on_update(job)
+
+    def _schedule(self):
+        """Start pending jobs while there are free worker slots (and, with a DiskSpaceGuard, disk space)
+
+        A job that does not fit waits, and later ones that do fit go ahead
+        of it. Once nothing is left running that could make room, jobs that
+        still do not fit are paused, to be resumed after freeing space.
+        """
+        started = []
+        changed = []
+        with self._lock:
+            waiting = []
+            while self._pending and len(self._running) < self.max_workers:
+                job = self._pending.popleft()
+                shortage = self.disk_space.admit(job) if self.disk_space is not None else None
+                if shortage is not None:
+                    waiting.append((job, shortage))
+                    result = f"Waiting for disk space: {shortage}"
+                    if result != job.result:
+                        job.result = result
+                        changed.append(job)
+                    continue
+                job.state = DownloadJob.RUNNING
+                job.started_at = time.time()
+                job.stop_request = None
+                job.attempt += 1
+                job.reset_progress()
+                self._running.add(job)
+                started.append((job, job.attempt))
+            if waiting and not (self._running or self._converting):
+                for job, shortage in waiting:
+                    job.state = DownloadJob.PAUSED
+                    job.result = f"Not enough disk space: {shortage}"
+                    if job not in changed:
+                        changed.append(job)
+                waiting = []
+            self._pending.extendleft(reversed([job for job, shortage in waiting]))
+        for job in changed:
+            self.notify(job)
+        run_async = getattr(self.runner, 'run_async', None)
+        for job, attempt in started:
+            self.notify(job)
+            if run_async is not None:
+                self.engine.submit(self._run_async(run_async, job, attempt))
+            else:
+                threading.Thread(target=self._run, args=(job, attempt), daemon=True).start()
+
+    def _run(self, job, attempt):
+        """Worker thread body for a single job"""
+        try:
+            success = self.runner(job)
+        except NotEnoughSpace as e:
+            self._requeue(job, attempt, e)
+            return
+        except Exception as e:
+            success = False
+            job.result = f"Error: {e}"
+        self._downloaded(job, attempt, success)
+
+    async def _run_async(self, run_async, job, attempt):
+        """Engine loop body for a single job"""
+        try:
+            success = await run_async(job)
+        except NotEnoughSpace as e:
+            self._requeue(job, attempt, e)
+            return
+        except Exception as e:
+            success = False
+            job.result = f"Error: {e}"
+        self._downloaded(job, attempt, success)
+
+    def _requeue(self, job, attempt, shortage):
+        """Put a job whose planned size does not fit back at the front of the queue"""
+        with self._lock:
+            if job.should_stop(attempt):
+                return
+            self._running.discard(job)
+            job.state = DownloadJob.QUEUED
+            job.result = f"Waiting for disk space: {shortage}"
+            self._pending.appendleft(job)
+        self.disk_space.release(job)
+        self.notify(job)
+        self._schedule()
+
+    def _downloaded(self, job, attempt, success):
+        """Hand a job whose download ended to its next stage, or finish it"""
+        if job.should_stop(attempt):
+            return  #Paused or cancelled; the slot was freed already
+        job.downloaded_at = time.time()
+        stage, job.next_stage = job.next_stage, None
+        job.speed = None
+        job.eta = None
+
+        if success and stage is not None:
+            job.state = DownloadJob.CONVERTING
+            with self._lock:
+                self._running.discard(job)
+                self._converting.add(job)
+                if self._stage_pool is None:
+                    self._stage_pool = ThreadPoolExecutor(max_workers=self.stage_workers,
+                                                          thread_name_prefix="stage")
+                pool = self._stage_pool
+            self.notify(job)
+            self._schedule()
+            pool.submit(self._run_stage, job, stage, attempt)
+            return
+
+        self._finish(job, success)
+
+    def _run_stage(self, job, stage, attempt):
+        """Stage pool body for a job's post-processing stage"""
+        if job.should_stop(attempt):
+            return
+        try:
+            success = stage()
+        except Exception as e:
+            success = False
+            job.result = f"Error: {e}"
+        if job.should_stop(attempt):
+            return
+        self._finish(job, success)
+
+    def _finish(self, job, success):
+        """Mark job done or failed and start the next pending ones"""
+        job.state = DownloadJob.DONE if success else DownloadJob.FAILED
+        job.finished_at = time.time()
+        if success:
+            job.progress = 100.0
+        with self._lock:
+            self._running.discard(job)
+            self._converting.discard(job)
+            self._forget(job)
+        if self.disk_space is not None:
+            self.disk_space.release(job)
+        self.notify(job)
+        self._schedule()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Format planning for YouTube Downloader GUI
+Chooses formats from an extracted info dict instead of leaving it to a generic selector
+"""
+
+from progress import format_bytes
+
+#Lowest audio bitrate (kbps) accepted as a source for the audio formats;
+#above this a re-encode to MP3 V0 or AAC gains nothing audible
+MIN_AUDIO_BITRATE = 128
+#Nominal 128k streams often report a little less (YouTube's AAC 140: 127.9k)
+BITRATE_TOLERANCE = 0.95
+
+#Codecs each audio target can be remuxed from without re-encoding
+REMUX_CODECS = {
+    "mp3": ("mp3",),
+    "m4a": ("mp4a", "aac"),
+    "webm": ("opus", "vorbis"),
+}
+
+
+def _none(value):
+    """True for codec fields that mean "no stream" """
+    return value in (None, 'none')
+
+
+def is_audio_only(fmt):
+    """True for formats with an audio stream and no video"""
+    return not _none(fmt.get('acodec')) and _none(fmt.get('vcodec'))
+
+
+def is_progressive(fmt):
+    """True for formats with both video and audio"""
+    return not _none(fmt.get('acodec')) and not _none(fmt.get('vcodec'))
+
+
+def audio_bitrate(fmt):
+    """Audio bitrate in kbps, None if unknown"""
+    return fmt.get('abr') or (fmt.get('tbr') if is_audio_only(fmt) else None)
+
+
+def estimated_size(fmt, duration=None):
+    """Size of a format in bytes: exact, approximate or from bitrate x duration; None if unknown"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+    bitrate = fmt.get('tbr') or ((fmt.get('vbr') or 0) + (fmt.get('abr') or 0))
+    if bitrate and duration:
+        return int(bitrate * 1000 / 8 * duration)
+    return None
+
+
+def codec_matches(codec, audio_format):
+    """True if an audio codec can go into the target format without re-encoding"""
+    return bool(codec) and codec.lower().startswith(REMUX_CODECS.get(audio_format, ()))
+
+
+def pick_audio(info, audio_format, convert=True):
+    """Smallest audio-only format that meets the quality wanted for audio_format
+
+    "best" keeps the highest bitrate. For the other formats, streams of at
+    least MIN_AUDIO_BITRATE qualify; among them a codec that can be
+    remuxed into the target wins (no re-encode), then the smaller size.
+    If nothing qualifies the highest bitrate is used. With convert=False
+    the download is kept as it is, so only streams already in the target
+    container (ext) are considered, as long as there are any. None if the
+    info has no audio-only formats.
+    """
+    duration = info.get('duration')
+    candidates = [fmt for fmt in info.get('formats') or [] if is_audio_only(fmt)]
+    if not convert and audio_format != "best":
+        candidates = [fmt for fmt in candidates if fmt.get('ext') == audio_format] or candidates
+    if not candidates:
+        return None
+
+    def size(fmt):
+        estimate = estimated_size(fmt, duration)
+        return estimate if estimate is not None else float('inf')
+
+    best = max(candidates, key=lambda fmt: (audio_bitrate(fmt) or 0, -size(fmt)))
+    if audio_format == "best":
+        return best
+
+    minimum = MIN_AUDIO_BITRATE * BITRATE_TOLERANCE
+    qualifying = [fmt for fmt in candidates if (audio_bitrate(fmt) or 0) >= minimum]
+    if not qualifying:
+        return best
+    return min(qualifying, key=lambda fmt: (not codec_matches(fmt.get('acodec'), audio_format), size(fmt)))
+
+
+def legacy_audio_pick(info, audio_format, has_ffmpeg):
+    """The format the old fixed selectors would have downloaded, for comparison"""
+    formats = info.get('formats') or []
+    #yt-dlp lists formats from worst to best
+    audio = [fmt for fmt in formats if is_audio_only(fmt)]
+    if audio_format == "mp3" and has_ffmpeg:
+        #best[acodec!=mp3]/bestaudio
+        progressive = [fmt for fmt in formats if is_progressive(fmt) and fmt.get('acodec') != 'mp3']
+        candidates = progressive or audio
+    elif audio_format in ("m4a", "webm"):
+        #bestaudio[ext=...]/bestaudio
+        candidates = [fmt for fmt in audio if fmt.get('ext') == audio_format] or audio
+    else:
+        candidates = audio
+    return candidates[-1] if candidates else None
+
+
+def is_video_only(fmt):
+    """True for formats with video and no audio (DASH video streams)"""
+    return not _none(fmt.get('vcodec')) and _none(fmt.get('acodec'))
+
+
+def _bitrate(fmt, duration):
+    """Total bitrate of a format in kbps, None if unknown"""
+    bitrate = fmt.get('tbr') or ((fmt.get('vbr') or 0) + (fmt.get('abr') or 0))
+    if not bitrate and duration:
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if size:
+            bitrate = size * 8 / 1000 / duration
+    return bitrate or None
+
+
+class FormatPlan:
+    """The formats chosen for one quality choice, with size and bitrate estimates"""
+
+    def __init__(self, video, audio, duration):
+        self.video = video
+        self.audio = audio
+        parts = [video] + ([audio] if audio else [])
+        sizes = [estimated_size(fmt, duration) for fmt in parts]
+        self.size = sum(sizes) if None not in sizes else None
+        bitrates = [_bitrate(fmt, duration) for fmt in parts]
+        self.bitrate = sum(bitrates) if None not in bitrates else None
+        self.height = video.get('height')
+
+    @property
+    def format_id(self):
+        """yt-dlp format selector for the plan, e.g. '136+140' for a merged pair"""
+        if self.audio:
+            return f"{self.video['format_id']}+{self.audio['format_id']}"
+        return self.video['format_id']
+
+
+def describe_plan(plan):
+    """Size and bitrate of a plan, e.g. '~45.20MiB, 1.2 Mbps'"""
+    parts = []
+    if plan.size is not None:
+        parts.append(f"~{format_bytes(plan.size)}")
+    if plan.bitrate:
+        parts.append(f"{plan.bitrate / 1000:.1f} Mbps")
+    return ", ".join(parts) or "size unknown"
+
+
+def plan_video(info, choice, can_merge):
+    """Formats for the quality choice ("best", "worst" or e.g. "720p")
+
+    "best" is the highest quality on offer: the tallest video, then the
+    highest frame rate and bitrate, with the best audio stream when ffmpeg
+    can merge (what yt-dlp's default selector downloads). For the other
+    choices the target height is the tallest available one within the cap
+    ("worst": the smallest), and progressive formats and, when ffmpeg can
+    merge, separate video streams paired with the smallest audio stream of
+    sufficient bitrate are compared at that height; the smallest estimated
+    size wins. None if the info lists no formats with a known height.
+    """
+    duration = info.get('duration')
+    formats = info.get('formats') or []
+    audio = pick_audio(info, "best" if choice == "best" else "m4a") if can_merge else None
+
+    plans = [FormatPlan(fmt, None, duration) for fmt in formats if is_progressive(fmt)]
+    if audio is not None:
+        plans += [FormatPlan(fmt, audio, duration) for fmt in formats if is_video_only(fmt)]
+    plans = [plan for plan in plans if plan.height]
+    if not plans:
+        return None
+
+    if choice == "best":
+        return max(plans, key=lambda plan: (plan.height, plan.video.get('fps') or 0, plan.bitrate or 0))
+
+    def cost(plan):
+        return plan.size if plan.size is not None else float('inf')
+
+    if choice == "worst":
+        return min(plans, key=lambda plan: (plan.height, cost(plan)))
+
+    heights = {plan.height for plan in plans}
+    cap = int(choice.rstrip('p'))
+    capped = [height for height in heights if height <= cap]
+    target = max(capped) if capped else min(heights)
+    return min((plan for plan in plans if plan.height == target), key=cost)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Headless batch runner for YouTube Downloader GUI
+Downloads a list of URLs with the same options as the GUI, without starting Tk
+
+Usage:
+  python headless.py urls.txt
+  cat urls.txt | python headless.py - --audio-only --audio-format mp3
+"""
+
+import argparse
+import sys
+import time
+
+from config import Config
+from toolchain import Toolchain
+from info_cache import InfoCache
+from info_engine import InfoEngine
+from archive import DownloadArchive
+from download_queue import DownloadQueue, DownloadJob
+from job_runner import JobRunner
+from metrics import MetricsRecorder
+from bandwidth import BandwidthLimiter, parse_rate
+from commands import (VIDEO_FORMATS, AUDIO_FORMATS, FRAGMENT_CHOICES, CHUNK_SIZE_CHOICES,
+                      EXTERNAL_DOWNLOADER_CHOICES, default_options)
+from playlist import PlaylistError, iter_playlist_entries, entry_job
+from progress import PROGRESS_LINE_RE, format_bytes, format_speed
+from worker_pool import WorkerPool
+from urls import url_key
+from disk_space import DiskSpaceGuard
+
+
+def read_urls(source):
+    """URLs from a file (or stdin for '-'), one per line; blank lines and # comments are skipped"""
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def parse_args(argv, config):
+    """Command line options; defaults come from the GUI's saved configuration"""
+    options = default_options(config)
+    parser = argparse.ArgumentParser(description="Download a batch of URLs without the GUI")
+    parser.add_argument("source", help="file with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", default=options["download_path"],
+                        help="download directory (default: %(default)s)")
+    parser.add_argument("--scratch-dir", default=options["scratch_dir"],
+                        help="download to this (fast) directory first and move finished files to --output")
+    parser.add_argument("--min-free", type=int, default=config.get("disk_margin_mb", 1024), metavar="MB",
+                        help="free space to keep on the download disks; jobs wait for room (default: %(default)s)")
+    parser.add_argument("-f", "--format", default=options["format"], choices=VIDEO_FORMATS,
+                        help="video quality (default: %(default)s)")
+    parser.add_argument("--audio-only", action="store_true", default=options["audio_only"],
+                        help="download audio only")
+    parser.add_argument("--audio-format", default=options["audio_format"], choices=AUDIO_FORMATS,
+                        help="audio format for --audio-only (default: %(default)s)")
+    parser.add_argument("--fragments", default=options["concurrent_fragments"], choices=FRAGMENT_CHOICES,
+                        help="fragments downloaded at once (default: %(default)s)")
+    parser.add_argument("--chunk-size", default=options["http_chunk_size"], choices=CHUNK_SIZE_CHOICES,
+                        help="HTTP chunk size (default: %(default)s)")
+    parser.add_argument("--external-downloader", default=options["external_downloader"],
+                        choices=EXTERNAL_DOWNLOADER_CHOICES,
+                        help="hand transfers to an external downloader (default: %(default)s)")
+    parser.add_argument("--bandwidth-limit", default=config.get("bandwidth_limit", "off"),
+                        help="total download rate of all jobs, e.g. 5M (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=config.get("max_workers", 2),
+                        help="parallel downloads (default: %(default)s)")
+    parser.add_argument("--playlist", action="store_true", default=config.get("playlist_mode", False),
+                        help="download every entry of playlist URLs")
+    parser.add_argument("--no-worker-pool", action="store_true",
+                        help="start a yt-dlp process per download instead of reusing warm workers")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="also print progress lines")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a batch and return the process exit code"""
+    config = Config()
+    args = parse_args(argv, config)
+    options = {
+        "download_path": args.output,
+        "scratch_dir": args.scratch_dir,
+        "format": args.format,
+        "audio_only": args.audio_only,
+        "audio_format": args.audio_format,
+        "concurrent_fragments": args.fragments,
+        "http_chunk_size": args.chunk_size,
+        "external_downloader": args.external_downloader,
+    }
+
+    def log(message, key=None):
+        #Progress lines are only printed with --verbose
+        if key is not None and PROGRESS_LINE_RE.match(message) and not args.verbose:
+            return
+        print(message, flush=True)
+
+    toolchain = Toolchain(config.config_dir)
+    if not toolchain.downloader():
+        print("Error: yt-dlp or youtube-dl not found. Please install one of them.", file=sys.stderr)
+        return 2
+
+    try:
+        parse_rate(args.bandwidth_limit)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    bandwidth = BandwidthLimiter(args.bandwidth_limit, config.get("bandwidth_schedule", []))
+
+    info_cache = InfoCache(config.config_dir)
+    disk_space = DiskSpaceGuard(args.min_free * 1024 * 1024)
+    runner = JobRunner(toolchain, info_cache, DownloadArchive(config.config_dir), log,
+                       bandwidth=bandwidth, info_engine=InfoEngine(toolchain),
+                       worker_pool=None if args.no_worker_pool else WorkerPool(), disk_space=disk_space)
+
+    metrics = MetricsRecorder(config.config_dir)
+
+    def on_update(job):
+        if job.is_finished:
+            metrics.record(job)
+            status = "✅" if job.state == DownloadJob.DONE else "❌"
+            speed = job.average_speed
+            rate = f" ({format_speed(speed)})" if speed else ""
+            log(f"{status} {job.title or job.url}: {job.result}{rate}")
+        elif job.state == DownloadJob.PAUSED:
+            log(f"⏸️ {job.title or job.url}: {job.result}")
+
+    queue = DownloadQueue(runner, max_workers=args.workers, on_update=on_update, disk_space=disk_space)
+    started = time.time()
+
+    #youtu.be links, timestamps and tracking parameters do not make a video twice
+    seen = set()
+    for url in read_urls(args.source):
+        key = url_key(url, playlist=args.playlist)
+        if key in seen:
+            log(f"⏭️ Duplicate, skipping: {url}")
+            continue
+        seen.add(key)
+        if not args.playlist:
+            queue.submit(url, options)
+            continue
+        try:
+            for entry in iter_playlist_entries(toolchain.downloader(), url):
+                job = entry_job(entry, options)
+                if job is None:
+                    continue
+                if entry.get('formats'):
+                    info_cache.put(job.url, entry)
+                if queue.add(job) is not job:
+                    log(f"⏭️ Duplicate, skipping: {job.url}")
+        except PlaylistError as e:
+            log(f"❌ Could not list playlist {url}: {e}")
+
+    try:
+        while not queue.is_idle():
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        #Downloaders run in their own process groups and do not see the Ctrl+C
+        print("Interrupted, stopping downloads (partial files are kept for resuming)", file=sys.stderr)
+        runner.terminate_all()
+        bandwidth.stop()
+        metrics.close()
+        return 130
+
+    bandwidth.stop()
+    metrics.close()
+    jobs = queue.jobs()
+    #Jobs paused for lack of disk space did not download either
+    failed = [job for job in jobs if job.state in (DownloadJob.FAILED, DownloadJob.PAUSED)]
+    elapsed = time.time() - started
+    print(f"Done: {len(jobs) - len(failed)}/{len(jobs)} succeeded, {len(failed)} failed, "
+          f"{format_bytes(sum(job.downloaded_bytes for job in jobs))} in {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
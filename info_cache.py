@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Metadata cache for YouTube Downloader GUI
+Keeps extracted info JSON on disk so a download can reuse the "Get Info" extraction
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+
+class InfoCache:
+    """On-disk info-JSON cache keyed by extractor plus video ID
+
+    Entries expire after ttl seconds (stream URLs inside the info eventually
+    stop working) and the least recently used ones are evicted once the
+    cache holds more than max_entries files or max_bytes bytes. The URL
+    that produced an entry is remembered so the download path can find it
+    again without extracting.
+    """
+
+    def __init__(self, config_dir, ttl=1800, max_entries=200, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = config_dir / "info_cache"
+        self.index_file = self.cache_dir / "index.json"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._urls = {}
+        self._entries = {}
+        self._loaded = False
+
+    @staticmethod
+    def make_key(extractor, video_id):
+        """Filesystem-safe cache key for an extractor/video ID pair"""
+        return re.sub(r'[^A-Za-z0-9_-]', '_', f"{extractor.lower()}-{video_id}")
+
+    def load_index(self):
+        """Load the URL and entry index from disk (lock held)
+
+        Called on first use rather than at construction so the index is
+        not read during application startup.
+        """
+        self._loaded = True
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            self._urls = index["urls"]
+            self._entries = index["entries"]
+        except Exception:
+            self._urls = {}
+            self._entries = {}
+
+    def save_index(self):
+        """Write the index atomically"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({"urls": self._urls, "entries": self._entries}, f)
+            os.replace(tmp_file, self.index_file)
+        except Exception:
+            pass  #Fail silently, the cache is only an optimization
+
+    def entry_path(self, key):
+        """Path of the info JSON file for a cache key"""
+        return self.cache_dir / f"{key}.info.json"
+
+    def put(self, url, info):
+        """Store info extracted from url; returns the cache key or None"""
+        extractor = info.get('extractor_key') or info.get('extractor')
+        video_id = info.get('id')
+        if not extractor or not video_id or info.get('_type', 'video') != 'video':
+            return None
+
+        key = self.make_key(extractor, video_id)
+        with self._lock:
+            if not self._loaded:
+                self.load_index()
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                path = self.entry_path(key)
+                tmp_file = path.with_suffix('.tmp')
+                with open(tmp_file, 'w') as f:
+                    json.dump(info, f)
+                os.replace(tmp_file, path)
+                size = path.stat().st_size
+            except Exception:
+                return None
+
+            now = time.time()
+            self._entries[key] = {"stored": now, "used": now, "size": size,
+                                  "extractor": extractor, "id": video_id}
+            self._urls[url] = key
+            for alias in (info.get('webpage_url'), info.get('original_url')):
+                if alias:
+                    self._urls[alias] = key
+            self._evict()
+            self.save_index()
+        return key
+
+    def lookup(self, url):
+        """Path of a fresh info JSON for url, None on a miss"""
+        with self._lock:
+            if not self._loaded:
+                self.load_index()
+            key = self._urls.get(url)
+            entry = self._entries.get(key) if key else None
+            if entry is None:
+                return None
+            path = self.entry_path(key)
+            if time.time() - entry["stored"] > self.ttl or not path.exists():
+                self._remove(key)
+                self.save_index()
+                return None
+            entry["used"] = time.time()
+            self.save_index()
+            return path
+
+    def video_key(self, url):
+        """(extractor key, video ID) of a URL with a cached entry, None otherwise"""
+        with self._lock:
+            if not self._loaded:
+                self.load_index()
+            entry = self._entries.get(self._urls.get(url))
+            if entry and "extractor" in entry:
+                return (entry["extractor"], entry["id"])
+        return None
+
+    def get(self, url):
+        """Cached info dict for url, None on a miss"""
+        path = self.lookup(url)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            self.invalidate(url)
+            return None
+
+    def invalidate(self, url):
+        """Drop the entry for url (e.g. when its stream URLs stopped working)"""
+        with self._lock:
+            if not self._loaded:
+                self.load_index()
+            key = self._urls.get(url)
+            if key:
+                self._remove(key)
+                self.save_index()
+
+    def _remove(self, key):
+        """Delete an entry and every URL pointing at it (lock held)"""
+        self._entries.pop(key, None)
+        self._urls = {url: k for url, k in self._urls.items() if k != key}
+        try:
+            self.entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones over the limits (lock held)"""
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if now - e["stored"] > self.ttl]:
+            self._remove(key)
+
+        by_use = sorted(self._entries, key=lambda k: self._entries[k]["used"])
+        total = sum(e["size"] for e in self._entries.values())
+        while by_use and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            key = by_use.pop(0)
+            total -= self._entries[key]["size"]
+            self._remove(key)
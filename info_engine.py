@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Metadata extraction engine for YouTube Downloader GUI
+Serves "Get Info" lookups from a warm in-process yt_dlp instance when possible
+"""
+
+import asyncio
+import json
+import subprocess
+import threading
+
+from process_engine import run_captured
+
+
+class ExtractionError(Exception):
+    """Raised when video information could not be extracted"""
+
+
+class _SilentLogger:
+    """yt_dlp logger that drops messages; errors still surface as exceptions"""
+
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class InfoEngine:
+    """Extracts video metadata without downloading
+
+    Importing yt_dlp costs about as much as starting the yt-dlp executable,
+    so it is done once and every later lookup reuses a warm YoutubeDL
+    instance. Each thread keeps its own instance, so format planning for
+    several jobs and "Get Info" extract side by side instead of queueing
+    behind one network request. When the yt_dlp module is not importable
+    (e.g. only youtube-dl is installed) lookups fall back to running the
+    downloader with --dump-json.
+    """
+
+    YDL_OPTIONS = {
+        "quiet": True,
+        "no_warnings": True,
+        "noplaylist": True,
+        "skip_download": True,
+    }
+
+    def __init__(self, toolchain):
+        self.toolchain = toolchain
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._in_process = None  #Unknown until the first import attempt
+
+    @property
+    def in_process(self):
+        """True if lookups are served by the in-process engine"""
+        return bool(self._in_process)
+
+    def _get_ydl(self):
+        """Import yt_dlp on first use and keep this thread's YoutubeDL instance warm"""
+        if self._in_process is False:
+            return None
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            #Only the import is serialized; it happens once
+            with self._lock:
+                try:
+                    import yt_dlp
+                    ydl = yt_dlp.YoutubeDL(dict(self.YDL_OPTIONS, logger=_SilentLogger()))
+                    self._in_process = True
+                except Exception:
+                    self._in_process = False
+                    return None
+            self._local.ydl = ydl
+        return ydl
+
+    def warm_up_async(self):
+        """Import yt_dlp on a background thread so the first lookup is fast too"""
+        def warm_up_thread():
+            self._get_ydl()
+
+        threading.Thread(target=warm_up_thread, daemon=True).start()
+
+    def extract_info(self, url):
+        """Return the info dict for url, as yt-dlp --dump-json would print it"""
+        info = self._extract_in_process(url)
+        if info is not None:
+            return info
+        cmd = self._dump_json_command(url)
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        return self._parse_dump(cmd[0], result.returncode, result.stdout, result.stderr)
+
+    async def extract_info_async(self, url):
+        """extract_info for the ProcessEngine loop
+
+        The in-process engine is blocking Python and runs on the loop's
+        executor; the fallback runs the downloader as an asyncio subprocess.
+        """
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, self._extract_in_process, url)
+        if info is not None:
+            return info
+        cmd = await loop.run_in_executor(None, self._dump_json_command, url)
+        returncode, stdout, stderr = await run_captured(cmd)
+        return self._parse_dump(cmd[0], returncode, stdout, stderr)
+
+    def _extract_in_process(self, url):
+        """Info dict from this thread's warm yt_dlp instance, None if yt_dlp is unavailable"""
+        ydl = self._get_ydl()
+        if ydl is None:
+            return None
+        try:
+            info = ydl.extract_info(url, download=False)
+            return ydl.sanitize_info(info)
+        except Exception as e:
+            raise ExtractionError(str(e)) from e
+
+    def _dump_json_command(self, url):
+        """Fallback: the downloader executable with --dump-json"""
+        downloader = self.toolchain.downloader()
+        if not downloader:
+            raise ExtractionError("yt-dlp or youtube-dl not found. Please install one of them.")
+        return [downloader, '--dump-json', '--no-playlist', url]
+
+    @staticmethod
+    def _parse_dump(downloader, returncode, stdout, stderr):
+        """Info dict from the output of a --dump-json run"""
+        if returncode != 0:
+            raise ExtractionError(stderr.strip() or f"{downloader} exited with code {returncode}")
+        try:
+            return json.loads(stdout)
+        except json.JSONDecodeError as e:
+            raise ExtractionError("Error parsing video information") from e
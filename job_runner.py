@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Job runner for YouTube Downloader GUI
+Executes a single download job; shared by the GUI and the headless batch runner
+"""
+
+import asyncio
+import glob
+import os
+import subprocess
+import threading
+import time
+
+from commands import build_download_command
+from disk_space import NotEnoughSpace, job_scratch_dir, in_scratch, move_into_place, move_all_into_place
+from formats import (pick_audio, legacy_audio_pick, plan_video, describe_plan, estimated_size,
+                     audio_bitrate, codec_matches)
+from info_engine import ExtractionError
+from postprocess import conversion_target, converted_path, convert_audio
+from metrics import timed
+from process_engine import shared_engine, stream_lines
+from process_tree import new_group_options, kill_tree
+from worker_pool import WorkerUnavailable
+from progress import (completion_args, parse_completion_line, parse_progress_line, format_progress,
+                      format_bytes, format_speed)
+from urls import video_key
+from thumbnails import thumbnail_url
+
+
+class JobRunner:
+    """Runs download jobs for a DownloadQueue
+
+    Checks the archive, builds the command, reuses cached info when there
+    is some, runs the downloader and turns its output into job progress.
+    log(message, key=None) receives every output line; notify(job) is
+    called after each progress update. Both are called from the process
+    engine's loop (or a worker thread) and must not block.
+    Jobs go through the BandwidthLimiter's proxy when a limit is set.
+    With an info_engine, audio jobs are extracted up front (and the info
+    cached for the download) so their format can be chosen from the list.
+    Downloaders run in their own process group, so stop() ends a paused or
+    cancelled job together with any ffmpeg or aria2c it started.
+
+    Jobs run as coroutines (run_async) on a ProcessEngine, which the
+    DownloadQueue uses directly; calling the runner blocks until the job is
+    done. With a worker_pool, yt-dlp commands go to its warm workers when
+    the toolchain's yt-dlp is the release the workers import, and fall back
+    to starting yt-dlp when no worker can be had.
+
+    With a disk_space guard, a job whose planned size does not fit raises
+    NotEnoughSpace before anything is downloaded. Jobs with a scratch_dir
+    option download (and convert) in their own subdirectory of it, and
+    their finished file is moved into the download folder before it is
+    archived; without a completion line (youtube-dl) every finished file
+    there is moved.
+    """
+
+    def __init__(self, toolchain, info_cache, archive, log, notify=None, bandwidth=None,
+                 info_engine=None, engine=None, worker_pool=None, disk_space=None):
+        self.toolchain = toolchain
+        self.disk_space = disk_space
+        self.engine = engine or shared_engine()
+        self.worker_pool = worker_pool
+        self.bandwidth = bandwidth
+        self.info_engine = info_engine
+        self.info_cache = info_cache
+        self.archive = archive
+        self.log = log
+        self.notify = notify or (lambda job: None)
+        self._processes = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, job):
+        """Download a single queued job, blocking until it is done"""
+        return self.engine.run(self.run_async(job))
+
+    async def run_async(self, job):
+        """Download a single queued job (runs on the process engine's loop)"""
+        loop = asyncio.get_running_loop()
+        options = job.options
+        attempt = job.attempt
+
+        #Skip videos that were already downloaded with the same options
+        #(the archive and info cache files are read on first use, off the loop)
+        profile = self.archive.profile_name(options)
+        key = await loop.run_in_executor(None, self.video_key, job)
+        if key and await loop.run_in_executor(None, self.archive.contains, profile, *key):
+            details = await loop.run_in_executor(None, self.archive.details, profile, *key)
+            job.output_path = details.get("path") if details else None
+            job.result = "Already downloaded"
+            self.log(f"⏭️ Already downloaded, skipping: {job.title or job.url}")
+            return True
+
+        #Build command using the available downloader
+        #The first probe of a fresh toolchain starts processes and blocks
+        with timed(job, "probe"):
+            downloader, has_ffmpeg = await loop.run_in_executor(
+                None, lambda: (self.toolchain.downloader(), self.toolchain.has('ffmpeg')))
+        if not downloader:
+            self.log("Error: No downloader available!")
+            job.result = "No downloader available"
+            return False
+
+        #Conversions run as a separate stage, so the download is only archived
+        #(by the stage) once the converted file exists
+        convert_to = conversion_target(options, has_ffmpeg, downloader)
+
+        #Formats are picked from the format list when it can be had; MP3
+        #without FFmpeg keeps its direct-MP3 selector
+        with timed(job, "plan"):
+            format_id = await loop.run_in_executor(None, self.plan_formats, job, has_ffmpeg, convert_to)
+        if self.disk_space is not None and job.estimated_size:
+            shortage = await loop.run_in_executor(None, self.disk_space.shortage, job)
+            if shortage:
+                raise NotEnoughSpace(shortage)
+
+        #Each job downloads into its own scratch subdirectory
+        if options.get("scratch_dir"):
+            options = dict(options, scratch_dir=job_scratch_dir(options, job.url))
+
+        #Files downloaded to a scratch directory are archived once they are in place,
+        #if the downloader reports what it wrote
+        deferred = convert_to or (options.get("scratch_dir") and completion_args(downloader))
+        archive_file = None if deferred else await loop.run_in_executor(None, self.archive.archive_file, profile)
+        cmd = build_download_command(downloader, options, has_ffmpeg, archive_file=archive_file,
+                                     log=self.log, site=key[0] if key else None,
+                                     external_downloaders=self.toolchain.external_downloaders(),
+                                     proxy=self.bandwidth.proxy_url() if self.bandwidth else None,
+                                     convert=bool(convert_to), format_id=format_id)
+
+        if job.should_stop(attempt):
+            return False
+
+        #Reuse the info extracted by "Get Info" instead of extracting again
+        info_path = await loop.run_in_executor(None, self.info_cache.lookup, job.url)
+        if info_path:
+            self.log(f"Using cached video info for {job.url}")
+            returncode = await self.run_process(cmd + ['--load-info-json', str(info_path)], job, attempt)
+            if returncode != 0 and not job.should_stop(attempt):
+                #Stream URLs in the cached info may have expired
+                self.log("Cached video info did not work, extracting again...")
+                await loop.run_in_executor(None, self.info_cache.invalidate, job.url)
+                returncode = await self.run_process(cmd + [job.url], job, attempt)
+        else:
+            returncode = await self.run_process(cmd + [job.url], job, attempt)
+
+        if job.should_stop(attempt):
+            return False
+        if returncode == 0:
+            speed = job.average_speed
+            rate = f", {format_bytes(job.downloaded_bytes)} at {format_speed(speed)}" if speed else ""
+            if convert_to and job.completion and job.output_path:
+                if converted_path(job.output_path, convert_to) != job.output_path:
+                    self.log(f"⬇️ Downloaded {job.url}{rate}, queued for {convert_to.upper()} conversion")
+                    job.next_stage = lambda: self.convert(job, convert_to, attempt)
+                    return True
+            if in_scratch(job.output_path, options):
+                with timed(job, "move"):
+                    if not await loop.run_in_executor(None, self.place, job):
+                        return False
+            elif options.get("scratch_dir") and not job.completion:
+                #Without a completion line the finished files are whatever the scratch directory holds
+                with timed(job, "move"):
+                    if not await loop.run_in_executor(None, self.place_all, job, options["scratch_dir"]):
+                        return False
+            if deferred and job.completion and job.output_path:
+                await loop.run_in_executor(None, self.record, job)
+            self.log(f"✅ Download completed successfully! ({job.url}{rate})")
+            job.result = job.result or "Completed"
+            return True
+
+        self.log(f"❌ Download failed! ({job.url})")
+        job.result = f"yt-dlp exited with code {returncode}"
+        return False
+
+    async def run_process(self, cmd, job, attempt=None):
+        """Run a downloader command for job, streaming its output; returns the exit code
+
+        The run is split into the extract, transfer and finalize phases at
+        the first and last progress update.
+        """
+        self.log(f"Executing: {' '.join(cmd)}")
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        first_progress = last_progress = None
+        processes = []
+        records = []
+
+        def on_start(process):
+            processes.append(process)
+            self._track(job, process, attempt)
+
+        def on_line(line):
+            nonlocal first_progress, last_progress
+            completed = parse_completion_line(line)
+            if completed is not None:
+                job.output_path = completed.get('filepath')
+                job.completion = completed
+                if (conversion_target(job.options, self.toolchain.has('ffmpeg'), cmd[0]) is None
+                        and not job.options.get("scratch_dir")):
+                    #The archive files are appended to off the loop
+                    records.append(loop.run_in_executor(None, self.record, job))
+                return
+
+            progress = parse_progress_line(line)
+            if progress is None:
+                if 'has already been recorded in the archive' in line:
+                    job.result = "Already downloaded"
+                self.log(line.rstrip(), key=job.id)
+                return
+            last_progress = time.perf_counter()
+            first_progress = first_progress or last_progress
+            job.update_progress(progress)
+            self.notify(job)
+            self.log(format_progress(progress), key=job.id)
+
+        try:
+            returncode = None
+            if self.pool_usable(cmd[0]):
+                try:
+                    returncode = await self.worker_pool.run(cmd[1:], on_line, on_start)
+                except WorkerUnavailable as e:
+                    self.log(f"⚠️ yt-dlp workers unavailable, starting yt-dlp directly: {e}")
+            if returncode is None:
+                returncode = await stream_lines(cmd, on_line, on_start, **new_group_options())
+        finally:
+            for process in processes:
+                self._untrack(job, process)
+
+        ended = time.perf_counter()
+        if first_progress is None:
+            job.add_phase_time("extract", ended - started)
+        else:
+            job.add_phase_time("extract", first_progress - started)
+            job.add_phase_time("transfer", last_progress - first_progress)
+            job.add_phase_time("finalize", ended - last_progress)
+        #Archived before the job counts as done, so a resubmitted URL is skipped
+        await asyncio.gather(*records)
+        return returncode
+
+    def pool_usable(self, downloader):
+        """True if commands for downloader can go to the worker pool (may block on a first toolchain probe)"""
+        return (downloader == 'yt-dlp' and self.worker_pool is not None and self.worker_pool.available
+                and self.worker_pool.runs(self.toolchain.version('yt-dlp')))
+
+    async def warm_up_workers(self, count):
+        """Start idle workers ahead of the first jobs, if the pool will be used"""
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self.pool_usable, 'yt-dlp'):
+            await self.worker_pool.warm_up(count)
+
+    def plan_formats(self, job, has_ffmpeg, convert_to):
+        """Format selector for a job from its info, None for the default selector (may block)"""
+        if job.options.get("audio_only"):
+            if convert_to or job.options.get("audio_format") != "mp3":
+                return self.plan_audio(job, has_ffmpeg, convert_to)
+            return None
+        return self.plan_video(job, has_ffmpeg)
+
+    def job_info(self, job, extract=True):
+        """Info dict of a job from the cache, else (with extract=True) from the info engine"""
+        info = self.info_cache.get(job.url)
+        if info is None and extract and self.info_engine is not None:
+            try:
+                info = self.info_engine.extract_info(job.url)
+            except ExtractionError as e:
+                self.log(f"Could not read the format list, using the default selector: {e}")
+                return None
+            #The download then loads this info instead of extracting again
+            self.info_cache.put(job.url, info)
+        if info is not None and not job.thumbnail:
+            job.thumbnail = thumbnail_url(info)
+        return info
+
+    def plan_video(self, job, has_ffmpeg):
+        """Choose the video (+audio) formats of a job from its info; returns a selector or None
+
+        "best" keeps the default selector and is only planned for its size
+        estimate, which the disk space guard needs before admitting the
+        download (without a guard, only from info that is already cached).
+        Resolution caps are always worth an extraction up front, since the
+        generic selector can only pick from progressive formats without it.
+        The extracted info is cached and loaded by the download.
+        """
+        choice = job.options.get("format", "best")
+        info = self.job_info(job, extract=choice != "best" or self.disk_space is not None)
+        if not info:
+            return None
+        plan = plan_video(info, choice, can_merge=has_ffmpeg)
+        if plan is None:
+            return None
+        job.estimated_size = plan.size
+        self.log(f"🎯 {choice}: format {plan.format_id} ({plan.height}p, {describe_plan(plan)})")
+        return None if choice == "best" else plan.format_id
+
+    def plan_audio(self, job, has_ffmpeg, convert_to=None):
+        """Choose the audio format of a job from its info; returns a format ID or None
+
+        Without a conversion stage (convert_to None) the stream is kept as
+        downloaded, so it has to be in the requested container already.
+        """
+        info = self.job_info(job)
+        if not info:
+            return None
+
+        audio_format = job.options.get("audio_format", "best")
+        chosen = pick_audio(info, audio_format, convert=bool(convert_to))
+        if chosen is None:
+            return None
+
+        duration = info.get('duration')
+        size = estimated_size(chosen, duration)
+        job.estimated_size = size
+        bitrate = audio_bitrate(chosen)
+        message = (f"🎯 Audio format {chosen['format_id']} ({chosen.get('acodec')}"
+                   f"{f', {bitrate:.0f}k' if bitrate else ''}, ~{format_bytes(size)})")
+
+        #Compare with what the previous fixed selectors would have fetched
+        old = legacy_audio_pick(info, audio_format, has_ffmpeg)
+        old_size = estimated_size(old, duration) if old else None
+        if old is not None and old is not chosen and size and old_size and old_size > size:
+            message += (f", saves ~{format_bytes(old_size - size)} over format "
+                        f"{old['format_id']} (~{format_bytes(old_size)})")
+        self.log(message)
+        return chosen['format_id']
+
+    def convert(self, job, audio_format, attempt=None):
+        """Conversion stage of a job (runs on the queue's stage pool)"""
+        ffmpeg = self.toolchain.path('ffmpeg') or 'ffmpeg'
+        source = job.output_path
+        source_codec = job.completion.get('acodec')
+        if codec_matches(source_codec, audio_format):
+            self.log(f"🔄 Remuxing {source_codec} into {audio_format.upper()}: {source}")
+        else:
+            self.log(f"🔄 Converting to {audio_format.upper()}: {source}")
+
+        processes = []
+
+        def start_process(cmd, **kwargs):
+            process = subprocess.Popen(cmd, **kwargs, **new_group_options())
+            processes.append(process)
+            self._track(job, process, attempt)
+            return process
+
+        try:
+            with timed(job, "convert"):
+                path, error = convert_audio(ffmpeg, source, audio_format, start_process, source_codec)
+        finally:
+            for process in processes:
+                self._untrack(job, process)
+
+        if error:
+            self.log(f"❌ Conversion failed! ({job.url}): {error}")
+            job.result = f"Conversion failed: {error}"
+            return False
+
+        job.output_path = path
+        if in_scratch(path, job.options):
+            with timed(job, "move"):
+                if not self.place(job):
+                    return False
+        self.record(job)
+        self.log(f"✅ Download and conversion completed successfully! ({job.output_path})")
+        job.result = "Completed"
+        return True
+
+    def place(self, job):
+        """Move a job's finished file from the scratch directory into its download folder (blocks)"""
+        directory = job.options["download_path"]
+        source_dir = os.path.dirname(job.output_path)
+        try:
+            job.output_path = move_into_place(job.output_path, directory)
+        except OSError as e:
+            self.log(f"❌ Could not move {job.output_path} to {directory}: {e}")
+            job.result = f"Move failed: {e}"
+            return False
+        try:
+            os.rmdir(source_dir)
+        except OSError:
+            pass  #Not empty yet
+        return True
+
+    def place_all(self, job, scratch):
+        """Move every finished file in a job's scratch subdirectory into its download folder (blocks)"""
+        directory = job.options["download_path"]
+        try:
+            moved = move_all_into_place(scratch, directory)
+            if moved:
+                job.output_path = max(moved, key=os.path.getsize)  #The video rather than e.g. subtitles
+        except OSError as e:
+            self.log(f"❌ Could not move the files in {scratch} to {directory}: {e}")
+            job.result = f"Move failed: {e}"
+            return False
+        return True
+
+    def record(self, job):
+        """Add a job's completed download to the archive"""
+        completed = job.completion
+        self.archive.add(self.archive.profile_name(job.options), completed['extractor_key'],
+                         completed['id'], completed.get('format_id'), job.output_path)
+
+    def video_key(self, job):
+        """(extractor, video ID) of a job if it can be known without extracting"""
+        if job.extractor and job.video_id:
+            return (job.extractor, job.video_id)
+        return video_key(job.url) or self.info_cache.video_key(job.url)
+
+    def _track(self, job, process, attempt):
+        """Register job's current process; kill it at once if the job was stopped meanwhile"""
+        with self._lock:
+            self._processes[job.id] = process
+        if attempt is not None and job.should_stop(attempt):
+            #Not on the caller's thread, which may be the engine loop the kill waits on
+            threading.Thread(target=kill_tree, args=(process,), daemon=True).start()
+
+    def _untrack(self, job, process):
+        """Forget job's process unless a newer run has replaced it"""
+        with self._lock:
+            if self._processes.get(job.id) is process:
+                del self._processes[job.id]
+
+    def stop(self, job, keep_partial=True):
+        """Kill the process tree of a paused or cancelled job (called by the DownloadQueue)
+
+        Unless keep_partial, the partial files of the download are deleted
+        afterwards; finished files are never touched.
+        """
+        with self._lock:
+            process = self._processes.get(job.id)
+        if process is not None:
+            kill_tree(process)
+
+        name = job.title or job.url
+        if job.state != job.CANCELLED:
+            self.log(f"⏸️ Paused: {name}")
+        elif keep_partial:
+            self.log(f"🚫 Cancelled, partial files kept: {name}")
+        else:
+            self.log(f"🚫 Cancelled, removed {self.discard_partial(job)} partial file(s): {name}")
+
+    def discard_partial(self, job):
+        """Delete the .part, fragment and resume-state files of a job's downloads; returns how many"""
+        removed = 0
+        for path in job.files:
+            candidates = [path + '.part', path + '.ytdl'] + glob.glob(glob.escape(path) + '.part-Frag*')
+            for candidate in candidates:
+                try:
+                    os.remove(candidate)
+                    removed += 1
+                except OSError:
+                    pass  #Not there
+        return removed
+
+    def terminate_all(self):
+        """Kill every running downloader process tree"""
+        with self._lock:
+            processes = list(self._processes.values())
+        threads = [threading.Thread(target=kill_tree, args=(process,), daemon=True) for process in processes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
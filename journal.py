@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Job journal for YouTube Downloader GUI
+Append-only record of job state changes so unfinished downloads survive a restart
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from download_queue import DownloadJob
+
+
+class JobJournal:
+    """JSON-lines journal of queued, running and finished jobs
+
+    Every state change appends one line with enough information to rebuild
+    the job, so the journal stays consistent whenever the app is closed or
+    killed. On startup the jobs whose last state was queued, running or
+    paused are handed back for resuming and the file is compacted down to them.
+    record() may be called from any thread, including the process engine's
+    loop: the lines are written and flushed by a writer thread of its own.
+    """
+
+    #Interrupted conversions are redone from the downloaded file; paused jobs stay paused
+    UNFINISHED_STATES = (DownloadJob.QUEUED, DownloadJob.RUNNING, DownloadJob.CONVERTING,
+                         DownloadJob.PAUSED)
+
+    def __init__(self, config_dir):
+        self.journal_file = config_dir / "jobs.jsonl"
+        self._lock = threading.Lock()
+        self._last_state = {}
+        #The file is only touched by the writer thread and compaction, so record() never waits on the disk
+        self._file_lock = threading.Lock()
+        self._file = None
+        self._closed = False
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def _open(self):
+        """Open the journal for appending (file lock held)"""
+        if self._file is None:
+            self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_file, 'a', encoding='utf-8')
+        return self._file
+
+    def record(self, job):
+        """Append the job's state if it changed since it was last recorded"""
+        with self._lock:
+            if self._closed or self._last_state.get(job.id) == job.state:
+                return
+            self._last_state[job.id] = job.state
+            entry = {
+                "id": job.id,
+                "state": job.state,
+                "url": job.url,
+                "options": job.options,
+                "title": job.title,
+                "extractor": job.extractor,
+                "video_id": job.video_id,
+                "thumbnail": job.thumbnail,
+                "time": time.time(),
+            }
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_lines, name="job-journal", daemon=True)
+                self._writer.start()
+            self._queue.put(json.dumps(entry) + "\n")
+
+    def _write_lines(self):
+        """Writer thread: append queued lines, flushing once the queue is drained"""
+        while True:
+            line = self._queue.get()
+            if line is None:
+                return
+            with self._file_lock:
+                try:
+                    f = self._open()
+                    f.write(line)
+                    if self._queue.empty():
+                        f.flush()
+                except OSError:
+                    pass  #Fail silently, resuming is best effort
+
+    def read(self):
+        """Latest entry of every job in the journal, in first-seen order"""
+        latest = {}
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        latest[entry["id"]] = entry
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        continue  #Torn last line after a crash
+        except OSError:
+            pass
+        return list(latest.values())
+
+    def take_unfinished(self):
+        """Rebuild jobs that never finished and compact the journal to just those"""
+        entries = [entry for entry in self.read() if entry["state"] in self.UNFINISHED_STATES]
+
+        jobs = []
+        for entry in entries:
+            job = DownloadJob(entry["url"], entry.get("options"), job_id=entry["id"])
+            job.title = entry.get("title")
+            job.extractor = entry.get("extractor")
+            job.video_id = entry.get("video_id")
+            job.thumbnail = entry.get("thumbnail")
+            if entry["state"] == DownloadJob.PAUSED:
+                job.state = DownloadJob.PAUSED
+                job.result = "Paused"
+            jobs.append(job)
+
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                tmp_file = self.journal_file.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    for entry, job in zip(entries, jobs):
+                        entry["state"] = job.state
+                        f.write(json.dumps(entry) + "\n")
+                os.replace(tmp_file, self.journal_file)
+            except OSError:
+                pass
+        with self._lock:
+            self._last_state = {job.id: job.state for job in jobs}
+        return jobs
+
+    def close(self):
+        """Write the queued lines and close the journal; later state changes (e.g. jobs killed on exit) are not recorded"""
+        with self._lock:
+            self._closed = True
+            writer = self._writer
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(5)
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
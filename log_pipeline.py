@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Log pipeline for YouTube Downloader GUI
+Collects log lines and UI callbacks from any thread and applies them on the Tk thread in batches
+"""
+
+import queue
+import sys
+import time
+import tkinter as tk
+
+from progress import PROGRESS_LINE_RE
+
+
+class LogPipeline:
+    """Thread-safe log buffer drained by the Tk main loop on a timer
+
+    Worker threads call write() and post(); nothing touches Tk until drain()
+    runs on the main thread, at most once per interval. Each drain inserts
+    its lines with as few Text operations as possible. Progress lines
+    ("[download]  42.0% of ...") are coalesced: every key (usually a job id)
+    owns one live progress line that is rewritten in place instead of
+    appending a new line for every update.
+    """
+
+    PROGRESS_RE = PROGRESS_LINE_RE
+
+    def __init__(self, root, text_widget, interval_ms=33, max_items_per_drain=5000, max_lines=10000):
+        self.root = root
+        self.text = text_widget
+        self.interval_ms = interval_ms
+        self.max_items_per_drain = max_items_per_drain
+        self.max_lines = max_lines
+        self._queue = queue.Queue()
+        self._progress_marks = set()
+        self._started = False
+
+        #Throughput statistics
+        self.lines_received = 0
+        self.lines_written = 0
+        self.lines_coalesced = 0
+        self.drains = 0
+        self.max_drain_seconds = 0.0
+        self.started_at = time.perf_counter()
+
+    def start(self):
+        """Start the periodic drain (call from the Tk thread)"""
+        if not self._started:
+            self._started = True
+            self.root.after(self.interval_ms, self._tick)
+
+    def write(self, message, key=None):
+        """Queue a log message from any thread
+
+        Carriage returns separate successive redraws of the same terminal
+        line, so only the text after the last one is kept.
+        """
+        for line in str(message).split('\n'):
+            if '\r' in line:
+                line = line.rstrip('\r').rsplit('\r', 1)[-1]
+            self._queue.put(("line", key, line))
+
+    def post(self, func, *args):
+        """Run func(*args) on the Tk thread, in order with the log lines"""
+        self._queue.put(("call", func, args))
+
+    def clear(self):
+        """Delete all text (call from the Tk thread)"""
+        for mark in self._progress_marks:
+            self.text.mark_unset(mark)
+        self._progress_marks.clear()
+        self.text.delete(1.0, tk.END)
+
+    def stats(self):
+        """Throughput counters; lines_per_second covers everything received so far"""
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        return {
+            "lines_received": self.lines_received,
+            "lines_written": self.lines_written,
+            "lines_coalesced": self.lines_coalesced,
+            "drains": self.drains,
+            "lines_per_second": self.lines_received / elapsed,
+            "max_drain_ms": self.max_drain_seconds * 1000,
+        }
+
+    def _tick(self):
+        """Timer callback: drain, then schedule the next frame"""
+        try:
+            self.drain()
+        finally:
+            self.root.after(self.interval_ms, self._tick)
+
+    def drain(self):
+        """Apply queued lines and callbacks (call from the Tk thread)"""
+        items = []
+        try:
+            while len(items) < self.max_items_per_drain:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not items:
+            return
+
+        started = time.perf_counter()
+        superseded = self._superseded_progress(items)
+        pending = []
+        wrote = False
+
+        for index, item in enumerate(items):
+            if item[0] == "call":
+                self._flush(pending)
+                pending = []
+                _, func, args = item
+                try:
+                    func(*args)
+                except Exception:
+                    #Report it as Tk would for its own callbacks and keep going: the
+                    #rest of the batch is already dequeued and would be lost
+                    self.root.report_callback_exception(*sys.exc_info())
+                continue
+
+            _, key, line = item
+            self.lines_received += 1
+            if index in superseded:
+                self.lines_coalesced += 1
+                continue
+
+            wrote = True
+            self.lines_written += 1
+            mark = f"progress-{key}"
+            if key is not None and self.PROGRESS_RE.match(line):
+                if mark in self._progress_marks:
+                    #Rewrite this key's live progress line in place
+                    self.text.delete(mark, f"{mark} lineend")
+                    self.text.insert(mark, line)
+                else:
+                    self._flush(pending)
+                    pending = []
+                    self.text.mark_set(mark, "end-1c")
+                    self.text.mark_gravity(mark, tk.LEFT)
+                    self._progress_marks.add(mark)
+                    self.text.insert(tk.END, line + "\n")
+                continue
+
+            if mark in self._progress_marks:
+                #Any other line from the same key freezes its progress line
+                self.text.mark_unset(mark)
+                self._progress_marks.discard(mark)
+            pending.append(line + "\n")
+
+        self._flush(pending)
+        if wrote:
+            self._trim()
+            self.text.see(tk.END)
+
+        self.drains += 1
+        self.max_drain_seconds = max(self.max_drain_seconds, time.perf_counter() - started)
+
+    def _superseded_progress(self, items):
+        """Indexes of progress lines overwritten later in the same batch"""
+        superseded = set()
+        live = set()
+        for index in range(len(items) - 1, -1, -1):
+            kind, key, line = items[index][0], items[index][1], items[index][2]
+            if kind != "line" or key is None:
+                continue
+            if self.PROGRESS_RE.match(line):
+                if key in live:
+                    superseded.add(index)
+                live.add(key)
+            else:
+                live.discard(key)
+        return superseded
+
+    def _flush(self, pending):
+        """Insert accumulated plain lines with a single Text operation"""
+        if pending:
+            self.text.insert(tk.END, "".join(pending))
+
+    def _trim(self):
+        """Drop the oldest lines once the log grows past max_lines"""
+        line_count = int(self.text.index("end-1c").split('.')[0])
+        excess = line_count - self.max_lines
+        if excess > 0:
+            self.text.delete(1.0, f"{excess + 1}.0")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Job metrics for YouTube Downloader GUI
+Per-job phase timings and throughput, exported as JSON lines and a Prometheus textfile
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+#Job phases in the order they happen
+PHASES = (
+    "probe",     #Finding the downloader and ffmpeg
+    "plan",      #Extracting the format list to choose formats
+    "extract",   #Downloader start-up and extraction, until the first byte
+    "transfer",  #First to last progress update
+    "finalize",  #Merging and moving files after the transfer
+    "convert",   #Post-processing stage (ffmpeg conversion)
+    "move",      #Moving the finished file out of the scratch directory
+)
+
+
+@contextmanager
+def timed(job, phase):
+    """Add the time spent in the with block to one of the job's phases"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        job.add_phase_time(phase, time.perf_counter() - started)
+
+
+def job_record(job):
+    """Metrics of a finished job as a JSON-serialisable dict"""
+    return {
+        "id": job.id,
+        "url": job.url,
+        "title": job.title,
+        "state": job.state,
+        "result": job.result,
+        "bytes": job.downloaded_bytes,
+        "average_bytes_per_second": job.average_speed,
+        "peak_bytes_per_second": job.peak_speed,
+        "phases": {phase: round(seconds, 4) for phase, seconds in job.phases.items()},
+        "queued_seconds": (job.started_at - job.created_at) if job.started_at else None,
+        "total_seconds": (job.finished_at - job.started_at) if job.started_at and job.finished_at else None,
+        "finished_at": job.finished_at,
+    }
+
+
+class MetricsRecorder:
+    """Collects the metrics of finished jobs
+
+    Every finished job is appended to metrics/jobs.jsonl, and running totals
+    are rewritten to metrics/youtube_downloader.prom in the Prometheus text
+    format, for node_exporter's textfile collector to scrape. record() may be
+    called from the process engine's loop: the files are written by a writer
+    thread of its own.
+    """
+
+    def __init__(self, config_dir):
+        self.metrics_dir = config_dir / "metrics"
+        self.jsonl_file = self.metrics_dir / "jobs.jsonl"
+        self.textfile = self.metrics_dir / "youtube_downloader.prom"
+        self._lock = threading.Lock()
+        self._recorded = set()
+        self.recent = []
+        self.jobs_total = {}
+        self.bytes_total = 0
+        self.phase_seconds_total = {phase: 0.0 for phase in PHASES}
+        self.peak_bytes_per_second = 0.0
+        self.started_at = time.time()
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def record(self, job):
+        """Record a finished job once; later calls for the same job are ignored"""
+        if not job.is_finished:
+            return
+        with self._lock:
+            if job.id in self._recorded:
+                return
+            self._recorded.add(job.id)
+
+            record = job_record(job)
+            self.recent = (self.recent + [record])[-200:]
+            self.jobs_total[job.state] = self.jobs_total.get(job.state, 0) + 1
+            self.bytes_total += job.downloaded_bytes
+            for phase, seconds in job.phases.items():
+                self.phase_seconds_total[phase] = self.phase_seconds_total.get(phase, 0.0) + seconds
+            self.peak_bytes_per_second = max(self.peak_bytes_per_second, job.peak_speed or 0)
+
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_files, name="job-metrics", daemon=True)
+                self._writer.start()
+            self._queue.put((json.dumps(record) + "\n", self._textfile_text()))
+
+    def _write_files(self):
+        """Writer thread: append the queued records and rewrite the textfile with the latest totals"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            items = [item]
+            while not self._queue.empty():
+                item = self._queue.get()
+                if item is None:
+                    break
+                items.append(item)
+            try:
+                self.metrics_dir.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_file, 'a', encoding='utf-8') as f:
+                    f.write("".join(line for line, text in items))
+                tmp_file = self.textfile.with_suffix('.prom.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(items[-1][1])
+                os.replace(tmp_file, self.textfile)
+            except OSError:
+                pass  #Fail silently, metrics are best effort
+            if item is None:
+                return
+
+    def close(self):
+        """Write the records still queued (on exit)"""
+        with self._lock:
+            writer = self._writer
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(5)
+
+    def summary(self):
+        """Totals for the stats panel"""
+        with self._lock:
+            finished = sum(self.jobs_total.values())
+            return {
+                "jobs": finished,
+                "jobs_by_state": dict(self.jobs_total),
+                "bytes": self.bytes_total,
+                "phase_seconds": dict(self.phase_seconds_total),
+                "peak_bytes_per_second": self.peak_bytes_per_second,
+                "recent": list(self.recent),
+            }
+
+    def _textfile_text(self):
+        """Contents of the Prometheus textfile for the current totals (lock held)"""
+        lines = [
+            "# HELP ytdl_jobs_total Finished download jobs by final state.",
+            "# TYPE ytdl_jobs_total counter",
+        ]
+        for state, count in sorted(self.jobs_total.items()):
+            lines.append(f'ytdl_jobs_total{{state="{state}"}} {count}')
+        lines += [
+            "# HELP ytdl_downloaded_bytes_total Bytes downloaded by finished jobs.",
+            "# TYPE ytdl_downloaded_bytes_total counter",
+            f"ytdl_downloaded_bytes_total {self.bytes_total}",
+            "# HELP ytdl_phase_seconds_total Time spent in each job phase.",
+            "# TYPE ytdl_phase_seconds_total counter",
+        ]
+        for phase, seconds in self.phase_seconds_total.items():
+            lines.append(f'ytdl_phase_seconds_total{{phase="{phase}"}} {seconds:.4f}')
+        lines += [
+            "# HELP ytdl_peak_bytes_per_second Highest transfer rate seen in any job.",
+            "# TYPE ytdl_peak_bytes_per_second gauge",
+            f"ytdl_peak_bytes_per_second {self.peak_bytes_per_second:.0f}",
+            "# HELP ytdl_start_time_seconds When this instance started.",
+            "# TYPE ytdl_start_time_seconds gauge",
+            f"ytdl_start_time_seconds {self.started_at:.0f}",
+        ]
+        if self.recent:
+            last = self.recent[-1]
+            lines += [
+                "# HELP ytdl_last_job_average_bytes_per_second Average rate of the last finished job.",
+                "# TYPE ytdl_last_job_average_bytes_per_second gauge",
+                f"ytdl_last_job_average_bytes_per_second {last['average_bytes_per_second'] or 0:.0f}",
+            ]
+        return "\n".join(lines) + "\n"
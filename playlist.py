@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Playlist support for YouTube Downloader GUI
+Lists playlist entries cheaply and tracks the jobs of a playlist batch
+"""
+
+import json
+import subprocess
+import tempfile
+import threading
+import time
+
+from download_queue import DownloadJob
+from thumbnails import thumbnail_url
+
+
+class PlaylistError(Exception):
+    """Raised when a playlist could not be listed"""
+
+
+def entry_url(entry):
+    """Download URL for a flat playlist entry"""
+    url = entry.get('url') or entry.get('webpage_url') or entry.get('original_url')
+    if url and '://' not in url and entry.get('ie_key') == 'Youtube':
+        #youtube-dl reports bare video IDs for flat YouTube entries
+        url = f"https://www.youtube.com/watch?v={url}"
+    return url
+
+
+def entry_job(entry, options):
+    """DownloadJob for a playlist entry, None if the entry has no usable URL"""
+    link = entry_url(entry)
+    if not link:
+        return None
+    job = DownloadJob(link, options)
+    job.title = entry.get('title')
+    job.extractor = entry.get('ie_key') or entry.get('extractor_key')
+    job.video_id = entry.get('id')
+    job.thumbnail = thumbnail_url(entry)
+    return job
+
+
+def iter_playlist_entries(downloader, url):
+    """Yield the entries of a playlist as they are listed
+
+    Uses flat extraction, which only reads the playlist pages and not every
+    video, and streams one JSON object per entry so downloads can start
+    before a long playlist is fully listed. A URL that is not a playlist
+    yields its own (full) info once.
+    """
+    cmd = [downloader, '--flat-playlist', '--dump-json', '--yes-playlist', url]
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr,
+                                   text=True, universal_newlines=True)
+        count = 0
+        for line in process.stdout:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            count += 1
+            yield entry
+        returncode = process.wait()
+
+        if returncode != 0 and count == 0:
+            stderr.seek(0)
+            raise PlaylistError(stderr.read().strip() or f"{downloader} exited with code {returncode}")
+
+
+class PlaylistBatch:
+    """The jobs created from one playlist, summarised once they have all finished"""
+
+    def __init__(self, url):
+        self.url = url
+        self.title = None
+        self.jobs = []
+        self.listing_done = False
+        self.listing_error = None
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def add(self, job):
+        """Add a job for one playlist entry"""
+        with self._lock:
+            self.jobs.append(job)
+
+    def finish_listing(self, error=None):
+        """Mark the playlist as fully listed"""
+        self.listing_error = error
+        self.listing_done = True
+
+    @property
+    def is_finished(self):
+        """True once the listing is done and every entry job has finished"""
+        with self._lock:
+            return self.listing_done and all(job.is_finished for job in self.jobs)
+
+    def take_summary(self):
+        """Summary statistics, returned only the first time the batch is finished"""
+        if self._reported or not self.is_finished:
+            return None
+        self._reported = True
+
+        with self._lock:
+            jobs = list(self.jobs)
+        completed = [job for job in jobs if job.state == job.DONE]
+        finished_at = max((job.finished_at for job in jobs), default=time.time())
+        minutes = max(finished_at - self.started_at, 1e-9) / 60
+        return {
+            "title": self.title or self.url,
+            "items": len(jobs),
+            "completed": len(completed),
+            "failed": len(jobs) - len(completed),
+            "items_per_minute": len(completed) / minutes,
+            "total_bytes": sum(job.downloaded_bytes for job in jobs),
+            "error": self.listing_error,
+        }
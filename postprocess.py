@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Post-processing for YouTube Downloader GUI
+Converts downloaded files with ffmpeg as a separate stage after the download
+"""
+
+import os
+import subprocess
+
+from formats import codec_matches
+from progress import completion_args
+
+#ffmpeg encoder arguments per target audio format
+AUDIO_CODECS = {
+    #VBR quality 0, the same as yt-dlp's --audio-quality 0
+    "mp3": ['-codec:a', 'libmp3lame', '-q:a', '0'],
+    "m4a": ['-codec:a', 'aac', '-b:a', '192k'],
+}
+
+#ffmpeg muxer per target audio format
+MUXERS = {"mp3": "mp3", "m4a": "ipod"}
+
+
+def conversion_target(options, has_ffmpeg, downloader):
+    """Audio format a job's download has to be converted to as a separate stage, None if it needs none
+
+    The stage needs the downloaded file's path from a completion line;
+    downloaders that cannot print one (youtube-dl) convert in-process
+    with -x instead.
+    """
+    if not completion_args(downloader):
+        return None
+    if has_ffmpeg and options.get("audio_only") and options.get("audio_format") in AUDIO_CODECS:
+        return options["audio_format"]
+    return None
+
+
+def converted_path(source, audio_format):
+    """Final path of a converted file: the source path with the new extension"""
+    return os.path.splitext(source)[0] + "." + audio_format
+
+
+def conversion_command(ffmpeg, source, target, audio_format, remux=False):
+    """ffmpeg command that converts (or with remux=True, copies) source's audio into target"""
+    codec_args = ['-codec:a', 'copy'] if remux else AUDIO_CODECS[audio_format]
+    return ([ffmpeg, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y', '-i', source, '-vn'] +
+            codec_args + ['-f', MUXERS[audio_format], target])
+
+
+def convert_audio(ffmpeg, source, audio_format, start_process=subprocess.Popen, source_codec=None):
+    """Convert a downloaded file and replace it with the result
+
+    A source whose codec already fits the target (source_codec, e.g. AAC
+    for m4a) is remuxed instead of re-encoded. ffmpeg writes to a .part
+    file that is renamed into place once complete, and the downloaded file
+    is deleted afterwards, so exactly one file is left behind: the
+    converted one, or the original if conversion failed. start_process is
+    called like subprocess.Popen, so the caller can track the process.
+    Returns (path, error message or None).
+    """
+    target = converted_path(source, audio_format)
+    if os.path.normcase(os.path.abspath(target)) == os.path.normcase(os.path.abspath(source)):
+        return source, None  #Already in the requested format
+    partial = target + ".part"
+
+    remux = codec_matches(source_codec, audio_format)
+    process = start_process(conversion_command(ffmpeg, source, partial, audio_format, remux),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True, universal_newlines=True)
+    _, errors = process.communicate()
+    if process.returncode != 0:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        lines = (errors or "").strip().splitlines()
+        return source, lines[-1] if lines else f"ffmpeg exited with code {process.returncode}"
+
+    try:
+        os.replace(partial, target)
+    except OSError as e:
+        return source, str(e)
+    try:
+        os.remove(source)
+    except OSError:
+        pass  #The converted file is in place, a leftover source is harmless
+    return target, None
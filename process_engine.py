@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Process engine for YouTube Downloader GUI
+Runs child processes on one background asyncio loop instead of a blocked thread per process
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+#Longest output line read from a child; --dump-json prints the whole info dict on one line
+LINE_LIMIT = 64 * 1024 * 1024
+
+
+def _decode(data):
+    """Text of a child's output with Windows line endings normalised"""
+    return data.decode('utf-8', 'replace').replace('\r\n', '\n')
+
+
+async def run_captured(cmd, **kwargs):
+    """Run cmd to completion on the current loop; returns (returncode, stdout, stderr)
+
+    Raises OSError (e.g. FileNotFoundError) if cmd cannot be started, like
+    subprocess.run.
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE, **kwargs)
+    stdout, stderr = await process.communicate()
+    return process.returncode, _decode(stdout), _decode(stderr)
+
+
+async def stream_lines(cmd, on_line, on_start=None, **kwargs):
+    """Run cmd with stderr merged into stdout, calling on_line(line) for each output line
+
+    on_start(process) is called once the process exists, e.g. to register
+    it for cancelling. Both callbacks run on the loop and must not block.
+    Returns the exit code.
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.STDOUT, limit=LINE_LIMIT,
+                                                   **kwargs)
+    if on_start is not None:
+        on_start(process)
+    while True:
+        line = await process.stdout.readline()
+        if not line:
+            break
+        on_line(_decode(line))
+    return await process.wait()
+
+
+def _use_pidfd_watcher(loop):
+    """Reap children through pidfds instead of one waitpid thread per child
+
+    Python 3.12+ already does so on Linux; older versions default to a
+    thread per child process.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(asyncio, 'PidfdChildWatcher'):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return  #Not Linux 5.3+
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+
+
+class ProcessEngine:
+    """A single daemon thread running an asyncio loop for every child process
+
+    Downloads, info lookups and installs are coroutines submitted from any
+    thread with submit(); their pipes are all multiplexed by the one loop,
+    so dozens of concurrent jobs cost one thread instead of one blocked
+    thread each. Results come back as concurrent.futures.Future objects;
+    the GUI hands them to the Tk thread through its log pipeline. Blocking
+    Python work (yt_dlp extraction, first toolchain probe) goes to the
+    loop's executor so it never stalls the pipes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+
+    @property
+    def loop(self):
+        """The engine's event loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                if os.name != 'nt':
+                    _use_pidfd_watcher(loop)
+                threading.Thread(target=loop.run_forever, name="process-engine", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the engine loop and wait for its result (not from the loop itself)"""
+        return self.submit(coro).result(timeout)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_engine():
+    """The process engine shared by the whole application"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ProcessEngine()
+        return _shared
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Process tree control for YouTube Downloader GUI
+Starts downloader processes in their own group so they can be stopped with everything they spawned
+"""
+
+import os
+import signal
+import subprocess
+import time
+
+
+def new_group_options():
+    """Popen keyword arguments that start the child as the leader of a new process group"""
+    if os.name == 'nt':
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _exited(process):
+    """True once a subprocess.Popen or asyncio subprocess has exited"""
+    poll = getattr(process, 'poll', None)
+    return (poll() if poll is not None else process.returncode) is not None
+
+
+def _wait(process, timeout):
+    """Wait up to timeout seconds for process to exit; returns True if it did
+
+    Polls rather than blocking, so it works from any thread for asyncio
+    processes too, whose exit status is collected by their event loop.
+    """
+    deadline = time.monotonic() + timeout
+    while not _exited(process):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def kill_tree(process, timeout=3):
+    """Stop a process started with new_group_options() and all of its descendants
+
+    On POSIX the group gets SIGTERM, then SIGKILL for anything still alive
+    after timeout seconds (yt-dlp's ffmpeg or aria2c children included).
+    On Windows taskkill /T /F ends the whole tree at once. Works for
+    subprocess.Popen and asyncio subprocesses, but must not be called from
+    the event loop that owns the latter.
+    """
+    if os.name == 'nt':
+        if not _exited(process):
+            try:
+                subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True,
+                               creationflags=subprocess.CREATE_NO_WINDOW)
+            except OSError:
+                pass
+        if not _wait(process, timeout):
+            try:
+                process.kill()
+            except OSError:
+                pass
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except OSError:
+        pass  #Group already gone
+    _wait(process, timeout)
+    try:
+        #Also catches children that outlived the leader
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    _wait(process, timeout)
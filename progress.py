@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Progress parsing for YouTube Downloader GUI
+Asks yt-dlp for machine-readable progress and turns it into numbers
+"""
+
+import json
+import re
+
+#Marker for the JSON progress lines requested through --progress-template
+PROGRESS_PREFIX = "[ytdl-progress] "
+
+PROGRESS_FIELDS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate",
+                   "speed", "eta", "elapsed", "fragment_index", "fragment_count", "filename")
+
+PROGRESS_TEMPLATE = "download:" + PROGRESS_PREFIX + "%(progress.{" + ",".join(PROGRESS_FIELDS) + "})j"
+
+#Marker for the line printed once a video's final file is in place
+COMPLETION_PREFIX = "[ytdl-done] "
+
+COMPLETION_TEMPLATE = "after_move:" + COMPLETION_PREFIX + "%(.{extractor_key,id,format_id,acodec,filepath})j"
+
+#Classic "[download]  42.0% of ~10.00MiB at 1.20MiB/s ETA 00:05" line (youtube-dl)
+LEGACY_PROGRESS_RE = re.compile(
+    r'^\[download\]\s+(?P<percent>\d+(?:\.\d+)?)%'
+    r'(?:\s+of\s+~?\s*(?P<total>[\d.]+\s*[KMGTP]?i?B))?'
+    r'(?:\s+at\s+(?P<speed>[\d.]+\s*[KMGTP]?i?B)/s)?'
+    r'(?:\s+ETA\s+(?P<eta>[\d:]+))?'
+)
+
+#Progress lines as rendered by format_progress (and by yt-dlp itself)
+PROGRESS_LINE_RE = re.compile(r'^\[download\]\s+(\d+(\.\d+)?|N/A)%')
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4, "P": 1024 ** 5}
+
+
+def progress_args(downloader):
+    """Command line arguments that make the downloader print parseable progress"""
+    if downloader == 'yt-dlp':
+        return ['--newline', '--progress-template', PROGRESS_TEMPLATE]
+    #youtube-dl has no progress templates; parse its regular progress lines
+    return ['--newline']
+
+
+def completion_args(downloader):
+    """Command line arguments that report each finished video as a JSON line"""
+    if downloader == 'yt-dlp':
+        #--print implies --quiet; keep the normal output and progress
+        return ['--print', COMPLETION_TEMPLATE, '--no-quiet']
+    return []
+
+
+def parse_completion_line(line):
+    """Return the finished video's details for a completion line, None otherwise"""
+    line = line.strip()
+    if not line.startswith(COMPLETION_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(COMPLETION_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+
+
+class ProgressInfo:
+    """One progress update for the file currently being downloaded"""
+
+    def __init__(self, status="downloading", downloaded_bytes=None, total_bytes=None,
+                 speed=None, eta=None, filename=None, percent=None,
+                 fragment_index=None, fragment_count=None):
+        self.status = status
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.speed = speed
+        self.eta = eta
+        self.filename = filename
+        self.fragment_index = fragment_index
+        self.fragment_count = fragment_count
+        if percent is None:
+            if status == "finished":
+                percent = 100.0
+            elif total_bytes and downloaded_bytes is not None:
+                percent = min(100.0, downloaded_bytes * 100.0 / total_bytes)
+            elif fragment_count and fragment_index:
+                percent = min(100.0, fragment_index * 100.0 / fragment_count)
+        self.percent = percent
+
+    def __repr__(self):
+        return f"ProgressInfo({self.status}, {self.percent}%, {self.speed} B/s)"
+
+
+def parse_progress_line(line):
+    """Return a ProgressInfo for a progress line, None for any other output"""
+    line = line.strip()
+    if line.startswith(PROGRESS_PREFIX):
+        try:
+            data = json.loads(line[len(PROGRESS_PREFIX):])
+        except json.JSONDecodeError:
+            return None
+        return ProgressInfo(
+            status=data.get("status", "downloading"),
+            downloaded_bytes=data.get("downloaded_bytes"),
+            total_bytes=data.get("total_bytes") or data.get("total_bytes_estimate"),
+            speed=data.get("speed"),
+            eta=data.get("eta"),
+            filename=data.get("filename"),
+            fragment_index=data.get("fragment_index"),
+            fragment_count=data.get("fragment_count"),
+        )
+
+    match = LEGACY_PROGRESS_RE.match(line)
+    if not match:
+        return None
+    percent = float(match.group("percent"))
+    total = parse_size(match.group("total"))
+    return ProgressInfo(
+        status="finished" if percent >= 100 and not match.group("eta") else "downloading",
+        downloaded_bytes=int(total * percent / 100) if total else None,
+        total_bytes=total,
+        speed=parse_size(match.group("speed")),
+        eta=parse_eta(match.group("eta")),
+        percent=percent,
+    )
+
+
+def parse_size(text):
+    """'10.00MiB' -> bytes, None if text is empty"""
+    if not text:
+        return None
+    match = re.match(r'([\d.]+)\s*([KMGTP]?)i?B', text.strip())
+    if not match:
+        return None
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def parse_eta(text):
+    """'01:02:03' -> seconds, None if text is empty"""
+    if not text:
+        return None
+    seconds = 0
+    for part in text.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_bytes(count):
+    """Bytes as a short human readable string, e.g. '10.00MiB'"""
+    if count is None:
+        return "N/A"
+    count = float(count)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(count) < 1024 or unit == "TiB":
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.2f}{unit}"
+        count /= 1024
+
+
+def format_speed(bytes_per_second):
+    """Transfer rate as e.g. '1.20MiB/s'"""
+    if bytes_per_second is None:
+        return "N/A"
+    return format_bytes(bytes_per_second) + "/s"
+
+
+def format_eta(seconds):
+    """Seconds as MM:SS or H:MM:SS"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def format_progress(progress):
+    """Render a ProgressInfo the way yt-dlp prints its progress line"""
+    percent = f"{progress.percent:5.1f}%" if progress.percent is not None else "  N/A%"
+    return (f"[download] {percent} of {format_bytes(progress.total_bytes)}"
+            f" at {format_speed(progress.speed)} ETA {format_eta(progress.eta)}")
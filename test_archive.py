@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the download archive of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_archive.py  (or python test_archive.py)
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from archive import DownloadArchive
+
+
+class DownloadArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.config_dir, ignore_errors=True)
+        self.archive = DownloadArchive(self.config_dir)
+
+    def test_ytdlp_line_format(self):
+        """Each profile file holds "<extractor> <id>" lines, as yt-dlp's --download-archive does"""
+        self.archive.add("video-best", "Youtube", "dQw4w9WgXcQ", "137+140", "/videos/a.mp4")
+        self.archive.add("video-best", "Vimeo", "12345")
+        path = self.archive.archive_file("video-best")
+        self.assertEqual(path, self.config_dir / "archive" / "video-best.txt")
+        self.assertEqual(path.read_text(), "youtube dQw4w9WgXcQ\nvimeo 12345\n")
+
+        records = [json.loads(line) for line in self.archive.details_file.read_text().splitlines()]
+        self.assertEqual([(record["extractor"], record["id"], record["format"]) for record in records],
+                         [("youtube", "dQw4w9WgXcQ", "137+140"), ("vimeo", "12345", None)])
+
+    def test_profiles_are_separate(self):
+        """A video downloaded as video is not skipped for audio"""
+        self.archive.add("video-best", "Youtube", "dQw4w9WgXcQ")
+        self.assertTrue(self.archive.contains("video-best", "youtube", "dQw4w9WgXcQ"))
+        self.assertFalse(self.archive.contains("audio-mp3", "Youtube", "dQw4w9WgXcQ"))
+        self.assertEqual(DownloadArchive.profile_name({"audio_only": True, "audio_format": "mp3"}), "audio-mp3")
+        self.assertEqual(DownloadArchive.profile_name({"format": "720p"}), "video-720p")
+
+    def test_sync_after_external_append(self):
+        """Lines yt-dlp appends itself are picked up, a torn last line only once it is complete"""
+        self.archive.add("video-best", "Youtube", "aaaaaaaaaaa")
+        path = self.archive.archive_file("video-best")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("youtube bbbbbbbbbbb\nyoutube cccc")
+
+        #Adding a known key syncs from the last offset without writing
+        self.archive.add("video-best", "Youtube", "aaaaaaaaaaa")
+        self.assertTrue(self.archive.contains("video-best", "youtube", "bbbbbbbbbbb"))
+        self.assertFalse(self.archive.contains("video-best", "youtube", "cccc"))
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("ccccccc\n")
+        self.archive.add("video-best", "Youtube", "ddddddddddd")
+        self.assertTrue(self.archive.contains("video-best", "youtube", "ccccccccccc"))
+        self.assertEqual(path.read_text().splitlines(),
+                         ["youtube aaaaaaaaaaa", "youtube bbbbbbbbbbb", "youtube ccccccccccc", "youtube ddddddddddd"])
+
+        #A fresh instance reads the same keys back
+        reloaded = DownloadArchive(self.config_dir)
+        for video_id in ("aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc", "ddddddddddd"):
+            self.assertTrue(reloaded.contains("video-best", "youtube", video_id), video_id)
+
+    def test_details(self):
+        self.archive.add("audio-m4a", "Youtube", "dQw4w9WgXcQ", "140", "/music/a.m4a")
+        reloaded = DownloadArchive(self.config_dir)
+        self.assertEqual(reloaded.details("audio-m4a", "youtube", "dQw4w9WgXcQ")["path"], "/music/a.m4a")
+        self.assertIsNone(reloaded.details("audio-mp3", "youtube", "dQw4w9WgXcQ"))
+
+
+if __name__ == "__main__":
+    unittest.main()
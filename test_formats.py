@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the format planning of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_formats.py  (or python test_formats.py)
+"""
+
+import unittest
+
+from formats import pick_audio, legacy_audio_pick, plan_video, codec_matches, REMUX_CODECS
+
+
+def audio(format_id, ext, acodec, abr, filesize=None):
+    return {"format_id": format_id, "ext": ext, "acodec": acodec, "vcodec": "none",
+            "abr": abr, "filesize": filesize}
+
+
+#As YouTube lists them: AAC 140 reports a little under 128k
+AAC_140 = audio("140", "m4a", "mp4a.40.2", 127.9, 3_400_000)
+OPUS_251 = audio("251", "webm", "opus", 135.0, 3_300_000)
+OPUS_250 = audio("250", "webm", "opus", 70.0, 1_700_000)
+OPUS_249 = audio("249", "webm", "opus", 50.0, 1_200_000)
+AAC_139 = audio("139", "m4a", "mp4a.40.5", 48.0, 1_300_000)
+
+
+def info(*formats):
+    return {"duration": 212, "formats": list(formats)}
+
+
+class PickAudioTest(unittest.TestCase):
+
+    def test_m4a_prefers_aac_reported_just_under_128k(self):
+        """AAC 140 counts as a 128k stream, so m4a gets it rather than opus 251"""
+        for convert in (True, False):
+            self.assertEqual(pick_audio(info(AAC_139, AAC_140, OPUS_250, OPUS_251), "m4a", convert), AAC_140)
+
+    def test_webm_without_conversion_stays_webm(self):
+        """Without a conversion stage a webm request never gets an m4a stream"""
+        formats = info(AAC_139, AAC_140, OPUS_249, OPUS_250)
+        self.assertEqual(pick_audio(formats, "webm", convert=False), OPUS_250)
+        self.assertEqual(pick_audio(info(AAC_140, OPUS_251), "webm", convert=False), OPUS_251)
+
+    def test_m4a_without_conversion_stays_m4a(self):
+        formats = info(AAC_139, OPUS_250, OPUS_251)
+        self.assertEqual(pick_audio(formats, "m4a", convert=False), AAC_139)
+        self.assertEqual(pick_audio(formats, "m4a", convert=True), OPUS_251)
+
+    def test_falls_back_to_any_audio(self):
+        """Only when no stream has the requested container"""
+        self.assertEqual(pick_audio(info(OPUS_250, OPUS_251), "m4a", convert=False), OPUS_251)
+
+    def test_best_and_mp3(self):
+        formats = info(AAC_139, AAC_140, OPUS_250, OPUS_251)
+        self.assertEqual(pick_audio(formats, "best"), OPUS_251)
+        #Nothing can be remuxed into MP3: the smallest stream of sufficient bitrate
+        self.assertEqual(pick_audio(formats, "mp3"), OPUS_251)
+        self.assertIsNone(pick_audio(info(), "m4a"))
+
+
+def video(format_id, height, vcodec="avc1.640028", filesize=None, fps=30, tbr=None, acodec="none", ext="mp4"):
+    return {"format_id": format_id, "ext": ext, "vcodec": vcodec, "acodec": acodec, "height": height,
+            "fps": fps, "filesize": filesize, "tbr": tbr}
+
+
+#A YouTube-like list: one progressive format and DASH video in two codecs
+FORMATS = info(
+    video("18", 360, acodec="mp4a.40.2", filesize=9_000_000),
+    video("134", 360, filesize=4_000_000),
+    video("243", 360, vcodec="vp9", filesize=3_000_000, ext="webm"),
+    video("136", 720, filesize=20_000_000),
+    video("247", 720, vcodec="vp9", filesize=15_000_000, ext="webm"),
+    video("137", 1080, filesize=40_000_000),
+    video("299", 1080, filesize=60_000_000, fps=60),
+    video("248", 1080, vcodec="vp9", filesize=30_000_000, ext="webm"),
+    AAC_139, AAC_140, OPUS_250, OPUS_251,
+)
+
+
+class PlanVideoTest(unittest.TestCase):
+
+    def test_choices(self):
+        """Caps take the tallest height within them, cheapest first; "best" the top quality"""
+        cases = [
+            #choice, can_merge, format selector
+            ("best", True, "299+251"),    #1080p60 with the best audio, not the smallest 1080p
+            ("720p", True, "247+140"),    #vp9 is smaller than avc1 at 720p; AAC paired as the audio
+            ("480p", True, "243+140"),    #No 480p: the tallest below the cap
+            ("360p", True, "243+140"),
+            ("144p", True, "243+140"),    #Below every height: the smallest height
+            ("worst", True, "243+140"),
+            #Without ffmpeg nothing can be merged, only progressive formats remain
+            ("best", False, "18"),
+            ("720p", False, "18"),
+            ("worst", False, "18"),
+        ]
+        for choice, can_merge, expected in cases:
+            with self.subTest(choice=choice, can_merge=can_merge):
+                self.assertEqual(plan_video(FORMATS, choice, can_merge).format_id, expected)
+
+    def test_size_ties_and_unknown_sizes(self):
+        """Missing sizes are estimated from bitrate x duration; without either a plan loses to any known size"""
+        formats = info(video("a", 720), video("b", 720, tbr=1000), video("c", 720, tbr=800), AAC_140)
+        plan = plan_video(formats, "720p", True)
+        self.assertEqual(plan.format_id, "c+140")
+        self.assertEqual(plan.size, 800 * 1000 // 8 * 212 + AAC_140["filesize"])
+
+        unknown = plan_video(info(video("a", 720), video("b", 720), AAC_140), "720p", True)
+        self.assertEqual(unknown.format_id, "a+140")
+        self.assertIsNone(unknown.size)
+
+        #Equal sizes keep the first listed format
+        tie = info(video("x", 720, filesize=1000), video("y", 720, filesize=1000), AAC_140)
+        self.assertEqual(plan_video(tie, "720p", True).format_id, "x+140")
+
+    def test_progressive_competes_with_merged(self):
+        """A progressive format wins at its height when it is smaller than video + audio"""
+        formats = info(video("22", 720, acodec="mp4a.40.2", filesize=10_000_000),
+                       video("136", 720, filesize=20_000_000), AAC_140)
+        self.assertEqual(plan_video(formats, "720p", True).format_id, "22")
+        self.assertIsNone(plan_video(info(AAC_140), "best", True))
+        self.assertIsNone(plan_video(info(video("x", None, filesize=1)), "best", False))
+
+    def test_remux_codecs(self):
+        """Audio codecs that go into each container without re-encoding"""
+        cases = [
+            ("mp4a.40.2", "m4a", True), ("aac", "m4a", True), ("opus", "m4a", False),
+            ("opus", "webm", True), ("vorbis", "webm", True), ("mp4a.40.2", "webm", False),
+            ("mp3", "mp3", True), ("opus", "mp3", False), (None, "m4a", False), ("opus", "best", False),
+        ]
+        for codec, audio_format, expected in cases:
+            with self.subTest(codec=codec, audio_format=audio_format):
+                self.assertEqual(codec_matches(codec, audio_format), expected)
+        self.assertEqual(set(REMUX_CODECS), {"mp3", "m4a", "webm"})
+
+
+class LegacyAudioPickTest(unittest.TestCase):
+
+    def test_ext_selectors(self):
+        """bestaudio[ext=X]/bestaudio: the last listed stream of that ext, else the last one"""
+        formats = info(AAC_139, AAC_140, OPUS_250, OPUS_251)
+        self.assertEqual(legacy_audio_pick(formats, "m4a", True), AAC_140)
+        self.assertEqual(legacy_audio_pick(formats, "webm", False), OPUS_251)
+        self.assertEqual(legacy_audio_pick(info(AAC_139, AAC_140), "webm", False), AAC_140)
+
+    def test_mp3_with_ffmpeg_takes_progressive(self):
+        """best[acodec!=mp3]/bestaudio downloaded a whole video"""
+        video = {"format_id": "18", "ext": "mp4", "acodec": "mp4a.40.2", "vcodec": "avc1", "height": 360}
+        self.assertEqual(legacy_audio_pick(info(AAC_140, video), "mp3", True), video)
+        self.assertEqual(legacy_audio_pick(info(AAC_140, video), "mp3", False), AAC_140)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the metadata cache of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_info_cache.py  (or python test_info_cache.py)
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from info_cache import InfoCache
+
+
+def make_info(video_id, padding=0):
+    return {"id": video_id, "extractor_key": "Youtube", "title": f"Video {video_id}",
+            "webpage_url": f"https://www.youtube.com/watch?v={video_id}", "description": "x" * padding}
+
+
+def url(video_id):
+    return f"https://youtu.be/{video_id}"
+
+
+class InfoCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.config_dir, ignore_errors=True)
+        #A controllable clock instead of sleeping past the TTL
+        self.now = 1_000_000.0
+        patcher = mock.patch("info_cache.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hit_and_aliases(self):
+        cache = InfoCache(self.config_dir)
+        key = cache.put(url("aaaaaaaaaaa"), make_info("aaaaaaaaaaa"))
+        self.assertEqual(key, "youtube-aaaaaaaaaaa")
+        self.assertEqual(cache.get(url("aaaaaaaaaaa"))["title"], "Video aaaaaaaaaaa")
+        self.assertEqual(cache.get("https://www.youtube.com/watch?v=aaaaaaaaaaa")["id"], "aaaaaaaaaaa")
+        self.assertEqual(cache.video_key(url("aaaaaaaaaaa")), ("Youtube", "aaaaaaaaaaa"))
+        self.assertIsNone(cache.get(url("bbbbbbbbbbb")))
+        self.assertIsNone(cache.put(url("list"), {"id": "list", "extractor_key": "Youtube", "_type": "playlist"}))
+
+        #A fresh instance reads the index back
+        self.assertIsNotNone(InfoCache(self.config_dir).lookup(url("aaaaaaaaaaa")))
+
+    def test_ttl_expiry(self):
+        """An entry older than ttl is a miss and its file is removed"""
+        cache = InfoCache(self.config_dir, ttl=60)
+        cache.put(url("aaaaaaaaaaa"), make_info("aaaaaaaaaaa"))
+        path = cache.entry_path("youtube-aaaaaaaaaaa")
+
+        self.now += 60
+        self.assertIsNotNone(cache.get(url("aaaaaaaaaaa")))
+        self.now += 1
+        self.assertIsNone(cache.get(url("aaaaaaaaaaa")))
+        self.assertFalse(path.exists())
+        self.assertIsNone(cache.video_key("https://www.youtube.com/watch?v=aaaaaaaaaaa"))
+        self.assertIsNone(InfoCache(self.config_dir, ttl=60).lookup(url("aaaaaaaaaaa")))
+
+    def test_expired_entries_dropped_on_put(self):
+        cache = InfoCache(self.config_dir, ttl=60)
+        cache.put(url("aaaaaaaaaaa"), make_info("aaaaaaaaaaa"))
+        self.now += 120
+        cache.put(url("bbbbbbbbbbb"), make_info("bbbbbbbbbbb"))
+        self.assertFalse(cache.entry_path("youtube-aaaaaaaaaaa").exists())
+        self.assertEqual(sorted(p.name for p in cache.cache_dir.glob("*.info.json")),
+                         ["youtube-bbbbbbbbbbb.info.json"])
+
+    def test_lru_eviction_by_count(self):
+        """Over max_entries the least recently used entry goes, not the oldest stored"""
+        cache = InfoCache(self.config_dir, max_entries=2)
+        cache.put(url("aaaaaaaaaaa"), make_info("aaaaaaaaaaa"))
+        self.now += 1
+        cache.put(url("bbbbbbbbbbb"), make_info("bbbbbbbbbbb"))
+        self.now += 1
+        self.assertIsNotNone(cache.get(url("aaaaaaaaaaa")))  #a is now more recently used than b
+        self.now += 1
+        cache.put(url("ccccccccccc"), make_info("ccccccccccc"))
+
+        self.assertIsNotNone(cache.get(url("aaaaaaaaaaa")))
+        self.assertIsNone(cache.get(url("bbbbbbbbbbb")))
+        self.assertIsNotNone(cache.get(url("ccccccccccc")))
+        self.assertFalse(cache.entry_path("youtube-bbbbbbbbbbb").exists())
+
+    def test_lru_eviction_by_size(self):
+        cache = InfoCache(self.config_dir, max_bytes=25_000)
+        for video_id in ("aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"):
+            self.now += 1
+            cache.put(url(video_id), make_info(video_id, padding=10_000))
+        self.assertIsNone(cache.get(url("aaaaaaaaaaa")))
+        self.assertIsNotNone(cache.get(url("bbbbbbbbbbb")))
+        self.assertIsNotNone(cache.get(url("ccccccccccc")))
+
+    def test_invalidate(self):
+        cache = InfoCache(self.config_dir)
+        cache.put(url("aaaaaaaaaaa"), make_info("aaaaaaaaaaa"))
+        cache.invalidate("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+        self.assertIsNone(cache.get(url("aaaaaaaaaaa")))
+        self.assertFalse(cache.entry_path("youtube-aaaaaaaaaaa").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the job journal of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_journal.py  (or python test_journal.py)
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from download_queue import DownloadJob
+from journal import JobJournal
+
+
+def make_job(video_id, state=DownloadJob.QUEUED):
+    job = DownloadJob(f"https://youtu.be/{video_id}", {"format": "720p"})
+    job.title = f"Video {video_id}"
+    job.state = state
+    return job
+
+
+class JobJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.config_dir, ignore_errors=True)
+
+    def lines(self):
+        return self.config_dir.joinpath("jobs.jsonl").read_text().splitlines()
+
+    def test_close_writes_queued_lines(self):
+        """record() only queues; close() waits for the writer thread, and later changes are dropped"""
+        journal = JobJournal(self.config_dir)
+        jobs = [make_job(f"{index:011d}") for index in range(50)]
+        for job in jobs:
+            journal.record(job)
+        journal.record(jobs[0])  #Unchanged state, not written again
+        journal.close()
+        self.assertEqual(len(self.lines()), 50)
+
+        jobs[0].state = DownloadJob.DONE
+        journal.record(jobs[0])
+        self.assertEqual(len(self.lines()), 50)
+
+    def test_take_unfinished_compacts(self):
+        """Finished jobs are dropped, unfinished ones come back with their details, once each"""
+        journal = JobJournal(self.config_dir)
+        done, running, queued = make_job("aaaaaaaaaaa"), make_job("bbbbbbbbbbb"), make_job("ccccccccccc")
+        for job in (done, running, queued):
+            journal.record(job)
+        running.state = DownloadJob.RUNNING
+        journal.record(running)
+        done.state = DownloadJob.DONE
+        journal.record(done)
+        journal.close()
+        self.assertEqual(len(self.lines()), 5)
+
+        jobs = JobJournal(self.config_dir).take_unfinished()
+        self.assertEqual([job.id for job in jobs], [running.id, queued.id])
+        self.assertEqual([job.state for job in jobs], [DownloadJob.QUEUED] * 2)
+        self.assertEqual(jobs[0].title, running.title)
+        self.assertEqual(jobs[0].options, {"format": "720p"})
+        self.assertEqual([json.loads(line)["id"] for line in self.lines()], [running.id, queued.id])
+
+    def test_paused_jobs_stay_paused(self):
+        journal = JobJournal(self.config_dir)
+        paused = make_job("aaaaaaaaaaa", DownloadJob.PAUSED)
+        journal.record(paused)
+        journal.close()
+
+        [job] = JobJournal(self.config_dir).take_unfinished()
+        self.assertEqual(job.state, DownloadJob.PAUSED)
+        self.assertEqual(job.result, "Paused")
+        self.assertEqual(json.loads(self.lines()[0])["state"], DownloadJob.PAUSED)
+
+    def test_torn_last_line(self):
+        """A line cut short by a crash is skipped; the entries before it count"""
+        journal = JobJournal(self.config_dir)
+        job = make_job("aaaaaaaaaaa")
+        journal.record(job)
+        journal.close()
+        with open(self.config_dir / "jobs.jsonl", 'a', encoding='utf-8') as f:
+            f.write('{"id": "' + job.id + '", "state": "comp')
+
+        journal = JobJournal(self.config_dir)
+        self.assertEqual([entry["state"] for entry in journal.read()], [DownloadJob.QUEUED])
+        [resumed] = journal.take_unfinished()
+        self.assertEqual(resumed.url, job.url)
+        self.assertEqual(len(self.lines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the progress parsing of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_progress.py  (or python test_progress.py)
+"""
+
+import json
+import unittest
+
+from progress import (PROGRESS_PREFIX, progress_args, parse_progress_line, parse_size, parse_eta,
+                      format_bytes, format_eta, format_progress)
+
+
+class ProgressTest(unittest.TestCase):
+
+    def test_template_line(self):
+        """yt-dlp's JSON progress lines give bytes, speed, ETA and a computed percentage"""
+        line = PROGRESS_PREFIX + json.dumps({"status": "downloading", "downloaded_bytes": 256,
+                                             "total_bytes": 1024, "speed": 100.0, "eta": 8,
+                                             "filename": "clip.mp4"})
+        progress = parse_progress_line(line + "\n")
+        self.assertEqual(progress.percent, 25.0)
+        self.assertEqual(progress.speed, 100.0)
+        self.assertEqual(progress.eta, 8)
+        self.assertEqual(progress.filename, "clip.mp4")
+
+    def test_template_line_with_estimate_and_fragments(self):
+        """Without a total size the estimate is used, without either the fragment count"""
+        estimated = parse_progress_line(PROGRESS_PREFIX + json.dumps(
+            {"downloaded_bytes": 50, "total_bytes": None, "total_bytes_estimate": 200}))
+        self.assertEqual(estimated.percent, 25.0)
+        fragments = parse_progress_line(PROGRESS_PREFIX + json.dumps(
+            {"downloaded_bytes": 50, "fragment_index": 3, "fragment_count": 4}))
+        self.assertEqual(fragments.percent, 75.0)
+        finished = parse_progress_line(PROGRESS_PREFIX + json.dumps({"status": "finished"}))
+        self.assertEqual(finished.percent, 100.0)
+
+    def test_legacy_line(self):
+        """youtube-dl's classic progress line is parsed as a fallback"""
+        progress = parse_progress_line("[download]  42.0% of ~10.00MiB at 1.50MiB/s ETA 01:05")
+        self.assertEqual(progress.percent, 42.0)
+        self.assertEqual(progress.total_bytes, 10 * 1024 ** 2)
+        self.assertEqual(progress.speed, int(1.5 * 1024 ** 2))
+        self.assertEqual(progress.eta, 65)
+        self.assertEqual(progress.status, "downloading")
+
+    def test_other_output(self):
+        """Other output lines and broken JSON are not progress"""
+        self.assertIsNone(parse_progress_line("[youtube] abc: Downloading webpage"))
+        self.assertIsNone(parse_progress_line(PROGRESS_PREFIX + "{not json"))
+
+    def test_args(self):
+        self.assertIn('--progress-template', progress_args('yt-dlp'))
+        self.assertEqual(progress_args('youtube-dl'), ['--newline'])
+
+    def test_formatting(self):
+        self.assertEqual(parse_size("1.5KiB"), 1536)
+        self.assertIsNone(parse_size(""))
+        self.assertEqual(parse_eta("1:02:03"), 3723)
+        self.assertEqual(format_bytes(1536), "1.50KiB")
+        self.assertEqual(format_eta(3723), "1:02:03")
+        self.assertEqual(format_eta(65), "01:05")
+        line = format_progress(parse_progress_line("[download]  50.0% of 2.00KiB at 1.00KiB/s ETA 00:01"))
+        self.assertEqual(line, "[download]  50.0% of 2.00KiB at 1.00KiB/s ETA 00:01")
+
+
+if __name__ == "__main__":
+    unittest.main()
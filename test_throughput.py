@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput tests for YouTube Downloader GUI
+Downloads generated media from a local HTTP server (direct files, HLS and DASH)
+through the app's real command path and yt-dlp's generic extractor
+
+Run with: python -m pytest -q test_throughput.py  (or python test_throughput.py)
+The download tests need yt-dlp on PATH; no network access is used.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from archive import DownloadArchive
+from bandwidth import BandwidthLimiter, scheduled_rate
+from disk_space import DiskSpaceGuard, job_scratch_dir, in_scratch, move_all_into_place
+from download_queue import DownloadQueue, DownloadJob
+from info_cache import InfoCache
+from job_runner import JobRunner
+from process_engine import shared_engine
+from toolchain import Toolchain
+from worker_pool import WorkerPool
+
+
+class MediaServer:
+    """Local HTTP server for generated media with per-request latency and per-connection bandwidth
+
+    Files are registered with add_file/add_hls/add_dash and served with
+    Range support. bytes_served counts the body bytes sent per path and
+    ranges lists the (path, first byte) of every Range request.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.files = {}
+        self.bytes_served = {}
+        self.ranges = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                server.handle(self, head=True)
+
+            def do_GET(self):
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return f"{self.base_url}/{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def add(self, path, data, content_type):
+        self.files[path] = (data, content_type)
+
+    def add_file(self, path, size):
+        """A direct media file of size pseudo-random bytes"""
+        data = (hashlib.sha256(path.encode()).digest() * (size // 32 + 1))[:size]
+        self.add(path, data, "video/mp4")
+        return data
+
+    def add_hls(self, name, segments, segment_size):
+        """An HLS media playlist name/index.m3u8 with the given segments"""
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(segments):
+            self.add_file(f"{name}/seg{i}.ts", segment_size)
+            lines += ["#EXTINF:2.0,", f"seg{i}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        self.add(f"{name}/index.m3u8", ("\n".join(lines) + "\n").encode(), "application/vnd.apple.mpegurl")
+        return self.url(f"{name}/index.m3u8")
+
+    def add_dash(self, name, segments, segment_size):
+        """A DASH manifest name/manifest.mpd with one muxed representation"""
+        self.add_file(f"{name}/init.mp4", 1024)
+        urls = []
+        for i in range(segments):
+            self.add_file(f"{name}/seg{i}.m4s", segment_size)
+            urls.append(f'<SegmentURL media="seg{i}.m4s"/>')
+        mpd = f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" mediaPresentationDuration="PT{segments * 2}S"
+     minBufferTime="PT2S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4">
+      <Representation id="main" bandwidth="800000" width="640" height="360" codecs="avc1.4d401e,mp4a.40.2">
+        <SegmentList timescale="1" duration="2">
+          <Initialization sourceURL="init.mp4"/>
+          {''.join(urls)}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+        self.add(f"{name}/manifest.mpd", mpd.encode(), "application/dash+xml")
+        return self.url(f"{name}/manifest.mpd")
+
+    def handle(self, request, head=False):
+        path = request.path.lstrip('/').split('?')[0]
+        if path not in self.files:
+            request.send_error(404)
+            return
+        data, content_type = self.files[path]
+        start, end = 0, len(data) - 1
+        range_header = request.headers.get('Range', '')
+        if range_header.startswith('bytes='):
+            first, _, last = range_header[6:].partition('-')
+            start = int(first or 0)
+            end = min(int(last), end) if last else end
+            with self._lock:
+                self.ranges.append((path, start))
+            request.send_response(206)
+            request.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            request.send_response(200)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Accept-Ranges', 'bytes')
+        request.send_header('Content-Length', str(end - start + 1))
+        request.end_headers()
+        if head:
+            return
+
+        time.sleep(self.latency)
+        body = data[start:end + 1]
+        chunk = 16 * 1024
+        started = time.perf_counter()
+        try:
+            for offset in range(0, len(body), chunk):
+                piece = body[offset:offset + chunk]
+                request.wfile.write(piece)
+                with self._lock:
+                    self.bytes_served[path] = self.bytes_served.get(path, 0) + len(piece)
+                if self.bandwidth:
+                    #Hold this connection to the configured rate
+                    ahead = (offset + len(piece)) / self.bandwidth - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def make_queue(download_dir, workers=1, worker_pool=None, disk_space=None, **options):
+    """DownloadQueue + JobRunner downloading into download_dir; returns (queue, job options, log lines)"""
+    config_dir = Path(download_dir) / ".config"
+    lines = []
+    runner = JobRunner(Toolchain(config_dir), InfoCache(config_dir), DownloadArchive(config_dir),
+                       log=lambda message, key=None: lines.append(message), worker_pool=worker_pool,
+                       disk_space=disk_space)
+    job_options = {
+        "download_path": str(download_dir),
+        "format": "best",
+        "audio_only": False,
+        "audio_format": "best",
+        "concurrent_fragments": "1",
+        "http_chunk_size": "off",
+        "external_downloader": "off",
+    }
+    job_options.update(options)
+    return DownloadQueue(runner, max_workers=workers, disk_space=disk_space), job_options, lines
+
+
+def wait_idle(queue):
+    while not queue.is_idle():
+        time.sleep(0.05)
+
+
+def run_batch(urls, download_dir, workers=1, worker_pool=None, **options):
+    """Download urls through DownloadQueue + JobRunner; returns (jobs, seconds, log lines)"""
+    queue, job_options, lines = make_queue(download_dir, workers, worker_pool, **options)
+    started = time.perf_counter()
+    jobs = [queue.submit(url, job_options) for url in urls]
+    wait_idle(queue)
+    return jobs, time.perf_counter() - started, lines
+
+
+@unittest.skipUnless(shutil.which('yt-dlp'), "yt-dlp is not installed")
+class ThroughputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def assertAllDone(self, jobs, lines):
+        failed = [job for job in jobs if job.state != DownloadJob.DONE]
+        self.assertFalse(failed, "\n".join(lines[-20:]))
+
+    def test_concurrent_jobs_scale(self):
+        """Aggregate throughput grows with the number of workers when each connection is capped"""
+        self.server = MediaServer(bandwidth=128 * 1024)
+        size = 512 * 1024
+        throughput = {}
+        for workers in (1, 2, 4):
+            urls = []
+            for i in range(4):
+                self.server.add_file(f"w{workers}/clip{i}.mp4", size)
+                urls.append(self.server.url(f"w{workers}/clip{i}.mp4"))
+            jobs, elapsed, lines = run_batch(urls, self.tmp / f"w{workers}", workers=workers)
+            self.assertAllDone(jobs, lines)
+            throughput[workers] = 4 * size / elapsed
+
+        #yt-dlp start-up and extraction are serial CPU work on small runners, so
+        #the curve flattens well before linear
+        self.assertGreater(throughput[2], throughput[1] * 1.3, throughput)
+        self.assertGreater(throughput[4], throughput[2] * 1.15, throughput)
+        self.assertGreater(throughput[4], throughput[1] * 1.8, throughput)
+        #Never more than the per-connection caps allow
+        self.assertLess(throughput[4], 4 * 128 * 1024 * 1.1, throughput)
+
+    def test_hls_fragment_parallelism(self):
+        """Concurrent fragments hide per-request latency on HLS"""
+        self.server = MediaServer(latency=0.15)
+        timings = {}
+        for fragments in ("1", "8"):
+            url = self.server.add_hls(f"hls{fragments}", segments=30, segment_size=32 * 1024)
+            jobs, elapsed, lines = run_batch([url], self.tmp / f"hls{fragments}",
+                                             concurrent_fragments=fragments)
+            self.assertAllDone(jobs, lines)
+            self.assertEqual(os.path.getsize(jobs[0].output_path), 30 * 32 * 1024)
+            timings[fragments] = elapsed
+
+        self.assertLess(timings["8"] * 2, timings["1"], timings)
+
+    def test_dash_download(self):
+        """DASH manifests are fetched fragment by fragment into one file"""
+        self.server = MediaServer(latency=0.02)
+        url = self.server.add_dash("dash", segments=20, segment_size=32 * 1024)
+        jobs, elapsed, lines = run_batch([url], self.tmp / "dash", concurrent_fragments="4")
+        self.assertAllDone(jobs, lines)
+        self.assertEqual(os.path.getsize(jobs[0].output_path), 1024 + 20 * 32 * 1024)
+
+    def test_resume_from_partial_file(self):
+        """A .part file left by an interrupted run is continued, not downloaded again"""
+        self.server = MediaServer()
+        size = 1024 * 1024
+        data = self.server.add_file("resume.mp4", size)
+        download_dir = self.tmp / "resume"
+        download_dir.mkdir()
+        (download_dir / "resume.mp4.part").write_bytes(data[:size // 2])
+
+        jobs, elapsed, lines = run_batch([self.server.url("resume.mp4")], download_dir)
+        self.assertAllDone(jobs, lines)
+        self.assertEqual(Path(jobs[0].output_path).read_bytes(), data)
+        #Extraction may read the start of the file; the download itself continues at the .part size
+        self.assertIn(("resume.mp4", size // 2), self.server.ranges)
+        self.assertNotIn(("resume.mp4", 0), self.server.ranges)
+
+    @unittest.skipUnless(WorkerPool.supported(), "yt_dlp is not importable")
+    def test_worker_pool_cuts_per_job_overhead(self):
+        """Warm workers finish a batch of short clips faster than a yt-dlp process per clip"""
+        self.server = MediaServer()
+        timings = {}
+        for name in ("processes", "workers"):
+            pool = None
+            if name == "workers":
+                pool = WorkerPool()
+                shared_engine().run(pool.warm_up(2))
+            urls = []
+            for i in range(6):
+                self.server.add_file(f"{name}/short{i}.mp4", 64 * 1024)
+                urls.append(self.server.url(f"{name}/short{i}.mp4"))
+            jobs, elapsed, lines = run_batch(urls, self.tmp / name, workers=2, worker_pool=pool)
+            self.assertAllDone(jobs, lines)
+            for job in jobs:
+                self.assertEqual(os.path.getsize(job.output_path), 64 * 1024)
+            timings[name] = elapsed
+
+        self.assertEqual(pool.jobs_run, 6)
+        self.assertLessEqual(pool.workers_started, 2)
+        self.assertLess(timings["workers"] * 1.5, timings["processes"], timings)
+
+    @unittest.skipUnless(WorkerPool.supported(), "yt_dlp is not importable")
+    def test_worker_killed_by_cancel_is_replaced(self):
+        """Cancelling a job kills its worker; the next job gets a new one"""
+        self.server = MediaServer(bandwidth=128 * 1024)
+        self.server.add_file("killed.mp4", 2 * 1024 * 1024)
+        self.server.add_file("after.mp4", 64 * 1024)
+        pool = WorkerPool()
+        queue, options, lines = make_queue(self.tmp / "killed", worker_pool=pool)
+        job = queue.submit(self.server.url("killed.mp4"), options)
+        self.wait_for_bytes(job, 128 * 1024)
+        self.assertTrue(queue.cancel(job))
+
+        after = queue.submit(self.server.url("after.mp4"), options)
+        wait_idle(queue)
+        self.assertAllDone([after], lines)
+        self.assertEqual(pool.workers_started, 2)
+
+    def test_failing_callback_retires_the_worker(self):
+        """A worker whose output callback raised is killed, not kept busy; the next job runs normally"""
+        self.server = MediaServer(bandwidth=128 * 1024)
+        self.server.add_file("callback.mp4", 1024 * 1024)
+        pool = WorkerPool()
+        engine = shared_engine()
+        args = ['--newline', '-o', str(self.tmp / "callback" / "%(title)s.%(ext)s"), self.server.url("callback.mp4")]
+        started = []
+
+        def on_line(line):
+            raise RuntimeError("callback failed")
+
+        with self.assertRaises(RuntimeError):
+            engine.run(pool.run(args, on_line, started.append))
+        engine.run(asyncio.wait_for(started[0].wait(), 10))
+        self.assertEqual(pool._idle, [])
+
+        lines = []
+        self.assertEqual(engine.run(pool.run(args, lines.append)), 0)
+        self.assertEqual(pool.workers_started, 2)
+
+    def wait_for_bytes(self, job, count, timeout=30):
+        deadline = time.time() + timeout
+        while job.downloaded_bytes < count and time.time() < deadline:
+            time.sleep(0.05)
+
+    def test_pause_and_resume(self):
+        """Pausing frees the worker slot at once and resuming continues the .part file"""
+        self.server = MediaServer(bandwidth=256 * 1024)
+        size = 2 * 1024 * 1024
+        data = self.server.add_file("paused.mp4", size)
+        self.server.add_file("next.mp4", 64 * 1024)
+        download_dir = self.tmp / "pause"
+        queue, options, lines = make_queue(download_dir)
+        job = queue.submit(self.server.url("paused.mp4"), options)
+        waiting = queue.submit(self.server.url("next.mp4"), options)
+
+        self.wait_for_bytes(job, 256 * 1024)
+        self.assertTrue(queue.pause(job))
+        self.assertEqual(job.state, DownloadJob.PAUSED)
+        self.assertEqual(waiting.state, DownloadJob.RUNNING)
+        wait_idle(queue)
+        self.assertEqual(waiting.state, DownloadJob.DONE)
+        self.assertTrue((download_dir / "paused.mp4.part").exists())
+
+        self.assertTrue(queue.resume(job))
+        wait_idle(queue)
+        self.assertAllDone([job], lines)
+        self.assertEqual(Path(job.output_path).read_bytes(), data)
+        self.assertTrue(any(path == "paused.mp4" and start > 0 for path, start in self.server.ranges))
+
+    def test_cancel_removes_partial_files(self):
+        """Cancelling kills the downloader and deletes its .part and fragment files"""
+        self.server = MediaServer(bandwidth=128 * 1024)
+        self.server.add_file("cancelled.mp4", 2 * 1024 * 1024)
+        hls = self.server.add_hls("cancelled_hls", segments=40, segment_size=64 * 1024)
+        download_dir = self.tmp / "cancel"
+        queue, options, lines = make_queue(download_dir, workers=2, concurrent_fragments="4")
+        jobs = [queue.submit(self.server.url("cancelled.mp4"), options), queue.submit(hls, options)]
+
+        for job in jobs:
+            self.wait_for_bytes(job, 128 * 1024)
+        for job in jobs:
+            self.assertTrue(queue.cancel(job))
+        self.assertTrue(queue.is_idle())
+        deadline = time.time() + 10
+        while time.time() < deadline and any(p.name != ".config" for p in download_dir.iterdir()):
+            time.sleep(0.1)
+        self.assertEqual([p.name for p in download_dir.iterdir() if p.name != ".config"], [])
+        self.assertEqual([job.state for job in jobs], [DownloadJob.CANCELLED] * 2)
+
+    def test_scratch_dir_moves_finished_files(self):
+        """Downloads land in the scratch directory and only complete files are moved to the download path"""
+        self.server = MediaServer()
+        data = self.server.add_file("scratch.mp4", 256 * 1024)
+        url = self.server.add_hls("scratch_hls", segments=10, segment_size=16 * 1024)
+        #tmpfs is usually another volume, which makes the move a copy
+        scratch = Path(tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None))
+        self.addCleanup(shutil.rmtree, scratch, ignore_errors=True)
+        download_dir = self.tmp / "moved"
+
+        jobs, elapsed, lines = run_batch([self.server.url("scratch.mp4"), url], download_dir,
+                                         scratch_dir=str(scratch))
+        self.assertAllDone(jobs, lines)
+        for job in jobs:
+            self.assertEqual(Path(job.output_path).parent, download_dir)
+        self.assertEqual(Path(jobs[0].output_path).read_bytes(), data)
+        self.assertEqual(list(scratch.iterdir()), [])
+        self.assertEqual(sorted(p.name for p in download_dir.iterdir() if p.name != ".config"),
+                         sorted(Path(job.output_path).name for job in jobs))
+
+    def test_jobs_wait_for_disk_space(self):
+        """A job too large for the free space does not start, and the jobs behind it go ahead"""
+        self.server = MediaServer()
+        self.server.add_file("small.mp4", 64 * 1024)
+        self.server.add_file("huge.mp4", 64 * 1024)
+        download_dir = self.tmp / "space"
+        download_dir.mkdir()
+        guard = DiskSpaceGuard(margin=0)
+        queue, options, lines = make_queue(download_dir, disk_space=guard)
+
+        huge = DownloadJob(self.server.url("huge.mp4"), options)
+        huge.estimated_size = shutil.disk_usage(download_dir).free * 2
+        queue.add(huge)
+        small = queue.submit(self.server.url("small.mp4"), options)
+        wait_idle(queue)
+        self.assertAllDone([small], lines)
+        self.assertEqual(huge.state, DownloadJob.PAUSED)
+        self.assertIn("Not enough disk space", huge.result)
+        self.assertFalse((download_dir / "huge.mp4").exists())
+
+        #Once the space is there, resuming downloads it
+        huge.estimated_size = 64 * 1024
+        self.assertTrue(queue.resume(huge))
+        wait_idle(queue)
+        self.assertAllDone([huge], lines)
+
+
+class BandwidthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MediaServer()
+        self.addCleanup(self.server.close)
+
+    def fetch_all(self, limiter, paths):
+        """Download paths concurrently through the limiter's proxy; returns (bytes, seconds)"""
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": limiter.proxy_url()}))
+        sizes = []
+
+        def fetch(path):
+            with opener.open(self.server.url(path), timeout=30) as response:
+                sizes.append(len(response.read()))
+
+        threads = [threading.Thread(target=fetch, args=(path,)) for path in paths]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(sizes), time.perf_counter() - started
+
+    def test_concurrent_downloads_share_the_cap(self):
+        """Four downloads through the proxy together stay at (not over) the limit"""
+        cap = 1024 * 1024
+        for index in range(4):
+            self.server.add_file(f"capped{index}.bin", 384 * 1024)
+        limiter = BandwidthLimiter("1M")
+        self.addCleanup(limiter.stop)
+        total, elapsed = self.fetch_all(limiter, [f"capped{index}.bin" for index in range(4)])
+        self.assertEqual(total, 4 * 384 * 1024)
+        rate = total / elapsed
+        self.assertLessEqual(rate, cap * 1.05)
+        self.assertGreaterEqual(rate, cap * 0.75)
+
+    def test_limit_set_later_applies(self):
+        """With follow_changes jobs use the proxy while unlimited, and a later limit reaches them"""
+        self.assertIsNone(BandwidthLimiter("off").proxy_url())
+        limiter = BandwidthLimiter("off", follow_changes=True)
+        self.addCleanup(limiter.stop)
+        self.assertIsNotNone(limiter.proxy_url())
+        self.server.add_file("later.bin", 256 * 1024)
+        limiter.configure("256K")
+        total, elapsed = self.fetch_all(limiter, ["later.bin"])
+        self.assertEqual(total, 256 * 1024)
+        self.assertGreaterEqual(elapsed, 0.75)
+
+    def test_scheduled_rate_wraps_midnight(self):
+        schedule = [{"start": "22:00", "end": "06:00", "rate": "2M"},
+                    {"start": "09:00", "end": "17:00", "rate": "500K"}]
+        cases = [("23:30", 2 * 1024 ** 2), ("00:00", 2 * 1024 ** 2), ("05:59", 2 * 1024 ** 2),
+                 ("06:00", 1024 ** 2), ("21:59", 1024 ** 2), ("22:00", 2 * 1024 ** 2),
+                 ("12:00", 500 * 1024), ("17:00", 1024 ** 2)]
+        for clock, expected in cases:
+            hour, minute = map(int, clock.split(':'))
+            now = datetime(2024, 1, 1, hour, minute)
+            self.assertEqual(scheduled_rate("1M", schedule, now), expected, clock)
+        self.assertIsNone(scheduled_rate("off", schedule, datetime(2024, 1, 1, 7, 0)))
+        #An "off" entry lifts the limit inside its window
+        self.assertIsNone(scheduled_rate("1M", [{"start": "23:00", "end": "01:00", "rate": "off"}],
+                                         datetime(2024, 1, 1, 0, 30)))
+
+
+class DuplicateTest(unittest.TestCase):
+
+    def test_add_returns_the_unfinished_job(self):
+        """A second job for a video that is still in the queue is not queued; the first one is returned"""
+        release = threading.Event()
+        queue = DownloadQueue(lambda job: release.wait(5), max_workers=1)
+        first = queue.submit("https://youtu.be/dQw4w9WgXcQ")
+        self.assertIs(queue.submit("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5"), first)
+        self.assertEqual(queue.jobs(), [first])
+        release.set()
+        wait_idle(queue)
+        self.assertIsNot(queue.submit("https://youtu.be/dQw4w9WgXcQ"), first)
+        wait_idle(queue)
+
+
+class ScratchTest(unittest.TestCase):
+
+    def test_move_all_leaves_partial_files(self):
+        """Without a reported path every finished file of the job's scratch directory is moved"""
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        options = {"download_path": str(tmp / "done"), "scratch_dir": str(tmp / "scratch")}
+        scratch = Path(job_scratch_dir(options, "https://example.com/a.mp4"))
+        scratch.mkdir(parents=True)
+        for name in ("a.mp4", "a.en.vtt", "b.mp4.part", "b.mp4.ytdl", "b.mp4.part-Frag3"):
+            (scratch / name).write_bytes(b"x")
+        self.assertTrue(in_scratch(str(scratch / "a.mp4"), options))
+
+        moved = move_all_into_place(str(scratch), options["download_path"])
+        self.assertEqual(sorted(Path(path).name for path in moved), ["a.en.vtt", "a.mp4"])
+        self.assertEqual(sorted(p.name for p in scratch.iterdir()), ["b.mp4.part", "b.mp4.part-Frag3", "b.mp4.ytdl"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the toolchain discovery of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_toolchain.py  (or python test_toolchain.py)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toolchain import Toolchain
+
+
+@unittest.skipIf(sys.platform == "win32", "fake binaries are shell scripts")
+class ToolchainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.config_dir, ignore_errors=True)
+        self.bin_dir = self.config_dir / "bin"
+        self.bin_dir.mkdir()
+        self.make_binary("yt-dlp", "2024.01.01")
+        self.make_binary("ffmpeg", "ffmpeg version 6.0")
+
+        #Only the fake binaries are visible
+        patcher = mock.patch.dict(os.environ, {"PATH": str(self.bin_dir)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        #Count probes while still running the fake binaries
+        patcher = mock.patch.object(Toolchain, "probe_version", wraps=Toolchain.probe_version)
+        self.probe = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_binary(self, name, version, mtime=None):
+        path = self.bin_dir / name
+        path.write_text(f"#!/bin/sh\necho '{version}'\n")
+        path.chmod(0o755)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def probed(self):
+        return sorted(Path(call.args[0]).name for call in self.probe.call_args_list)
+
+    def test_first_resolve_probes_and_caches(self):
+        toolchain = Toolchain(self.config_dir)
+        self.assertEqual(toolchain.version("yt-dlp"), "2024.01.01")
+        self.assertEqual(toolchain.path("ffmpeg"), str(self.bin_dir / "ffmpeg"))
+        self.assertEqual(toolchain.downloader(), "yt-dlp")
+        self.assertFalse(toolchain.has("youtube-dl"))
+        self.assertEqual(toolchain.external_downloaders(), [])
+        self.assertEqual(self.probed(), ["ffmpeg", "yt-dlp"])
+        self.assertTrue(toolchain.cache_file.exists())
+
+    def test_fingerprint_reused(self):
+        """A new instance answers from the cache and re-validates with stat calls only"""
+        Toolchain(self.config_dir).resolve()
+        self.probe.reset_mock()
+
+        toolchain = Toolchain(self.config_dir)
+        self.assertEqual(toolchain.version("yt-dlp"), "2024.01.01")
+        self.assertFalse(toolchain.resolve())
+        self.assertEqual(self.probed(), [])
+
+    def test_changed_binary_is_probed_again(self):
+        """Only the binary whose mtime changed is probed"""
+        Toolchain(self.config_dir).resolve()
+        self.probe.reset_mock()
+
+        stat = (self.bin_dir / "yt-dlp").stat()
+        self.make_binary("yt-dlp", "2024.02.02", mtime=stat.st_mtime + 10)
+        toolchain = Toolchain(self.config_dir)
+        self.assertTrue(toolchain.resolve())
+        self.assertEqual(self.probed(), ["yt-dlp"])
+        self.assertEqual(toolchain.version("yt-dlp"), "2024.02.02")
+        self.assertEqual(Toolchain(self.config_dir).version("yt-dlp"), "2024.02.02")
+
+    def test_added_and_removed_binaries(self):
+        toolchain = Toolchain(self.config_dir)
+        toolchain.resolve()
+        self.probe.reset_mock()
+
+        self.make_binary("aria2c", "aria2 version 1.37.0")
+        (self.bin_dir / "ffmpeg").unlink()
+        self.assertTrue(toolchain.resolve())
+        self.assertEqual(self.probed(), ["aria2c"])
+        self.assertEqual(toolchain.external_downloaders(), ["aria2c"])
+        self.assertFalse(toolchain.has("ffmpeg"))
+
+    def test_force_probes_everything(self):
+        toolchain = Toolchain(self.config_dir)
+        toolchain.resolve()
+        self.probe.reset_mock()
+        self.assertFalse(toolchain.resolve(force=True))
+        self.assertEqual(self.probed(), ["ffmpeg", "yt-dlp"])
+
+    def test_broken_binary_is_unavailable(self):
+        path = self.bin_dir / "youtube-dl"
+        path.write_text("#!/bin/sh\nexit 1\n")
+        path.chmod(0o755)
+        toolchain = Toolchain(self.config_dir)
+        self.assertFalse(toolchain.has("youtube-dl"))
+        self.assertIsNone(toolchain.version("youtube-dl"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the URL helpers of YouTube Downloader GUI
+
+Run with: python -m pytest -q test_urls.py  (or python test_urls.py)
+"""
+
+import unittest
+
+from urls import video_key, canonical_url, url_key, extract_urls, ingest_urls
+
+VIDEO = "dQw4w9WgXcQ"
+WATCH = f"https://www.youtube.com/watch?v={VIDEO}"
+
+
+class UrlKeyTest(unittest.TestCase):
+
+    def test_spellings_of_one_video_share_a_key(self):
+        """youtu.be, Shorts, m. links, timestamps and tracking parameters are the same video"""
+        spellings = [
+            WATCH,
+            f"https://youtu.be/{VIDEO}?si=abc123",
+            f"https://www.youtube.com/shorts/{VIDEO}",
+            f"https://m.youtube.com/watch?v={VIDEO}&t=42s&feature=share",
+            f"https://www.youtube.com/embed/{VIDEO}",
+        ]
+        self.assertEqual({url_key(url) for url in spellings}, {("youtube", VIDEO)})
+        self.assertEqual({canonical_url(url) for url in spellings}, {WATCH})
+
+    def test_watch_with_list(self):
+        """A watch URL inside a playlist is its video, unless playlist mode asks for the playlist"""
+        url = f"{WATCH}&list=PLabc123&index=3"
+        self.assertEqual(url_key(url), ("youtube", VIDEO))
+        self.assertEqual(url_key(url, playlist=True), ("youtube:playlist", "PLabc123"))
+        self.assertNotEqual(url_key(url, playlist=True), url_key(f"{WATCH}&list=PLother", playlist=True))
+        #Without a list= parameter playlist mode still dedupes by video
+        self.assertEqual(url_key(WATCH, playlist=True), ("youtube", VIDEO))
+
+    def test_bad_video_id(self):
+        """A malformed v= is not a known video and does not collapse into a bare /watch"""
+        url = "https://www.youtube.com/watch?v=short&t=10"
+        self.assertIsNone(video_key(url))
+        self.assertEqual(canonical_url(url), "https://www.youtube.com/watch?v=short")
+        self.assertNotEqual(url_key(url), url_key("https://www.youtube.com/watch?v=other"))
+
+    def test_other_sites(self):
+        """Other URLs only lose tracking parameters and the fragment"""
+        self.assertEqual(canonical_url("https://Example.com/v/1?utm_source=x&id=2#top"),
+                         "https://example.com/v/1?id=2")
+        self.assertEqual(url_key("https://vimeo.com/12345?share=copy"), ("vimeo", "12345"))
+
+
+class IngestTest(unittest.TestCase):
+
+    def test_trailing_punctuation(self):
+        """Links in prose end before the punctuation that follows them"""
+        text = f"See ({WATCH}), and www.example.com/a.mp4. Also https://youtu.be/{VIDEO}!"
+        self.assertEqual(extract_urls(text), [WATCH, "https://www.example.com/a.mp4",
+                                              f"https://youtu.be/{VIDEO}"])
+
+    def test_ingest_dedupes_but_keeps_urls_as_written(self):
+        """Duplicates are dropped by key; the URLs queued are the ones given"""
+        playlist = f"{WATCH}&list=PLabc123"
+        text = f"{playlist}\nhttps://youtu.be/{VIDEO}\n{WATCH}&t=5\n"
+        self.assertEqual(ingest_urls(text), ([playlist], 2))
+        urls, skipped = ingest_urls(text, playlist=True)
+        self.assertEqual(urls, [playlist, f"https://youtu.be/{VIDEO}"])
+        self.assertEqual(skipped, 1)
+
+    def test_ingest_skips_queued(self):
+        queued = {("youtube", VIDEO)}
+        self.assertEqual(ingest_urls(f"https://youtu.be/{VIDEO}", queued.__contains__), ([], 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
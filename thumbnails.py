@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Thumbnail cache for YouTube Downloader GUI
+Fetches video thumbnails once, shrinks them to PNG and keeps them in bounded memory and disk caches
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from io import BytesIO
+
+from urls import video_key
+
+#Thumbnail sizes (width, height) for queue rows and the "Get Info" preview
+ROW_SIZE = (48, 27)
+PREVIEW_SIZE = (240, 135)
+
+#Decoded images the GUI keeps in memory, in bytes (4 per pixel)
+IMAGE_MEMORY = 4 * 1024 * 1024
+
+FETCH_TIMEOUT = 15
+#Larger downloads are not thumbnails
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+
+
+def thumbnail_url(info=None, url=None):
+    """URL of a video's thumbnail from its info (or flat playlist entry), else one derived from a YouTube URL
+
+    Prefers the smallest listed thumbnail at least 320 pixels wide, which
+    is plenty for the preview and far less to fetch than the full size one.
+    """
+    if info:
+        thumbnails = [thumb for thumb in info.get('thumbnails') or [] if thumb.get('url')]
+        wide = sorted((thumb for thumb in thumbnails if (thumb.get('width') or 0) >= 320),
+                      key=lambda thumb: thumb['width'])
+        if wide:
+            return wide[0]['url']
+        if info.get('thumbnail'):
+            return info['thumbnail']
+        if thumbnails:
+            return thumbnails[-1]['url']  #yt-dlp lists the preferred one last
+    key = video_key(url) if url else None
+    if key and key[0] == "Youtube":
+        return f"https://i.ytimg.com/vi/{key[1]}/mqdefault.jpg"
+    return None
+
+
+def has_pillow():
+    """True if Pillow is installed; thumbnails are shrunk with ffmpeg without it"""
+    return importlib.util.find_spec('PIL') is not None
+
+
+def shrink_with_pillow(source, size):
+    """PNG of an image shrunk to fit size, None if Pillow cannot read it"""
+    try:
+        #Imported on first use, off the Tk thread, so it does not slow down startup
+        from PIL import Image
+        with Image.open(BytesIO(source)) as image:
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGB")
+            output = BytesIO()
+            image.save(output, "PNG")
+            return output.getvalue()
+    except Exception:
+        return None
+
+
+class LRUCache:
+    """Mapping that drops its least recently used values beyond a total size
+
+    sizeof(value) gives the size a value counts for (1 by default, which
+    bounds the number of values); on_evict(key, value) is called for each
+    value pushed out. Not thread-safe: the GUI keeps one on the Tk thread.
+    """
+
+    def __init__(self, capacity, sizeof=None, on_evict=None):
+        self.capacity = capacity
+        self.sizeof = sizeof or (lambda value: 1)
+        self.on_evict = on_evict
+        self.size = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        """Value for key (now the most recently used), None on a miss"""
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store value, evicting the least recently used values while over capacity"""
+        if key in self._items:
+            self.size -= self.sizeof(self._items.pop(key))
+        self._items[key] = value
+        self.size += self.sizeof(value)
+        while self.size > self.capacity and len(self._items) > 1:
+            old_key, old_value = self._items.popitem(last=False)
+            self.size -= self.sizeof(old_value)
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+
+class ThumbnailStore:
+    """Shrunken thumbnails as PNG files under the config directory
+
+    Each (URL, size) is fetched and decoded once: the source image is
+    shrunk off the Tk thread, by Pillow or else by ffmpeg, and the PNG is
+    kept on disk, so rows scrolled back into view and later sessions read
+    a few KB from there instead of fetching again. Requests for an image
+    already being fetched share that fetch, failed ones are not retried
+    during the session, and the least recently used files are deleted
+    once the cache holds more than max_bytes. get() runs on the process
+    engine's loop and reads the disk cache on its executor; cached() blocks.
+    """
+
+    def __init__(self, config_dir, ffmpeg=None, max_bytes=20 * 1024 * 1024):
+        self.cache_dir = config_dir / "thumbnails"
+        self.ffmpeg = ffmpeg or (lambda: None)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = None
+        self._fetches = {}
+        self._failed = set()
+
+    def entry_path(self, url, size):
+        """Cache file of a thumbnail URL at a size"""
+        digest = hashlib.sha1(f"{size[0]}x{size[1]} {url}".encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{digest[:24]}.png"
+
+    def cached(self, url, size):
+        """PNG data of a thumbnail from the disk cache, None on a miss (blocks)"""
+        path = self.entry_path(url, size)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  #Least recently used files are evicted first
+        except OSError:
+            return None
+        return data
+
+    async def get(self, url, size):
+        """PNG data of a thumbnail, fetched and shrunk unless it is on disk; None if unavailable"""
+        if (url, size) in self._failed:
+            return None
+        data = await asyncio.get_running_loop().run_in_executor(None, self.cached, url, size)
+        if data is not None:
+            return data
+        fetch = self._fetches.get((url, size))
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch(url, size))
+            self._fetches[(url, size)] = fetch
+            fetch.add_done_callback(lambda done: self._fetches.pop((url, size), None))
+        return await asyncio.shield(fetch)
+
+    async def _fetch(self, url, size):
+        """Download, shrink and store one thumbnail"""
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, lambda: has_pillow() or self.ffmpeg()):
+            self._failed.add((url, size))
+            return None  #Nothing could shrink it
+        try:
+            source = await loop.run_in_executor(None, self._download, url)
+        except (OSError, ValueError):
+            source = None
+        data = await self._shrink(source, size) if source else None
+        if data is None:
+            self._failed.add((url, size))
+            return None
+        await loop.run_in_executor(None, self._store, self.entry_path(url, size), data)
+        return data
+
+    @staticmethod
+    def _download(url):
+        """Bytes of the image at url (blocks)"""
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            data = response.read(MAX_SOURCE_BYTES + 1)
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ValueError(f"{url} is too large for a thumbnail")
+        return data
+
+    async def _shrink(self, source, size):
+        """PNG of the source image shrunk to fit size, None if it cannot be decoded"""
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, has_pillow):
+            return await loop.run_in_executor(None, shrink_with_pillow, source, size)
+
+        ffmpeg = await loop.run_in_executor(None, self.ffmpeg)
+        if not ffmpeg:
+            return None
+        scale = f"scale={size[0]}:{size[1]}:force_original_aspect_ratio=decrease"
+        try:
+            process = await asyncio.create_subprocess_exec(
+                ffmpeg, '-hide_banner', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+                '-vf', scale, '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', 'pipe:1',
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL)
+            data, _ = await process.communicate(source)
+        except OSError:
+            return None
+        return data if process.returncode == 0 and data else None
+
+    def _store(self, path, data):
+        """Write a thumbnail atomically and evict old ones beyond max_bytes (blocks)"""
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_file = path.with_suffix('.tmp')
+                tmp_file.write_bytes(data)
+                os.replace(tmp_file, path)
+            except OSError:
+                return  #The cache is only an optimization
+            if self._sizes is None:
+                self._sizes = {}
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith('.png'):
+                        self._sizes[entry.path] = entry.stat().st_size
+            self._sizes[str(path)] = len(data)
+            if sum(self._sizes.values()) > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete the least recently used files down to three quarters of max_bytes (lock held)"""
+        def used(file_path):
+            try:
+                return os.path.getmtime(file_path)
+            except OSError:
+                return 0
+
+        total = sum(self._sizes.values())
+        for file_path in sorted(self._sizes, key=used):
+            if total <= self.max_bytes * 3 // 4:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+            total -= self._sizes.pop(file_path)
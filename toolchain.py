@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Toolchain discovery for YouTube Downloader GUI
+Finds yt-dlp/youtube-dl/ffmpeg once and caches their versions on disk
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+
+class Toolchain:
+    """Resolves external binaries and caches the result in the config dir
+
+    Probing a binary means starting a process, which for yt-dlp costs a full
+    Python interpreter start. The cache is keyed on PATH plus the location
+    and mtime of every binary, which can be checked with a few stat calls,
+    so versions are only probed again when one of those changes.
+    """
+
+    #Binary name -> arguments that print its version
+    TOOLS = {
+        "yt-dlp": ["--version"],
+        "youtube-dl": ["--version"],
+        "ffmpeg": ["-version"],
+        "aria2c": ["--version"],
+    }
+
+    #Preferred order when choosing a downloader
+    DOWNLOADERS = ("yt-dlp", "youtube-dl")
+
+    #Optional external downloaders yt-dlp can hand transfers to
+    EXTERNAL_DOWNLOADERS = ("aria2c",)
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.cache_file = cache_dir / "toolchain.json"
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._tools = {}
+        self._resolved = self.load_cache()
+
+    def load_cache(self):
+        """Load the last resolved toolchain; returns True if a cache was found"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            self._fingerprint = cached["fingerprint"]
+            self._tools = cached["tools"]
+            return True
+        except Exception:
+            return False
+
+    def save_cache(self):
+        """Save the resolved toolchain"""
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            with open(self.cache_file, 'w') as f:
+                json.dump({"fingerprint": self._fingerprint, "tools": self._tools}, f, indent=2)
+        except Exception:
+            pass  #Fail silently, we will just probe again next time
+
+    def fingerprint(self):
+        """Cheap cache key: PATH plus location and mtime of each binary"""
+        binaries = {}
+        for name in self.TOOLS:
+            path = shutil.which(name)
+            try:
+                mtime = os.stat(path).st_mtime if path else None
+            except OSError:
+                path, mtime = None, None
+            binaries[name] = [path, mtime]
+        return {"PATH": os.environ.get("PATH", ""), "binaries": binaries}
+
+    def resolve(self, force=False):
+        """Probe binaries whose fingerprint changed; returns True if anything changed"""
+        with self._lock:
+            fingerprint = self.fingerprint()
+            if not force and self._resolved and fingerprint == self._fingerprint:
+                return False
+
+            tools = {}
+            for name, (path, mtime) in fingerprint["binaries"].items():
+                if not path:
+                    continue
+                cached = self._tools.get(name)
+                if not force and cached and cached["path"] == path and cached["mtime"] == mtime:
+                    tools[name] = cached
+                    continue
+                version = self.probe_version(path, self.TOOLS[name])
+                if version is not None:
+                    tools[name] = {"path": path, "mtime": mtime, "version": version}
+
+            changed = tools != self._tools
+            self._tools = tools
+            self._fingerprint = fingerprint
+            self._resolved = True
+            self.save_cache()
+            return changed
+
+    def refresh_async(self, callback=None, force=False):
+        """Re-validate the cache on a background thread
+
+        callback(changed) is called from that thread when done.
+        """
+        def refresh_thread():
+            changed = self.resolve(force=force)
+            if callback:
+                callback(changed)
+
+        threading.Thread(target=refresh_thread, daemon=True).start()
+
+    @staticmethod
+    def probe_version(path, version_args):
+        """Run a binary to get its version string, None if it does not work"""
+        try:
+            result = subprocess.run([path] + version_args, capture_output=True,
+                                    text=True, check=True, timeout=30)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+            return None
+        lines = result.stdout.strip().splitlines()
+        return lines[0].strip() if lines else ""
+
+    def _ensure_resolved(self):
+        """Block on the first resolution if there was no cache to start from"""
+        if not self._resolved:
+            self.resolve()
+
+    def has(self, name):
+        """True if the binary was found and answered its version probe"""
+        self._ensure_resolved()
+        return name in self._tools
+
+    def path(self, name):
+        """Absolute path of a binary, None if unavailable"""
+        self._ensure_resolved()
+        tool = self._tools.get(name)
+        return tool["path"] if tool else None
+
+    def version(self, name):
+        """Version string of a binary, None if unavailable"""
+        self._ensure_resolved()
+        tool = self._tools.get(name)
+        return tool["version"] if tool else None
+
+    def downloader(self):
+        """Name of the preferred available downloader (yt-dlp or youtube-dl)"""
+        for name in self.DOWNLOADERS:
+            if self.has(name):
+                return name
+        return None
+
+    def external_downloaders(self):
+        """Names of the installed external downloaders"""
+        return [name for name in self.EXTERNAL_DOWNLOADERS if self.has(name)]
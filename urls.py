@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+URL helpers for YouTube Downloader GUI
+Identifies videos from their URL without running the extractor
+"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qs, parse_qsl, urlencode
+
+YOUTUBE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+YOUTUBE_HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+                 "youtube-nocookie.com", "www.youtube-nocookie.com")
+
+#Path prefixes that are followed by a YouTube video ID
+YOUTUBE_ID_PATHS = ("/shorts/", "/embed/", "/live/", "/v/", "/e/")
+
+#Links in free text: with a scheme, or starting with www. or youtu.be/
+URL_RE = re.compile(r'(?:https?://|www\.|youtu\.be/)[^\s<>"\'`]+', re.IGNORECASE)
+
+#Characters that end a sentence rather than the link before them
+TRAILING_PUNCTUATION = '.,;:!?)]}\'"'
+
+#Query parameters that only track where a link was shared from
+TRACKING_PARAMS = ("fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "si", "feature", "ref_src")
+TRACKING_PREFIXES = ("utm_",)
+
+
+def video_key(url):
+    """(extractor key, video ID) for a single-video URL, None if unknown
+
+    Extractor keys use yt-dlp's names so they match its archive entries.
+    Only well-known URL shapes are recognised; anything else needs a real
+    extraction.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+
+    if host in YOUTUBE_HOSTS:
+        video_id = None
+        if parts.path == "/watch":
+            video_id = parse_qs(parts.query).get("v", [None])[0]
+        else:
+            for prefix in YOUTUBE_ID_PATHS:
+                if parts.path.startswith(prefix):
+                    video_id = parts.path[len(prefix):].split('/')[0]
+                    break
+        if video_id and YOUTUBE_ID_RE.match(video_id):
+            return ("Youtube", video_id)
+        return None
+
+    if host == "youtu.be":
+        video_id = parts.path.lstrip('/').split('/')[0]
+        if YOUTUBE_ID_RE.match(video_id):
+            return ("Youtube", video_id)
+        return None
+
+    if host in ("vimeo.com", "www.vimeo.com", "player.vimeo.com"):
+        match = re.match(r'^/(?:video/)?(\d+)/?$', parts.path)
+        if match:
+            return ("Vimeo", match.group(1))
+
+    return None
+
+
+def extract_urls(text):
+    """Every link in a block of text (a pasted list, a file), in order of appearance"""
+    urls = []
+    for match in URL_RE.finditer(text):
+        url = match.group(0).rstrip(TRAILING_PUNCTUATION)
+        if url.endswith('(') or not url:
+            continue
+        if not url.lower().startswith(('http://', 'https://')):
+            url = "https://" + url
+        urls.append(url)
+    return urls
+
+
+def canonical_url(url):
+    """One spelling per video, for duplicate detection only; the URL as given is what gets downloaded
+
+    youtu.be links, /shorts/ and watch URLs with timestamps or playlist
+    context all become https://www.youtube.com/watch?v=<id>. Other URLs
+    keep their path and meaningful query parameters, minus tracking ones
+    (utm_*, fbclid, ...) and the #fragment; YouTube links without a valid
+    video ID keep just their v and list parameters.
+    """
+    key = video_key(url)
+    if key is not None:
+        extractor, video_id = key
+        if extractor == "Youtube":
+            return f"https://www.youtube.com/watch?v={video_id}"
+        if extractor == "Vimeo":
+            return f"https://vimeo.com/{video_id}"
+
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)]
+    if (parts.hostname or "").lower() in YOUTUBE_HOSTS:
+        #Timestamps and the like do not make another video or playlist
+        query = [(name, value) for name, value in query if name in ("v", "list")]
+    netloc = parts.netloc.lower()
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", urlencode(query), ""))
+
+
+def playlist_id(url):
+    """The list= parameter of a YouTube URL, None if it has none"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    if (parts.hostname or "").lower() not in YOUTUBE_HOSTS:
+        return None
+    return parse_qs(parts.query).get("list", [None])[0]
+
+
+def url_key(url, playlist=False):
+    """Key under which duplicates of a URL collide: (extractor, ID) for known videos, else the canonical URL
+
+    With playlist=True (playlist mode) a YouTube link with a list= parameter
+    stands for its playlist, not for the video it points at.
+    """
+    if playlist:
+        list_id = playlist_id(url)
+        if list_id:
+            return ("youtube:playlist", list_id)
+    key = video_key(url)
+    if key:
+        return (key[0].lower(), key[1])
+    return ("url", canonical_url(url))
+
+
+def ingest_urls(text, is_queued=None, playlist=False):
+    """URLs to queue from a pasted list or file, without duplicates
+
+    Duplicates within the text and URLs for which is_queued(key) is True
+    (see url_key) are dropped; each URL costs one key computation and a
+    set lookup. URLs are returned as written (minus trailing punctuation),
+    so playlist context survives. Returns (urls, number of URLs skipped).
+    """
+    seen = set()
+    urls = []
+    skipped = 0
+    for url in extract_urls(text):
+        key = url_key(url, playlist)
+        if key in seen or (is_queued is not None and is_queued(key)):
+            skipped += 1
+            continue
+        seen.add(key)
+        urls.append(url)
+    return urls, skipped
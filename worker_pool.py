@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Worker pool for YouTube Downloader GUI
+Long-lived yt-dlp worker processes that downloads are dispatched to over a pipe
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+from process_engine import LINE_LIMIT
+from process_tree import new_group_options, kill_tree
+
+WORKER_SCRIPT = Path(__file__).resolve().with_name("ytdlp_worker.py")
+SENTINEL = "[ytdl-worker] "
+
+
+def _version_numbers(version):
+    """'2024.08.06' or '2024.8.6' -> (2024, 8, 6); ignores suffixes such as ' (fake)'"""
+    first = version.split()[0] if version and version.split() else ""
+    return tuple(int(number) for number in re.findall(r'\d+', first))
+
+
+def module_version():
+    """Version of the yt_dlp module the workers import, None if it is not installed as a package"""
+    import importlib.metadata  #Deferred: it costs startup time and is only needed for the first job
+    try:
+        return importlib.metadata.version('yt-dlp')
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+class WorkerUnavailable(Exception):
+    """Raised when no worker could be started; the caller runs yt-dlp itself"""
+
+
+class _Worker:
+    """One worker process and the number of jobs it has run"""
+
+    def __init__(self, process):
+        self.process = process
+        self.jobs = 0
+
+    @property
+    def alive(self):
+        return self.process.returncode is None
+
+
+class WorkerPool:
+    """Pool of yt-dlp worker processes (ytdlp_worker.py) with yt_dlp already imported
+
+    Starting yt-dlp costs an interpreter start plus the extractor imports,
+    which dominates short downloads; a worker pays that once. Each job gets
+    a worker of its own (the DownloadQueue bounds how many run at once), so
+    downloads still use separate processes and cores. Idle workers are
+    kept up to max_idle; a worker is recycled after max_jobs jobs, and one
+    that dies mid-job (crash, pause or cancel) is simply dropped.
+
+    Must be used from a single event loop (the ProcessEngine's). Workers
+    import the yt_dlp module of this interpreter, so the pool is only used
+    when that module is importable and the app is not a frozen build.
+    """
+
+    def __init__(self, max_jobs=25, max_idle=4):
+        self.max_jobs = max_jobs
+        self.max_idle = max_idle
+        self._idle = []
+        self._broken = None
+        self.version = None
+        self.workers_started = 0
+        self.jobs_run = 0
+
+    @staticmethod
+    def supported():
+        """True if worker processes can be started from this build"""
+        return (not getattr(sys, 'frozen', False) and WORKER_SCRIPT.exists()
+                and importlib.util.find_spec('yt_dlp') is not None)
+
+    @staticmethod
+    def runs(version):
+        """True if a yt-dlp binary reporting version runs the same yt_dlp release as the workers
+
+        Workers stand in for the yt-dlp the toolchain found only when it is
+        this interpreter's module; a pinned standalone build of another
+        release (or a test stub) is run as a process instead.
+        """
+        installed = module_version()
+        return bool(version and installed) and _version_numbers(version) == _version_numbers(installed)
+
+    @property
+    def available(self):
+        """True unless the platform is unsupported or a worker failed to start"""
+        return self._broken is None and self.supported()
+
+    async def _spawn(self):
+        """Start a worker and wait until it has imported yt_dlp"""
+        env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(WORKER_SCRIPT), stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                limit=LINE_LIMIT, env=env, **new_group_options())
+        except OSError as e:
+            self._broken = str(e)
+            raise WorkerUnavailable(self._broken) from e
+
+        output = []
+        while True:
+            line = (await process.stdout.readline()).decode('utf-8', 'replace')
+            if not line:
+                await process.wait()
+                self._broken = "".join(output[-5:]).strip() or f"worker exited with code {process.returncode}"
+                raise WorkerUnavailable(self._broken)
+            if line.startswith(SENTINEL):
+                break
+            output.append(line)
+
+        try:
+            self.version = json.loads(line[len(SENTINEL):]).get("version")
+        except json.JSONDecodeError:
+            pass
+        self.workers_started += 1
+        return _Worker(process)
+
+    async def warm_up(self, count):
+        """Start idle workers ahead of the first jobs"""
+        while self.available and len(self._idle) < min(count, self.max_idle):
+            try:
+                self._idle.append(await self._spawn())
+            except WorkerUnavailable:
+                return
+
+    async def _acquire(self):
+        """An idle live worker, or a new one"""
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+        return await self._spawn()
+
+    def _retire(self, worker):
+        """Let a worker exit by closing its input"""
+        try:
+            worker.process.stdin.close()
+        except (OSError, RuntimeError):
+            pass
+
+    def _discard(self, worker):
+        """Retire a worker whose job was abandoned mid-run, killing the download it is still running"""
+        self._retire(worker)
+        if worker.alive:
+            #Not on the loop, which the kill waits on
+            threading.Thread(target=kill_tree, args=(worker.process,), daemon=True).start()
+
+    def _release(self, worker):
+        """Return a worker after a job, or retire it once it has run max_jobs"""
+        worker.jobs += 1
+        if worker.alive and worker.jobs < self.max_jobs and len(self._idle) < self.max_idle:
+            self._idle.append(worker)
+        else:
+            self._retire(worker)
+
+    async def run(self, args, on_line, on_start=None):
+        """Run yt-dlp with args on a worker, calling on_line(line) for each output line
+
+        on_start(process) receives the worker process, e.g. to kill it on
+        cancel. Returns the exit code; a worker that dies mid-job gives its
+        own (negative on POSIX when killed). Raises WorkerUnavailable if no
+        worker can be started.
+        """
+        request_id = os.urandom(4).hex()
+        request = json.dumps({"id": request_id, "args": list(args)}) + "\n"
+        worker = await self._acquire()
+        try:
+            worker.process.stdin.write(request.encode('utf-8'))
+            await worker.process.stdin.drain()
+        except (OSError, RuntimeError):
+            #Died while idle; one fresh worker is worth a try
+            self._retire(worker)
+            worker = await self._spawn()
+            worker.process.stdin.write(request.encode('utf-8'))
+            await worker.process.stdin.drain()
+        try:
+            if on_start is not None:
+                on_start(worker.process)
+
+            while True:
+                line = (await worker.process.stdout.readline()).decode('utf-8', 'replace').replace('\r\n', '\n')
+                if not line:
+                    #Crashed or killed mid-job
+                    self._retire(worker)
+                    return await worker.process.wait()
+                if line.startswith(SENTINEL):
+                    try:
+                        reply = json.loads(line[len(SENTINEL):])
+                    except json.JSONDecodeError:
+                        reply = {}
+                    if reply.get("id") == request_id:
+                        break
+                on_line(line)
+        except BaseException:
+            #A failing callback (or cancellation) must not leave the worker busy forever
+            self._discard(worker)
+            raise
+
+        self.jobs_run += 1
+        self._release(worker)
+        try:
+            return int(reply["exit"])
+        except (KeyError, TypeError, ValueError):
+            return 1
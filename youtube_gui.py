@@ -4,18 +4,44 @@ YouTube Downloader GUI
 A simple GUI wrapper for yt-dlp (youtube-dl) using tkinter
 """
 
+import time
+#Reference point for the startup benchmark, taken before the heavier imports
+IMPORT_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import subprocess
 import threading
+import asyncio
 import os
 import sys
 import json
+import math
+import base64
 from pathlib import Path
 from config import Config
+from download_queue import DownloadQueue, DownloadJob
+from job_runner import JobRunner
+from commands import (VIDEO_FORMATS, AUDIO_FORMATS, FRAGMENT_CHOICES, CHUNK_SIZE_CHOICES,
+                      EXTERNAL_DOWNLOADER_CHOICES)
+from toolchain import Toolchain
+from info_engine import InfoEngine, ExtractionError
+from info_cache import InfoCache
+from log_pipeline import LogPipeline
+from playlist import PlaylistBatch, PlaylistError, iter_playlist_entries, entry_job
+from archive import DownloadArchive
+from journal import JobJournal
+from bandwidth import BandwidthLimiter, BANDWIDTH_CHOICES
+from progress import format_bytes, format_speed, format_eta
+from formats import plan_video, describe_plan
+from metrics import MetricsRecorder, PHASES
+from process_engine import shared_engine, run_captured
+from worker_pool import WorkerPool
+from disk_space import DiskSpaceGuard
+from urls import extract_urls, ingest_urls, url_key
+from thumbnails import ThumbnailStore, LRUCache, thumbnail_url, ROW_SIZE, PREVIEW_SIZE, IMAGE_MEMORY
 
 class YouTubeDownloaderGUI:
-    def __init__(self, root):
+    def __init__(self, root, deferred_startup=True):
         self.root = root
         self.root.title("YouTube Downloader GUI")
         
@@ -25,6 +51,29 @@ class YouTubeDownloaderGUI:
         #Load configuration
         self.config = Config()
         
+        #Binary discovery is cached on disk and only re-probed in the background
+        self.toolchain = Toolchain(self.config.config_dir)
+        
+        #Metadata lookups reuse a warm in-process yt_dlp when available
+        self.info_engine = InfoEngine(self.toolchain)
+        
+        #Extracted info is cached on disk so downloads can skip a second extraction
+        self.info_cache = InfoCache(self.config.config_dir)
+        
+        #Thumbnails are shrunk once and kept on disk; the decoded Tk images of
+        #queue rows live in a memory-bounded LRU and are only made for visible rows
+        self.thumbnails = ThumbnailStore(self.config.config_dir, ffmpeg=lambda: self.toolchain.path('ffmpeg'))
+        self.thumbnail_images = LRUCache(IMAGE_MEMORY, sizeof=lambda image: image.width() * image.height() * 4,
+                                         on_evict=self.thumbnail_evicted)
+        self.thumbnail_rows = {}
+        self.row_thumbnails = {}
+        self.thumbnail_requests = set()
+        self.thumbnail_refresh = None
+        self.preview_image = None
+        
+        #Completed downloads, checked before any downloader process is started
+        self.archive = DownloadArchive(self.config.config_dir)
+        
         #Set window geometry from config
         geometry = self.config.get("window_geometry", "800x600")
         self.root.geometry(geometry)
@@ -32,20 +81,96 @@ class YouTubeDownloaderGUI:
         
         #Variables
         self.download_path = tk.StringVar(value=self.config.get("download_path"))
+        self.scratch_dir = tk.StringVar(value=self.config.get("scratch_dir", ""))
         self.url_var = tk.StringVar(value=self.config.get("last_url", ""))
         self.format_var = tk.StringVar(value=self.config.get("default_format"))
         self.audio_only_var = tk.BooleanVar(value=self.config.get("audio_only"))
+        self.playlist_mode_var = tk.BooleanVar(value=self.config.get("playlist_mode", False))
         self.audio_format_var = tk.StringVar(value=self.config.get("audio_format", "best"))
-        self.is_downloading = False
+        self.max_workers_var = tk.IntVar(value=self.config.get("max_workers", 2))
+        self.fragments_var = tk.StringVar(value=self.config.get("concurrent_fragments", "auto"))
+        self.chunk_size_var = tk.StringVar(value=self.config.get("http_chunk_size", "auto"))
+        self.external_downloader_var = tk.StringVar(value=self.config.get("external_downloader", "auto"))
+        self.bandwidth_limit_var = tk.StringVar(value=self.config.get("bandwidth_limit", "off"))
+        
+        #One bandwidth budget shared by all running jobs (optionally by time of day);
+        #jobs always use its proxy, so a limit set later applies to running jobs too
+        self.bandwidth = BandwidthLimiter(self.bandwidth_limit_var.get(),
+                                          self.config.get("bandwidth_schedule", []), follow_changes=True)
+        
+        #Journal of job state changes, used to resume downloads after a restart
+        self.journal = JobJournal(self.config.config_dir)
+        
+        #Phase timings and throughput of finished jobs, exported for monitoring
+        self.metrics = MetricsRecorder(self.config.config_dir)
+        self.stats_window = None
+        
+        #One background asyncio loop runs every child process (downloads, info
+        #lookups, installs) and multiplexes their output
+        self.engine = shared_engine()
+        
+        #Warm yt-dlp worker processes, so short downloads skip the interpreter start-up
+        self.worker_pool = WorkerPool()
+        
+        #Jobs only start while their estimated size fits on the disk
+        self.disk_space = DiskSpaceGuard(self.config.get("disk_margin_mb", 1024) * 1024 * 1024)
+        
+        #Runs each job: archive check, command building and output parsing
+        self.job_runner = JobRunner(self.toolchain, self.info_cache, self.archive,
+                                    log=self.log_message,
+                                    notify=lambda job: self.download_queue.notify(job),
+                                    bandwidth=self.bandwidth, info_engine=self.info_engine,
+                                    engine=self.engine, worker_pool=self.worker_pool,
+                                    disk_space=self.disk_space)
+        
+        #Download queue with a bounded number of jobs running on the engine
+        self.download_queue = DownloadQueue(self.job_runner,
+                                            max_workers=self.max_workers_var.get(),
+                                            on_update=self.on_job_update, engine=self.engine,
+                                            disk_space=self.disk_space)
+        self.last_batch_report = 0
+        self.playlist_batches = []
+        
+        #Jobs changed since the last UI refresh; progress updates are frequent
+        #so rows are refreshed in batches rather than once per output line
+        self.dirty_jobs = {}
+        self.dirty_lock = threading.Lock()
         
         self.setup_ui()
         
+        #Worker threads never touch Tk directly; their log lines and UI updates
+        #are queued and applied by the main loop in batches
+        self.log_pipeline = LogPipeline(self.root, self.log_text)
+        self.log_pipeline.start()
+        
+        #Anything not needed to show the window waits until it is on screen
+        self.startup_done = not deferred_startup
+        self.root.bind('<Map>', self.on_first_map, add='+')
+        
         #Bind window close event to save config
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         #Bind window state events to close dropdowns (more selective)
         self.root.bind('<Unmap>', self.close_dropdowns)  #Handles minimize only
         
+    def on_first_map(self, event):
+        """Schedule the deferred startup work once the window is first shown"""
+        if event.widget is not self.root or self.startup_done:
+            return
+        self.startup_done = True
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        """Startup work that is not needed for the first paint"""
+        self.toolchain.refresh_async()
+        
+        #Pick up downloads that were still queued or running when the app was closed
+        threading.Thread(target=self.resume_unfinished_jobs, daemon=True).start()
+        
+        #Import yt_dlp in the background so the first "Get Info" is fast as well
+        self.root.after(500, self.info_engine.warm_up_async)
+        self.root.after(1500, lambda: self.engine.submit(self.job_runner.warm_up_workers(1)))
+    
     def setup_dark_theme(self):
         """Setup dark theme with purple/magenta accents"""
         #Configure the root window
@@ -177,6 +302,37 @@ class YouTubeDownloaderGUI:
                        foreground=colors['accent'],
                        font=('Segoe UI', 9, 'bold'))
         
+        #Spinbox style
+        style.configure('Custom.TSpinbox',
+                       foreground=colors['fg'],
+                       fieldbackground=colors['entry_bg'],
+                       background=colors['entry_bg'],
+                       arrowcolor=colors['accent'],
+                       borderwidth=1,
+                       relief='flat')
+        
+        #Treeview style for the download queue
+        style.configure('Custom.Treeview',
+                       background=colors['entry_bg'],
+                       fieldbackground=colors['entry_bg'],
+                       foreground=colors['fg'],
+                       borderwidth=0,
+                       font=('Segoe UI', 9))
+        
+        style.map('Custom.Treeview',
+                 background=[('selected', colors['select_bg'])],
+                 foreground=[('selected', colors['select_fg'])])
+        
+        #Queue rows are tall enough for their thumbnail
+        style.configure('Thumbnail.Custom.Treeview', rowheight=ROW_SIZE[1] + 6)
+        
+        style.configure('Custom.Treeview.Heading',
+                       background=colors['frame_bg'],
+                       foreground=colors['accent'],
+                       borderwidth=0,
+                       relief='flat',
+                       font=('Segoe UI', 9, 'bold'))
+        
     def setup_ui(self):
         """Setup the user interface"""
         #Create main frame with custom style
@@ -201,6 +357,16 @@ class YouTubeDownloaderGUI:
         ttk.Button(url_frame, text="Paste", command=self.paste_url, 
                   style='Custom.TButton').grid(row=0, column=1, padx=(10, 0))
         
+        #Bulk ingest of a text file full of links
+        ttk.Button(url_frame, text="📥 Import List", command=self.import_url_list, 
+                  style='Custom.TButton').grid(row=0, column=2, padx=(10, 0))
+        
+        #Thumbnail of the video shown by "Get Info" (hidden until there is one)
+        self.preview_label = ttk.Label(url_frame, style='Custom.TLabel')
+        self.preview_label.grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        self.preview_label.grid_remove()
+        self.url_var.trace('w', self.clear_preview)
+        
         #Download options frame with custom styling
         options_frame = ttk.LabelFrame(main_frame, text="⚙️ Download Options", 
                                      padding="15", style='Custom.TLabelframe')
@@ -218,28 +384,39 @@ class YouTubeDownloaderGUI:
         ttk.Button(path_frame, text="Browse", command=self.browse_download_path, 
                   style='Custom.TButton').grid(row=0, column=1, padx=(10, 0))
         
+        #Optional scratch folder on a fast disk; finished files are moved to the download path
+        ttk.Label(path_frame, text="Scratch folder (optional):", style='Custom.TLabel').grid(row=1, column=0, sticky=tk.W, pady=(8, 0))
+        ttk.Entry(path_frame, textvariable=self.scratch_dir, state="readonly", 
+                 style='Custom.TEntry').grid(row=2, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        ttk.Button(path_frame, text="Browse", command=self.browse_scratch_dir, 
+                  style='Custom.TButton').grid(row=2, column=1, padx=(10, 0))
+        ttk.Button(path_frame, text="Clear", command=lambda: self.scratch_dir.set(""), 
+                  style='Custom.TButton').grid(row=2, column=2, padx=(10, 0))
+        
         #Format selection with styling (bigger icons)
         ttk.Label(options_frame, text="🎯 Quality:", style='Custom.TLabel', font=('Segoe UI', 11)).grid(row=2, column=0, sticky=tk.W, pady=(8, 8))
         format_combo = ttk.Combobox(options_frame, textvariable=self.format_var, 
-                                   style='Custom.TCombobox', state='readonly', values=[
-            "best", "worst", "720p", "480p", "360p", "240p", "144p"
-        ])
+                                   style='Custom.TCombobox', state='readonly', values=VIDEO_FORMATS)
         format_combo.grid(row=2, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=(8, 8))
         
         #Store reference to format combo for dropdown management
         self.format_combo = format_combo
         
+        #Size estimates shown by "Get Info" belong to that URL only
+        self.url_var.trace('w', self.reset_format_estimates)
+        
         #Checkboxes with icons and custom styling (bigger icons)
         ttk.Checkbutton(options_frame, text="🎵 Audio only", variable=self.audio_only_var, 
                        style='Custom.TCheckbutton').grid(row=3, column=0, sticky=tk.W, pady=(15, 0))
         
+        ttk.Checkbutton(options_frame, text="📃 Playlist mode", variable=self.playlist_mode_var, 
+                       style='Custom.TCheckbutton').grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=(15, 0))
+        
         #Audio format selection with custom styling
         self.audio_format_label = ttk.Label(options_frame, text="🎶 Audio Format:", style='Custom.TLabel', font=('Segoe UI', 11))
         self.audio_format_var = tk.StringVar(value=self.config.get("audio_format", "best"))
         self.audio_format_combo = ttk.Combobox(options_frame, textvariable=self.audio_format_var, 
-                                             style='Custom.TCombobox', state='readonly', values=[
-            "best", "m4a", "webm", "mp3"
-        ])
+                                             style='Custom.TCombobox', state='readonly', values=AUDIO_FORMATS)
         
         #Store reference to audio format combo for dropdown management
         self.audio_format_combo_ref = self.audio_format_combo
@@ -247,6 +424,35 @@ class YouTubeDownloaderGUI:
         #Bind audio only checkbox to show/hide audio format options
         self.audio_only_var.trace('w', self.toggle_audio_format)
         
+        #Number of downloads allowed to run at the same time
+        ttk.Label(options_frame, text="⚡ Parallel Downloads:", style='Custom.TLabel', font=('Segoe UI', 11)).grid(row=5, column=0, sticky=tk.W, pady=(8, 0))
+        ttk.Spinbox(options_frame, from_=1, to=8, textvariable=self.max_workers_var, width=5,
+                   state='readonly', command=self.update_max_workers,
+                   style='Custom.TSpinbox').grid(row=5, column=1, sticky=tk.W, padx=(10, 0), pady=(8, 0))
+        
+        #Per-download acceleration; "auto" picks defaults for the video's site
+        ttk.Label(options_frame, text="🚀 Acceleration:", style='Custom.TLabel', font=('Segoe UI', 11)).grid(row=6, column=0, sticky=tk.W, pady=(8, 0))
+        acceleration_frame = ttk.Frame(options_frame, style='Custom.TFrame')
+        acceleration_frame.grid(row=6, column=1, columnspan=2, sticky=tk.W, padx=(10, 0), pady=(8, 0))
+        self.acceleration_combos = []
+        for column, (label, variable, choices) in enumerate([
+                ("Fragments", self.fragments_var, FRAGMENT_CHOICES),
+                ("Chunk size", self.chunk_size_var, CHUNK_SIZE_CHOICES),
+                ("Downloader", self.external_downloader_var, EXTERNAL_DOWNLOADER_CHOICES)]):
+            ttk.Label(acceleration_frame, text=label, style='Custom.TLabel').grid(row=0, column=column * 2, sticky=tk.W, padx=(0 if column == 0 else 10, 5))
+            combo = ttk.Combobox(acceleration_frame, textvariable=variable, width=7,
+                                 style='Custom.TCombobox', state='readonly', values=choices)
+            combo.grid(row=0, column=column * 2 + 1, sticky=tk.W)
+            self.acceleration_combos.append(combo)
+        
+        #Total download rate of all jobs together, e.g. "5M"; changes apply to running jobs
+        ttk.Label(options_frame, text="🌐 Bandwidth Limit:", style='Custom.TLabel', font=('Segoe UI', 11)).grid(row=7, column=0, sticky=tk.W, pady=(8, 0))
+        self.bandwidth_combo = ttk.Combobox(options_frame, textvariable=self.bandwidth_limit_var, width=8,
+                                            style='Custom.TCombobox', values=BANDWIDTH_CHOICES)
+        self.bandwidth_combo.grid(row=7, column=1, sticky=tk.W, padx=(10, 0), pady=(8, 0))
+        for sequence in ('<<ComboboxSelected>>', '<Return>', '<FocusOut>'):
+            self.bandwidth_combo.bind(sequence, self.update_bandwidth_limit)
+        
         #Buttons frame with custom styling
         button_frame = ttk.Frame(main_frame, style='Custom.TFrame')
         button_frame.grid(row=3, column=0, columnspan=3, pady=(15, 15))
@@ -262,28 +468,73 @@ class YouTubeDownloaderGUI:
         ttk.Button(button_frame, text="Clear Log", command=self.clear_log, 
                   style='Custom.TButton').grid(row=0, column=2, padx=(0, 10))
         
+        ttk.Button(button_frame, text="Clear Finished", command=self.clear_finished_jobs, 
+                  style='Custom.TButton').grid(row=0, column=3, padx=(0, 10))
+        
         #FFmpeg install button
         ttk.Button(button_frame, text="Install FFmpeg", command=self.install_ffmpeg, 
-                  style='Custom.TButton').grid(row=0, column=3)
+                  style='Custom.TButton').grid(row=0, column=4, padx=(0, 10))
+        
+        ttk.Button(button_frame, text="📊 Stats", command=self.show_stats, 
+                  style='Custom.TButton').grid(row=0, column=5)
         
         #Progress section with custom styling
         self.progress_var = tk.StringVar(value="Ready ✅")
-        ttk.Label(main_frame, textvariable=self.progress_var, style='Heading.TLabel').grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(0, 8))
+        ttk.Label(main_frame, textvariable=self.progress_var, style='Heading.TLabel').grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(0, 8))
         
-        self.progress_bar = ttk.Progressbar(main_frame, mode='indeterminate', 
+        #Combined transfer rate of all running jobs
+        self.throughput_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.throughput_var, style='Heading.TLabel').grid(row=4, column=2, sticky=tk.E, pady=(0, 8))
+        
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', maximum=100,
                                           style='Custom.Horizontal.TProgressbar')
         self.progress_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(8, 15))
         
+        #Download queue with one row per job
+        ttk.Label(main_frame, text="📋 Download Queue:", style='Heading.TLabel').grid(row=6, column=0, sticky=tk.W, pady=(0, 8))
+        
+        queue_frame = ttk.Frame(main_frame, style='Custom.TFrame')
+        queue_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 15))
+        queue_frame.columnconfigure(0, weight=1)
+        queue_frame.rowconfigure(0, weight=1)
+        
+        self.queue_tree = ttk.Treeview(queue_frame, columns=("url", "status", "progress", "speed", "eta", "result"),
+                                       show='tree headings', height=5, style='Thumbnail.Custom.Treeview')
+        self.queue_tree.column('#0', width=ROW_SIZE[0] + 12, stretch=False)
+        for column, heading, width, stretch in (("url", "URL", 240, True),
+                                                ("status", "Status", 110, False),
+                                                ("progress", "Progress", 70, False),
+                                                ("speed", "Speed", 90, False),
+                                                ("eta", "ETA", 60, False),
+                                                ("result", "Result", 180, True)):
+            self.queue_tree.heading(column, text=heading, anchor=tk.W)
+            self.queue_tree.column(column, width=width, stretch=stretch, anchor=tk.W)
+        self.queue_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.queue_scroll = ttk.Scrollbar(queue_frame, orient=tk.VERTICAL, command=self.queue_tree.yview)
+        self.queue_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.queue_tree.configure(yscrollcommand=self.on_queue_scroll)
+        
+        #Controls for the jobs selected in the queue
+        job_buttons = ttk.Frame(queue_frame, style='Custom.TFrame')
+        job_buttons.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(8, 0))
+        ttk.Button(job_buttons, text="⏸️ Pause", command=self.pause_selected_jobs, 
+                  style='Custom.TButton').grid(row=0, column=0, padx=(0, 10))
+        ttk.Button(job_buttons, text="▶️ Resume", command=self.resume_selected_jobs, 
+                  style='Custom.TButton').grid(row=0, column=1, padx=(0, 10))
+        ttk.Button(job_buttons, text="🚫 Cancel", command=self.cancel_selected_jobs, 
+                  style='Custom.TButton').grid(row=0, column=2)
+        
         #Log output with custom styling
-        ttk.Label(main_frame, text="📄 Output Log:", style='Heading.TLabel').grid(row=6, column=0, sticky=tk.W, pady=(0, 8))
+        ttk.Label(main_frame, text="📄 Output Log:", style='Heading.TLabel').grid(row=8, column=0, sticky=tk.W, pady=(0, 8))
         
         #Create a frame for the log text with custom styling
         log_frame = tk.Frame(main_frame, bg='#1e1e1e')
-        log_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(8, 0))
+        log_frame.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(8, 0))
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=15, width=80,
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=10, width=80,
                                                  bg='#2d2d2d', fg='#ffffff',
                                                  insertbackground='#ffffff',
                                                  selectbackground='#7c3aed',
@@ -295,6 +546,7 @@ class YouTubeDownloaderGUI:
         
         #Configure grid weights for resizing
         main_frame.rowconfigure(7, weight=1)
+        main_frame.rowconfigure(9, weight=1)
         
         #Initially hide audio format options
         self.toggle_audio_format()
@@ -320,17 +572,59 @@ class YouTubeDownloaderGUI:
                 #Try to close audio format combo dropdown  
                 if hasattr(self, 'audio_format_combo_ref'):
                     self.audio_format_combo_ref.event_generate('<Escape>')
+                
+                for combo in getattr(self, 'acceleration_combos', []):
+                    combo.event_generate('<Escape>')
         except Exception:
             #Ignore any errors when trying to close dropdowns
             pass
         
     def paste_url(self):
-        """Paste URL from clipboard"""
+        """Paste URL from clipboard; a pasted list of links is queued in bulk"""
         try:
             clipboard_content = self.root.clipboard_get()
-            self.url_var.set(clipboard_content)
         except tk.TclError:
             messagebox.showwarning("Warning", "No valid content in clipboard")
+            return
+        if len(extract_urls(clipboard_content)) > 1:
+            self.ingest_text(clipboard_content, "the clipboard")
+            return
+        self.url_var.set(clipboard_content)
+    
+    def import_url_list(self):
+        """Queue every link in a text file (a saved list, exported bookmarks, a chat log...)"""
+        path = filedialog.askopenfilename(title="Import Links",
+                                          filetypes=[("Text files", "*.txt *.csv *.html *.md"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read {path}:\n{e}")
+            return
+        self.ingest_text(text, os.path.basename(path))
+    
+    def ingest_text(self, text, source):
+        """Queue the links found in text, skipping duplicates and links already in the queue"""
+        if not self.get_downloader_command():
+            if messagebox.askyesno("Missing Dependencies", 
+                                   "yt-dlp or youtube-dl not found. Would you like to install yt-dlp?"):
+                self.install_dependencies()
+            return
+        
+        urls, skipped = ingest_urls(text, self.download_queue.is_active, playlist=self.playlist_mode_var.get())
+        if not urls and not skipped:
+            messagebox.showwarning("Warning", f"No links found in {source}")
+            return
+        
+        options = self.get_download_options()
+        for url in urls:
+            if self.playlist_mode_var.get():
+                self.start_playlist(url, options)
+            else:
+                self.download_queue.submit(url, options)
+        self.log_message(f"📥 Queued {len(urls)} link(s) from {source}, skipped {skipped} duplicate(s)")
     
     def browse_download_path(self):
         """Browse for download directory"""
@@ -338,103 +632,215 @@ class YouTubeDownloaderGUI:
         if folder:
             self.download_path.set(folder)
     
-    def log_message(self, message):
-        """Add message to log"""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+    def browse_scratch_dir(self):
+        """Browse for the scratch directory downloads are written to before they are moved into place"""
+        folder = filedialog.askdirectory(initialdir=self.scratch_dir.get() or self.download_path.get())
+        if folder:
+            self.scratch_dir.set(folder)
+    
+    def log_message(self, message, key=None):
+        """Add message to log (safe to call from any thread)
+
+        Progress lines sharing a key (e.g. a job id) overwrite each other.
+        """
+        self.log_pipeline.write(message, key)
+    
+    def run_on_ui(self, func, *args):
+        """Run func(*args) on the Tk thread (safe to call from any thread)"""
+        self.log_pipeline.post(func, *args)
+    
+    def show_message(self, func, *args):
+        """Show a messagebox without stalling the log drain (safe to call from any thread)"""
+        self.run_on_ui(self.root.after_idle, func, *args)
+    
+    def set_status(self, text):
+        """Show a busy status with an indeterminate progress bar (Tk thread only)"""
+        self.progress_var.set(text)
+        self.progress_bar.config(mode='indeterminate')
+        self.progress_bar.start()
     
     def clear_log(self):
         """Clear the log text"""
-        self.log_text.delete(1.0, tk.END)
+        self.log_pipeline.clear()
     
     def check_ffmpeg(self):
         """Check if FFmpeg is installed"""
-        try:
-            subprocess.run(['ffmpeg', '-version'], 
-                          capture_output=True, text=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return self.toolchain.has('ffmpeg')
     
     def get_downloader_command(self):
         """Get the appropriate downloader command (yt-dlp or youtube-dl)"""
-        try:
-            subprocess.run(['yt-dlp', '--version'], 
-                          capture_output=True, text=True, check=True)
-            return 'yt-dlp'
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            try:
-                subprocess.run(['youtube-dl', '--version'], 
-                              capture_output=True, text=True, check=True)
-                return 'youtube-dl'
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                return None
+        return self.toolchain.downloader()
     
     def check_dependencies(self):
         """Check if yt-dlp is installed"""
         downloader = self.get_downloader_command()
         if downloader:
-            try:
-                result = subprocess.run([downloader, '--version'], 
-                                      capture_output=True, text=True, check=True)
-                return True, f"{downloader} {result.stdout.strip()}"
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                return False, None
+            return True, f"{downloader} {self.toolchain.version(downloader)}"
         return False, None
     
     def get_video_info(self):
         """Get video information without downloading"""
-        if not self.url_var.get().strip():
+        url = self.url_var.get().strip()
+        if not url:
             messagebox.showwarning("Warning", "Please enter a video URL")
             return
         
-        def info_thread():
-            try:
-                self.progress_var.set("Getting video info... 🔍")
-                self.progress_bar.start()
-                
-                #Check which downloader is available
-                downloader = self.get_downloader_command()
-                if not downloader:
-                    self.log_message("Error: yt-dlp or youtube-dl not found. Please install one of them.")
-                    return
-                
-                #Use the available downloader
-                cmd = [downloader, '--dump-json', self.url_var.get().strip()]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                
-                #Parse JSON output
-                info = json.loads(result.stdout)
-                
-                #Display relevant information
-                self.log_message(f"Title: {info.get('title', 'N/A')}")
-                self.log_message(f"Uploader: {info.get('uploader', 'N/A')}")
-                self.log_message(f"Duration: {info.get('duration_string', 'N/A')}")
-                self.log_message(f"View Count: {info.get('view_count', 'N/A')}")
-                self.log_message(f"Upload Date: {info.get('upload_date', 'N/A')}")
-                self.log_message("-" * 50)
-                
-            except subprocess.CalledProcessError as e:
-                self.log_message(f"Error getting video info: {e.stderr}")
-            except json.JSONDecodeError:
-                self.log_message("Error parsing video information")
-            except Exception as e:
-                self.log_message(f"Unexpected error: {str(e)}")
-            finally:
-                self.progress_bar.stop()
-                self.progress_var.set("Ready ✅")
-        
-        threading.Thread(target=info_thread, daemon=True).start()
+        self.set_status("Getting video info... 🔍")
+        self.engine.submit(self.fetch_video_info(url))
     
-    def start_download(self):
-        """Start the download process"""
-        if self.is_downloading:
-            messagebox.showinfo("Info", "Download already in progress")
+    async def fetch_video_info(self, url):
+        """Look up and log the info of url (runs on the process engine)"""
+        loop = asyncio.get_running_loop()
+        try:
+            #The info cache reads and writes JSON files, off the loop
+            info = await loop.run_in_executor(None, self.info_cache.get, url)
+            if info is None:
+                info = await self.info_engine.extract_info_async(url)
+                await loop.run_in_executor(None, self.info_cache.put, url, info)
+            
+            #Display relevant information
+            self.log_message(f"Title: {info.get('title', 'N/A')}")
+            self.log_message(f"Uploader: {info.get('uploader', 'N/A')}")
+            self.log_message(f"Duration: {info.get('duration_string', 'N/A')}")
+            self.log_message(f"View Count: {info.get('view_count', 'N/A')}")
+            self.log_message(f"Upload Date: {info.get('upload_date', 'N/A')}")
+            self.log_message("-" * 50)
+            self.run_on_ui(self.show_format_estimates, info)
+            
+            source = thumbnail_url(info, url)
+            if source:
+                self.engine.submit(self.fetch_preview(url, source))
+            
+        except ExtractionError as e:
+            self.log_message(f"Error getting video info: {e}")
+        except Exception as e:
+            self.log_message(f"Unexpected error: {str(e)}")
+        finally:
+            self.run_on_ui(self.update_queue_status)
+    
+    async def fetch_preview(self, url, source):
+        """Fetch the "Get Info" thumbnail of url (runs on the process engine)"""
+        data = await self.thumbnails.get(source, PREVIEW_SIZE)
+        if data is not None:
+            self.run_on_ui(self.show_preview, url, data)
+    
+    def show_preview(self, url, data):
+        """Show the thumbnail of url unless the URL has changed meanwhile"""
+        if url != self.url_var.get().strip():
+            return
+        image = self.photo_image(data)
+        if image is None:
+            return
+        self.preview_image = image
+        self.preview_label.configure(image=image)
+        self.preview_label.grid()
+    
+    def clear_preview(self, *args):
+        """Hide the thumbnail when the URL changes"""
+        if self.preview_image is not None:
+            self.preview_label.configure(image='')
+            self.preview_label.grid_remove()
+            self.preview_image = None
+    
+    def photo_image(self, data):
+        """Tk image from PNG data, None if Tk cannot read it"""
+        try:
+            return tk.PhotoImage(data=base64.b64encode(data).decode('ascii'), format='png')
+        except tk.TclError:
+            return None
+    
+    def on_queue_scroll(self, first, last):
+        """Scrollbar callback of the queue list; rows scrolled into view get their thumbnails"""
+        self.queue_scroll.set(first, last)
+        self.schedule_thumbnail_refresh()
+    
+    def schedule_thumbnail_refresh(self):
+        """Refresh the visible rows' thumbnails shortly, once for a burst of scrolling or row updates"""
+        if self.thumbnail_refresh is None:
+            self.thumbnail_refresh = self.root.after(100, self.refresh_thumbnails)
+    
+    def visible_queue_rows(self):
+        """Rows of the queue list currently scrolled into view"""
+        rows = self.queue_tree.get_children()
+        first, last = self.queue_tree.yview()
+        return rows[int(first * len(rows)):math.ceil(last * len(rows))]
+    
+    def refresh_thumbnails(self):
+        """Give the visible queue rows their thumbnails from memory; missing ones are loaded from disk or fetched"""
+        self.thumbnail_refresh = None
+        for row in self.visible_queue_rows():
+            source = self.row_thumbnails.get(row)
+            if not source or not self.queue_tree.exists(row):
+                continue
+            key = (source, ROW_SIZE)
+            image = self.thumbnail_images.get(key)
+            if image is None:
+                #Loaded off the Tk thread; sources being loaded or that failed are skipped
+                if source not in self.thumbnail_requests:
+                    self.thumbnail_requests.add(source)
+                    self.engine.submit(self.fetch_thumbnail(source))
+                continue
+            rows = self.thumbnail_rows.setdefault(key, set())
+            if row not in rows:
+                rows.add(row)
+                self.queue_tree.item(row, image=image)
+    
+    async def fetch_thumbnail(self, source):
+        """Read a row thumbnail from disk, else fetch and shrink it (runs on the process engine)"""
+        data = await self.thumbnails.get(source, ROW_SIZE)
+        if data is not None:
+            self.run_on_ui(self.thumbnail_fetched, source, data)
+    
+    def thumbnail_fetched(self, source, data):
+        """Show a loaded row thumbnail; failed ones stay in thumbnail_requests so they are not fetched again"""
+        if source not in self.row_thumbnails.values():
+            #Its rows were removed while it loaded
+            self.thumbnail_requests.discard(source)
             return
+        image = self.photo_image(data)
+        if image is None:
+            return
+        self.thumbnail_images.put((source, ROW_SIZE), image)
+        self.thumbnail_requests.discard(source)
+        self.schedule_thumbnail_refresh()
+    
+    def thumbnail_evicted(self, key, image):
+        """Take an image dropped from the memory cache off its rows; they reload it from disk when visible"""
+        for row in self.thumbnail_rows.pop(key, ()):
+            if self.queue_tree.exists(row):
+                self.queue_tree.item(row, image='')
+    
+    def selected_format(self):
+        """Quality choice without the size estimate shown next to it"""
+        return self.format_var.get().split(' ')[0]
+    
+    def show_format_estimates(self, info):
+        """Label each quality choice with the formats, size and bitrate it would download"""
+        can_merge = self.check_ffmpeg()
+        labels = []
+        for choice in VIDEO_FORMATS:
+            plan = plan_video(info, choice, can_merge)
+            if plan is None:
+                labels.append(choice)
+                continue
+            labels.append(f"{choice} ({plan.height}p, {describe_plan(plan)})")
+            self.log_message(f"🎯 {choice}: format {plan.format_id} ({plan.height}p, {describe_plan(plan)})")
         
-        if not self.url_var.get().strip():
+        selected = self.selected_format()
+        self.format_combo['values'] = labels
+        if selected in VIDEO_FORMATS:
+            self.format_var.set(labels[VIDEO_FORMATS.index(selected)])
+    
+    def reset_format_estimates(self, *args):
+        """Drop the size estimates when the URL changes"""
+        if tuple(self.format_combo['values']) != tuple(VIDEO_FORMATS):
+            self.format_var.set(self.selected_format())
+            self.format_combo['values'] = VIDEO_FORMATS
+    
+    def start_download(self):
+        """Add the current URL to the download queue"""
+        url = self.url_var.get().strip()
+        if not url:
             messagebox.showwarning("Warning", "Please enter a video URL")
             return
         
@@ -449,113 +855,329 @@ class YouTubeDownloaderGUI:
                 self.install_dependencies()
             return
         
-        self.is_downloading = True
-        self.download_btn.config(state="disabled")
+        if self.playlist_mode_var.get():
+            self.start_playlist(url, self.get_download_options())
+            return
+        
+        if self.download_queue.is_active(url_key(url)):
+            self.log_message(f"⏭️ Already in the queue: {url}")
+            return
+        
+        job = self.download_queue.submit(url, self.get_download_options())
+        self.log_message(f"Queued: {job.url}")
+    
+    def start_playlist(self, url, options):
+        """List a playlist in the background and queue one job per entry"""
+        batch = PlaylistBatch(url)
+        self.playlist_batches.append(batch)
         
-        def download_thread():
+        def list_thread():
+            self.log_message(f"📃 Listing playlist: {url}")
+            skipped = 0
             try:
-                self.progress_var.set("Downloading... ⬇️")
-                self.progress_bar.start()
-                
-                #Build command using the available downloader
-                downloader = self.get_downloader_command()
-                if not downloader:
-                    self.log_message("Error: No downloader available!")
-                    return
-                    
-                cmd = [downloader]
-                
-                #Add options
-                if self.audio_only_var.get():
-                    audio_format = self.audio_format_var.get()
-                    
-                    if audio_format == "mp3":
-                        if self.check_ffmpeg():
-                            #FFmpeg available, force MP3 conversion
-                            #Use a format that guarantees conversion will happen
-                            cmd.extend(['--format', 'best[acodec!=mp3]/bestaudio'])
-                            cmd.extend(['-x', '--audio-format', 'mp3', '--audio-quality', '0'])
-                            self.log_message("FFmpeg detected. Will force conversion to MP3.")
-                        else:
-                            #No FFmpeg, try to get MP3 directly or fallback to M4A
-                            self.log_message("FFmpeg not found. Trying to download MP3 directly or will fallback to M4A...")
-                            cmd.extend(['--format', 'bestaudio[ext=mp3]/bestaudio[ext=m4a]/bestaudio'])
-                            cmd.extend(['--extract-audio'])
-                    elif audio_format == "best":
-                        cmd.extend(['--format', 'bestaudio'])
-                    elif audio_format in ["m4a", "webm"]:
-                        cmd.extend(['--format', f'bestaudio[ext={audio_format}]/bestaudio'])
-                    else:
-                        cmd.extend(['--format', 'bestaudio'])
-                else:
-                    if self.format_var.get() != "best":
-                        if self.format_var.get() == "worst":
-                            cmd.append('--format=worst')
-                        else:
-                            #Extract resolution number (e.g., "720p" -> "720")
-                            resolution = self.format_var.get().replace('p', '')
-                            cmd.append(f'--format=best[height<={resolution}]')
-                
-                #Always use no-playlist to download single videos only
-                cmd.append('--no-playlist')
-                
-                #Set output directory
-                cmd.extend(['-o', os.path.join(self.download_path.get(), '%(title)s.%(ext)s')])
-                
-                #Add URL
-                cmd.append(self.url_var.get().strip())
-                
-                self.log_message(f"Executing: {' '.join(cmd)}")
-                
-                #Run download
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                                         text=True, universal_newlines=True)
-                
-                #Read output in real-time
-                for line in process.stdout:
-                    self.log_message(line.strip())
-                
-                process.wait()
-                
-                if process.returncode == 0:
-                    self.log_message("✅ Download completed successfully!")
-                    messagebox.showinfo("Success", "✅ Download completed!")
-                else:
-                    self.log_message("❌ Download failed!")
+                for entry in iter_playlist_entries(self.get_downloader_command(), url):
+                    job = entry_job(entry, options)
+                    if job is None:
+                        continue
+                    if entry.get('formats'):
+                        #Not a playlist: a full extraction we can reuse for the download
+                        self.info_cache.put(job.url, entry)
+                    batch.title = batch.title or entry.get('playlist_title') or entry.get('playlist')
                     
+                    #Entries already in the queue (or listed twice) are not downloaded again
+                    if self.download_queue.add(job) is not job:
+                        skipped += 1
+                        continue
+                    batch.add(job)
+                batch.finish_listing()
+                self.log_message(f"📃 Queued {len(batch.jobs)} entries from {batch.title or url}"
+                                 f"{f', skipped {skipped} already in the queue' if skipped else ''}")
+            except PlaylistError as e:
+                self.log_message(f"❌ Could not list playlist: {e}")
+                batch.finish_listing(str(e))
             except Exception as e:
-                self.log_message(f"Error: {str(e)}")
-                messagebox.showerror("Error", f"Download failed: {str(e)}")
+                self.log_message(f"❌ Could not list playlist: {str(e)}")
+                batch.finish_listing(str(e))
             finally:
-                self.is_downloading = False
-                self.download_btn.config(state="normal")
-                self.progress_bar.stop()
-                self.progress_var.set("Ready ✅")
+                self.run_on_ui(self.report_playlist_batches)
+        
+        threading.Thread(target=list_thread, daemon=True).start()
+    
+    def report_playlist_batches(self):
+        """Log a summary for every playlist whose jobs have all finished"""
+        for batch in list(self.playlist_batches):
+            summary = batch.take_summary()
+            if summary is None:
+                continue
+            self.playlist_batches.remove(batch)
+            self.log_message(
+                f"📃 Playlist '{summary['title']}': {summary['completed']}/{summary['items']} downloaded, "
+                f"{summary['failed']} failed, {summary['items_per_minute']:.1f} items/min, "
+                f"{format_bytes(summary['total_bytes'])} total")
+    
+    def get_download_options(self):
+        """Snapshot the download options so queued jobs are not affected by later UI changes"""
+        return {
+            "download_path": self.download_path.get(),
+            "scratch_dir": self.scratch_dir.get(),
+            "format": self.selected_format(),
+            "audio_only": self.audio_only_var.get(),
+            "audio_format": self.audio_format_var.get(),
+            "concurrent_fragments": self.fragments_var.get(),
+            "http_chunk_size": self.chunk_size_var.get(),
+            "external_downloader": self.external_downloader_var.get(),
+        }
+    
+    def update_max_workers(self):
+        """Resize the worker pool from the spinbox"""
+        try:
+            self.download_queue.set_max_workers(self.max_workers_var.get())
+        except (tk.TclError, ValueError):
+            pass
+    
+    def update_bandwidth_limit(self, event=None):
+        """Apply the bandwidth limit from the combobox"""
+        limit = self.bandwidth_limit_var.get().strip() or "off"
+        if limit == self.bandwidth.limit:
+            return
+        try:
+            self.bandwidth.configure(limit)
+        except ValueError:
+            messagebox.showerror("Error", f"Invalid bandwidth limit: {limit}\nUse a rate such as 500K or 5M, or off.")
+            self.bandwidth_limit_var.set(self.bandwidth.limit)
+            return
+        self.log_message(f"🌐 Bandwidth limit: {limit}")
+    
+    def resume_unfinished_jobs(self):
+        """Queue the jobs the journal says never finished; yt-dlp continues their .part files"""
+        jobs = self.journal.take_unfinished()
+        if not jobs:
+            return
+        self.log_message(f"♻️ Resuming {len(jobs)} unfinished download(s) from the last session")
+        for job in jobs:
+            self.download_queue.add(job)
+    
+    def on_job_update(self, job):
+        """Queue callback; record state changes and hand the update over to the Tk thread"""
+        self.journal.record(job)
+        if job.is_finished:
+            self.metrics.record(job)
+        with self.dirty_lock:
+            schedule = not self.dirty_jobs
+            self.dirty_jobs[job.id] = job
+        if schedule:
+            self.run_on_ui(self.flush_job_updates)
+    
+    def flush_job_updates(self):
+        """Refresh every job row that changed since the last flush"""
+        with self.dirty_lock:
+            jobs = list(self.dirty_jobs.values())
+            self.dirty_jobs.clear()
+        for job in jobs:
+            self.refresh_job_row(job)
+        self.update_queue_status(finished=any(job.is_finished for job in jobs))
+        if self.playlist_batches:
+            self.report_playlist_batches()
+    
+    def refresh_job_row(self, job):
+        """Create or update the queue row for job"""
+        status = {
+            DownloadJob.QUEUED: "⏳ Queued",
+            DownloadJob.RUNNING: "⬇️ Downloading",
+            DownloadJob.CONVERTING: "🔄 Converting",
+            DownloadJob.PAUSED: "⏸️ Paused",
+            DownloadJob.DONE: "✅ Done",
+            DownloadJob.FAILED: "❌ Failed",
+            DownloadJob.CANCELLED: "🚫 Cancelled",
+        }.get(job.state, job.state)
+        running = job.state == DownloadJob.RUNNING
+        #Finished jobs show their average rate, running ones the current rate
+        speed = job.speed if running else job.average_speed if job.is_finished else None
+        values = (job.title or job.url, status, f"{job.progress:.0f}%",
+                  format_speed(speed) if speed else "",
+                  format_eta(job.eta) if running and job.eta is not None else "",
+                  job.result)
+        
+        if self.queue_tree.exists(job.id):
+            self.queue_tree.item(job.id, values=values)
+        else:
+            self.queue_tree.insert('', tk.END, iid=job.id, values=values)
+        
+        #A row's thumbnail URL is known from the playlist entry, the extracted info or a YouTube ID
+        if self.row_thumbnails.get(job.id) is None and (job.id not in self.row_thumbnails or job.thumbnail):
+            self.row_thumbnails[job.id] = job.thumbnail or thumbnail_url(url=job.url)
+            if self.row_thumbnails[job.id]:
+                self.schedule_thumbnail_refresh()
+    
+    def update_queue_status(self, finished=False):
+        """Reflect the queue state in the progress label, bar and throughput readout"""
+        running_jobs = self.download_queue.running_jobs()
+        running, queued = self.download_queue.counts()
+        converting = len(self.download_queue.converting_jobs())
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate')
+        if running_jobs:
+            status = f"{running} running, {queued} queued"
+            if converting:
+                status += f", {converting} converting"
+            self.progress_var.set(f"Downloading... ⬇️ ({status})")
+            #Overall progress is the mean of the running jobs' progress
+            self.progress_bar['value'] = sum(job.progress for job in running_jobs) / len(running_jobs)
+            total_speed = sum(job.speed or 0 for job in running_jobs)
+            self.throughput_var.set(f"⚡ {format_speed(total_speed)}")
+        elif converting:
+            self.progress_var.set(f"Converting... 🔄 ({converting} converting)")
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.start()
+            self.throughput_var.set("")
+        else:
+            self.progress_var.set("Ready ✅")
+            self.progress_bar['value'] = 0
+            self.throughput_var.set("")
+            if finished:
+                self.report_queue_finished()
+    
+    def report_queue_finished(self):
+        """Summarise the batch once the queue has drained"""
+        finished = [job for job in self.download_queue.jobs()
+                    if job.is_finished and job.finished_at > self.last_batch_report]
+        if not finished:
+            return
+        self.last_batch_report = max(job.finished_at for job in finished)
         
-        threading.Thread(target=download_thread, daemon=True).start()
+        #Nothing to report about downloads the user cancelled
+        finished = [job for job in finished if job.state != DownloadJob.CANCELLED]
+        if not finished:
+            return
+        
+        failed = [job for job in finished if job.state == DownloadJob.FAILED]
+        if failed:
+            self.show_message(messagebox.showerror, "Error", f"❌ {len(failed)} of {len(finished)} downloads failed. See the log for details.")
+        else:
+            self.show_message(messagebox.showinfo, "Success", "✅ Download completed!")
+    
+    def selected_jobs(self):
+        """Jobs of the rows selected in the queue list"""
+        selected = set(self.queue_tree.selection())
+        return [job for job in self.download_queue.jobs() if job.id in selected]
+    
+    def pause_selected_jobs(self):
+        """Stop the selected downloads, keeping their partial files for Resume"""
+        for job in self.selected_jobs():
+            self.download_queue.pause(job)
+    
+    def resume_selected_jobs(self):
+        """Queue the selected paused downloads again"""
+        for job in self.selected_jobs():
+            self.download_queue.resume(job)
+    
+    def cancel_selected_jobs(self):
+        """Stop the selected downloads for good, asking whether to keep their partial files"""
+        jobs = [job for job in self.selected_jobs() if not job.is_finished]
+        if not jobs:
+            return
+        answer = messagebox.askyesnocancel("Cancel Downloads",
+                                           f"Cancel {len(jobs)} download(s).\n\nDelete the partially downloaded files?\n"
+                                           "(No keeps them, so the same download can continue later.)")
+        if answer is None:
+            return
+        for job in jobs:
+            self.download_queue.cancel(job, keep_partial=not answer)
+    
+    def clear_finished_jobs(self):
+        """Remove finished jobs from the queue list"""
+        for job in self.download_queue.clear_finished():
+            if self.queue_tree.exists(job.id):
+                self.queue_tree.delete(job.id)
+            self.forget_thumbnail_row(job.id)
+    
+    def forget_thumbnail_row(self, row):
+        """Drop a removed row from the thumbnail maps so they do not grow for the whole session"""
+        self.row_thumbnails.pop(row, None)
+        for key in [key for key, rows in self.thumbnail_rows.items() if row in rows]:
+            rows = self.thumbnail_rows[key]
+            rows.discard(row)
+            if not rows:
+                del self.thumbnail_rows[key]
+    
+    def show_stats(self):
+        """Open (or raise) the stats panel with per-job phase timings and throughput"""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("📊 Download Stats")
+        window.configure(bg='#1e1e1e')
+        window.geometry("900x360")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(1, weight=1)
+        self.stats_window = window
+        
+        self.stats_var = tk.StringVar()
+        ttk.Label(window, textvariable=self.stats_var, style='Custom.TLabel', justify=tk.LEFT).grid(row=0, column=0, sticky=tk.W, padx=10, pady=10)
+        
+        columns = ("title", "state", "bytes", "average", "peak") + PHASES
+        self.stats_tree = ttk.Treeview(window, columns=columns, show='headings', style='Custom.Treeview')
+        for column in columns:
+            self.stats_tree.heading(column, text=column.capitalize(), anchor=tk.W)
+            self.stats_tree.column(column, width=200 if column == "title" else 70,
+                                   stretch=column == "title", anchor=tk.W)
+        self.stats_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
+        
+        self.refresh_stats()
+    
+    def refresh_stats(self):
+        """Update the stats panel once a second while it is open"""
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            self.stats_window = None
+            return
+        
+        summary = self.metrics.summary()
+        phases = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in summary["phase_seconds"].items())
+        states = ", ".join(f"{count} {state}" for state, count in sorted(summary["jobs_by_state"].items()))
+        self.stats_var.set(f"Finished jobs: {summary['jobs']} ({states or 'none'})   "
+                           f"Downloaded: {format_bytes(summary['bytes'])}   "
+                           f"Peak: {format_speed(summary['peak_bytes_per_second'])}\n"
+                           f"Time per phase: {phases}\n"
+                           f"Exported to: {self.metrics.textfile}")
+        
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for record in reversed(summary["recent"]):
+            values = (record["title"] or record["url"], record["state"], format_bytes(record["bytes"]),
+                      format_speed(record["average_bytes_per_second"]) if record["average_bytes_per_second"] else "",
+                      format_speed(record["peak_bytes_per_second"]) if record["peak_bytes_per_second"] else "")
+            values += tuple(f"{record['phases'][phase]:.2f}s" if phase in record["phases"] else ""
+                            for phase in PHASES)
+            self.stats_tree.insert('', tk.END, values=values)
+        
+        self.root.after(1000, self.refresh_stats)
     
     def install_ffmpeg(self):
         """Install FFmpeg using winget (Windows Package Manager)"""
-        def install_thread():
-            try:
-                self.progress_var.set("Installing FFmpeg... 🔧")
-                self.progress_bar.start()
-                self.log_message("🔧 Installing FFmpeg via winget...")
-                
-                #Try to install FFmpeg using winget
-                result = subprocess.run(['winget', 'install', 'FFmpeg'], 
-                                      capture_output=True, text=True, check=True)
-                
+        self.set_status("Installing FFmpeg... 🔧")
+        self.engine.submit(self.run_ffmpeg_install())
+    
+    async def run_ffmpeg_install(self):
+        """Run the winget install on the process engine and report the outcome"""
+        try:
+            self.log_message("🔧 Installing FFmpeg via winget...")
+            
+            #Try to install FFmpeg using winget
+            returncode, stdout, stderr = await run_captured(['winget', 'install', 'FFmpeg'])
+            
+            if returncode == 0:
                 self.log_message("✅ FFmpeg installed successfully!")
+                self.toolchain.refresh_async()
                 self.log_message("Note: You may need to restart the application for FFmpeg to be detected.")
-                messagebox.showinfo("Success", "✅ FFmpeg installed successfully!\n\nYou may need to restart the application for FFmpeg to be detected.")
-                
-            except subprocess.CalledProcessError as e:
-                error_msg = f"Installation failed. You may need to install FFmpeg manually.\n\nError: {e.stderr if e.stderr else 'Unknown error'}"
-                self.log_message(f"FFmpeg installation failed: {error_msg}")
-                
-                #Provide manual installation instructions
-                manual_msg = """FFmpeg installation failed. Please install manually:
+                self.show_message(messagebox.showinfo, "Success", "✅ FFmpeg installed successfully!\n\nYou may need to restart the application for FFmpeg to be detected.")
+                return
+            
+            error_msg = f"Installation failed. You may need to install FFmpeg manually.\n\nError: {stderr if stderr else 'Unknown error'}"
+            self.log_message(f"FFmpeg installation failed: {error_msg}")
+            
+            #Provide manual installation instructions
+            manual_msg = """FFmpeg installation failed. Please install manually:
 
 1. Visit https://ffmpeg.org/download.html
 2. Download FFmpeg for Windows
@@ -564,12 +1186,12 @@ class YouTubeDownloaderGUI:
 Or try installing winget first:
 - Go to Microsoft Store and install "App Installer"
 - Then try the FFmpeg install button again"""
-                
-                messagebox.showinfo("Manual Installation Required", manual_msg)
-                
-            except FileNotFoundError:
-                #winget not found
-                manual_msg = """Windows Package Manager (winget) not found.
+            
+            self.show_message(messagebox.showinfo, "Manual Installation Required", manual_msg)
+            
+        except FileNotFoundError:
+            #winget not found
+            manual_msg = """Windows Package Manager (winget) not found.
 
 To install FFmpeg manually:
 1. Visit https://ffmpeg.org/download.html
@@ -578,57 +1200,104 @@ To install FFmpeg manually:
 
 Or install winget first:
 - Go to Microsoft Store and install "App Installer" """
-                
-                self.log_message("winget not found. Manual FFmpeg installation required.")
-                messagebox.showinfo("Manual Installation Required", manual_msg)
-                
-            finally:
-                self.progress_bar.stop()
-                self.progress_var.set("Ready ✅")
-        
-        threading.Thread(target=install_thread, daemon=True).start()
+            
+            self.log_message("winget not found. Manual FFmpeg installation required.")
+            self.show_message(messagebox.showinfo, "Manual Installation Required", manual_msg)
+            
+        finally:
+            self.run_on_ui(self.update_queue_status)
     
     def install_dependencies(self):
         """Install yt-dlp using pip"""
-        def install_thread():
-            try:
-                self.progress_var.set("Installing yt-dlp... 📦")
-                self.progress_bar.start()
-                self.log_message("📦 Installing yt-dlp...")
-                
-                result = subprocess.run([sys.executable, '-m', 'pip', 'install', 'yt-dlp'], 
-                                      capture_output=True, text=True, check=True)
-                
+        self.set_status("Installing yt-dlp... 📦")
+        self.engine.submit(self.run_dependency_install())
+    
+    async def run_dependency_install(self):
+        """Run the pip install on the process engine and report the outcome"""
+        try:
+            self.log_message("📦 Installing yt-dlp...")
+            
+            returncode, stdout, stderr = await run_captured([sys.executable, '-m', 'pip', 'install', 'yt-dlp'])
+            
+            if returncode == 0:
                 self.log_message("✅ yt-dlp installed successfully!")
-                messagebox.showinfo("Success", "✅ yt-dlp installed successfully!")
-                
-            except subprocess.CalledProcessError as e:
-                self.log_message(f"Installation failed: {e.stderr}")
-                messagebox.showerror("Error", f"Installation failed: {e.stderr}")
-            finally:
-                self.progress_bar.stop()
-                self.progress_var.set("Ready ✅")
-        
-        threading.Thread(target=install_thread, daemon=True).start()
+                self.toolchain.refresh_async()
+                self.show_message(messagebox.showinfo, "Success", "✅ yt-dlp installed successfully!")
+            else:
+                self.log_message(f"Installation failed: {stderr}")
+                self.show_message(messagebox.showerror, "Error", f"Installation failed: {stderr}")
+        except OSError as e:
+            self.log_message(f"Installation failed: {e}")
+            self.show_message(messagebox.showerror, "Error", f"Installation failed: {e}")
+        finally:
+            self.run_on_ui(self.update_queue_status)
     
     def on_closing(self):
         """Handle window closing - save configuration"""
         #Save current settings
         self.config.update(
             download_path=self.download_path.get(),
-            default_format=self.format_var.get(),
+            scratch_dir=self.scratch_dir.get(),
+            default_format=self.selected_format(),
             audio_only=self.audio_only_var.get(),
             audio_format=self.audio_format_var.get(),
+            playlist_mode=self.playlist_mode_var.get(),
+            max_workers=self.max_workers_var.get(),
+            concurrent_fragments=self.fragments_var.get(),
+            http_chunk_size=self.chunk_size_var.get(),
+            external_downloader=self.external_downloader_var.get(),
+            bandwidth_limit=self.bandwidth.limit,
             window_geometry=self.root.geometry(),
             last_url=self.url_var.get()
         )
         self.config.save_config()
+        
+        #Stop running downloads. The journal is closed first so it still lists
+        #them as running and they are resumed from their .part files next time
+        self.journal.close()
+        self.job_runner.terminate_all()
+        self.bandwidth.stop()
+        self.metrics.close()
+        
         self.root.destroy()
 
+def report_first_paint(root, report_path=None):
+    """Report the time to first paint and quit (used by benchmarks/bench_startup.py)
+
+    The result goes to report_path if given, since windowed (packaged)
+    builds have no stdout.
+    """
+    painted = []
+    
+    def on_map(event):
+        if event.widget is root and not painted:
+            painted.append(True)
+            root.after_idle(first_paint)
+    
+    def first_paint():
+        report = f"first-paint {time.perf_counter() - IMPORT_STARTED:.3f}\n"
+        if report_path:
+            with open(report_path, 'w') as f:
+                f.write(report)
+        elif sys.stdout:
+            sys.stdout.write(report)
+            sys.stdout.flush()
+        root.destroy()
+    
+    root.bind('<Map>', on_map, add='+')
+
 def main():
     """Main function to run the application"""
+    #--startup-benchmark[=FILE] reports the time to first paint and exits
+    startup_benchmark = None
+    for arg in sys.argv[1:]:
+        if arg == '--startup-benchmark' or arg.startswith('--startup-benchmark='):
+            startup_benchmark = arg.partition('=')[2]
+    
     root = tk.Tk()
-    app = YouTubeDownloaderGUI(root)
+    app = YouTubeDownloaderGUI(root, deferred_startup=startup_benchmark is None)
+    if startup_benchmark is not None:
+        report_first_paint(root, startup_benchmark or None)
     
     #Set minimum window size
     root.minsize(600, 400)
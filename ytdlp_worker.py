@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+yt-dlp worker process for YouTube Downloader GUI
+Keeps yt_dlp imported and runs one download per request, so jobs skip the interpreter start-up
+
+Protocol, one line per message:
+  stdin   {"id": "...", "args": [...]}                 run yt-dlp with these arguments
+  stdout  <yt-dlp output, stderr merged>
+          [ytdl-worker] {"id": "...", "exit": 0}        the request is done
+Once at start-up the worker prints [ytdl-worker] {"ready": true, "version": "..."}.
+End of input stops the worker.
+"""
+
+import json
+import sys
+
+SENTINEL = "[ytdl-worker] "
+
+
+def reply(message):
+    """Print a protocol line after whatever yt-dlp has written"""
+    sys.stdout.write(SENTINEL + json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def run(args):
+    """Run yt-dlp's command line entry point in this process; returns its exit code"""
+    import yt_dlp
+
+    try:
+        yt_dlp.main(args)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        #yt-dlp exits with the error message itself
+        print(e.code)
+        return 1
+    except KeyboardInterrupt:
+        return 1
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return 1
+    return 0
+
+
+def main():
+    #The app reads one merged stream, as with a yt-dlp process
+    sys.stderr = sys.stdout
+
+    import yt_dlp
+    reply({"ready": True, "version": yt_dlp.version.__version__})
+
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+            args = [str(arg) for arg in request["args"]]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            continue
+        code = run(args)
+        sys.stdout.flush()
+        reply({"id": request.get("id"), "exit": code})
+
+
+if __name__ == "__main__":
+    main()